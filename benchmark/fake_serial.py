@@ -0,0 +1,170 @@
+
+# imports
+import math
+import random
+import time
+
+# constants
+PROMPT_MAIN = 'TRK>'
+PROMPT_MOTOR = 'MOT>'
+PROMPT_DVB = 'DVB>'
+
+# constants
+AZIMUTH_MOTOR_INDEX = '0'
+ELEVATION_MOTOR_INDEX = '1'
+
+# constants
+RSSI_BASE = 450
+RSSI_NOISE = 5
+
+#
+# This class implements an in-process fake of the Winegard
+# serial port. Commands written to the fake are answered
+# immediately with responses in the firmware format, including
+# the command echo and the menu prompt. Motor moves complete
+# instantly unless a slew rate is supplied. This enables the
+# driver to be benchmarked without a satellite dish or serial
+# hardware.
+#
+class FakeSerial:
+
+	#
+	# Constructor
+	#
+	# @param sky the function which determines the RSSI at an (azimuth, elevation) position, or None for a constant sky
+	# @param slew_rate the motor slew rate in degrees/sec, or None for instant moves
+	#
+	def __init__(self, sky=None, slew_rate=None):
+
+		# set parameters
+		self.sky = sky
+		self.slew_rate = slew_rate
+
+		# initialize state
+		self.prompt = PROMPT_MAIN
+		self.moves = [(180.0, 180.0, 0.0), (45.0, 45.0, 0.0)]
+		self.output = bytearray()
+		self.num_writes = 0
+	#
+
+	#
+	# Determines the number of bytes waiting to be read
+	#
+	@property
+	def in_waiting(self):
+		return len(self.output)
+	#
+
+	#
+	# Writes the supplied bytes
+	#
+	# @param data the command bytes
+	#
+	# @return the number of bytes written
+	#
+	def write(self, data):
+
+		# update write count
+		self.num_writes += 1
+
+		# loop through each command
+		for command in data.decode('utf-8').split('\r')[:-1]:
+
+			# append response
+			self.output += self.respond(command).encode('utf-8')
+		#
+
+		# return the number of bytes written
+		return len(data)
+	#
+
+	#
+	# Reads up to the specified number of bytes
+	#
+	# An empty result indicates a timeout.
+	#
+	# @param size the maximum number of bytes
+	#
+	# @return the bytes read
+	#
+	def read(self, size=1):
+
+		# obtain bytes
+		data = bytes(self.output[:size])
+		del self.output[:size]
+
+		# return the bytes read
+		return data
+	#
+
+	#
+	# Closes the fake serial port
+	#
+	def close(self):
+		pass
+	#
+
+	#
+	# Determines the current angle of the specified motor
+	#
+	# @param index the motor index
+	#
+	# @return the motor angle
+	#
+	def angle(self, index):
+
+		# obtain the current move
+		start_angle, end_angle, start_time = self.moves[index]
+
+		# initialize angle
+		angle = end_angle
+
+		# determine if move is simulated
+		if self.slew_rate != None:
+
+			# determine the distance travelled
+			travel = min(self.slew_rate * (time.monotonic() - start_time), abs(end_angle - start_angle))
+
+			# determine the angle
+			angle = start_angle + travel * (1 if end_angle >= start_angle else -1)
+		#
+
+		# return the angle
+		return angle
+	#
+
+	#
+	# Builds the response to the supplied command
+	#
+	# @param command the command string
+	#
+	# @return the response string
+	#
+	def respond(self, command):
+
+		# initialize values
+		values = command.split()
+		body = ''
+
+		# determine the command
+		if command == 'q':
+			self.prompt = PROMPT_MAIN
+		elif command == 'mot':
+			self.prompt = PROMPT_MOTOR
+		elif command == 'dvb':
+			self.prompt = PROMPT_DVB
+		elif command == 'a':
+			body = f'Angle[0] = {self.angle(0):.2f}\r\nAngle[1] = {self.angle(1):.2f}\r\n'
+		elif len(values) == 3 and values[0] == 'a':
+			index = int(values[1] == ELEVATION_MOTOR_INDEX)
+			self.moves[index] = (self.angle(index), float(values[2]), time.monotonic())
+		elif len(values) == 2 and values[0] == 'rssi':
+			rssi = RSSI_BASE if self.sky == None else int(self.sky(self.angle(0), self.angle(1)))
+			rssi += int(round(random.gauss(0, RSSI_NOISE / math.sqrt(max(int(values[1]), 1)))))
+			body = f'LNB 0 Tuner 1\r\nReads:{values[1]} RSSI[avg: {rssi} cur: {rssi}]\r\n'
+		#
+
+		# return the response string
+		return f'{command}\r\n{body}{self.prompt}'
+	#
+#
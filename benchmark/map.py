@@ -0,0 +1,138 @@
+
+# imports
+import argparse
+import time
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+# imports
+from library.map import Map
+
+# constants
+NUM_POINTS = 500
+STEP_ANGLE = 1.0
+
+# constants
+AZIMUTH_START = 110
+AZIMUTH_END = 240
+ELEVATION_START = 18
+ELEVATION_END = 58
+
+#
+# This class provides the original Map set_data implementation,
+# which redraws the whole figure and spins the event loop for
+# every point, as the baseline for the benchmark.
+#
+class LegacyMap(Map):
+
+	#
+	# Constructor
+	#
+	# @param azimuth_start the azimuth start angle
+	# @param azimuth_end the azimuth end angle
+	# @param elevation_start the elevation start angle
+	# @param elevation_end the elevation end angle
+	# @param step_angle the azimuth/elevation step angle
+	#
+	def __init__(self, azimuth_start, azimuth_end, elevation_start, elevation_end, step_angle):
+
+		# initialize map
+		super().__init__(azimuth_start, azimuth_end, elevation_start, elevation_end, step_angle)
+
+		# draw the image with the figure
+		self.plt_im.set_animated(False)
+	#
+
+	#
+	# Sets the specified data point on the map
+	#
+	# @param azimuth the azimuth angle
+	# @param elevation the elevation angle
+	# @param rssi the signal strength
+	# @param redraw the redraw state
+	# @param step_angle the step angle of the data point
+	#
+	def set_data(self, azimuth, elevation, rssi, redraw=True, step_angle=None):
+
+		# determine x/y position
+		x_pos = int(round((azimuth - self.AZIMUTH_START) / self.STEP_ANGLE))
+		y_pos = int(round((self.ELEVATION_END - elevation) / self.STEP_ANGLE))
+
+		# set data value
+		self.data_array[y_pos, x_pos] = rssi
+
+		# update plot data
+		self.plt_im.set_data(self.data_array)
+
+		# determine redraw state
+		if redraw == True:
+
+			# wait for plot to update
+			plt.pause(0.001)
+		#
+	#
+#
+
+#
+# Measures the point rate of the supplied map
+#
+# Points are set in scan order, with redraw enabled as during a
+# sky scan by default.
+#
+# @param map the map
+# @param num_points the number of points
+# @param redraw the redraw state
+#
+# @return the number of points per second
+#
+def measure(map, num_points, redraw=True):
+
+	# determine the map width
+	width = int((AZIMUTH_END - AZIMUTH_START) / STEP_ANGLE) + 1
+
+	# start timer
+	start_time = time.perf_counter()
+
+	# loop through points
+	for index in range(num_points):
+
+		# determine position
+		azimuth = AZIMUTH_START + (index % width) * STEP_ANGLE
+		elevation = ELEVATION_START + (index // width) * STEP_ANGLE
+
+		# set data point
+		map.set_data(azimuth, elevation, 400 + index % 180, redraw=redraw)
+	#
+
+	# return the point rate
+	return num_points / (time.perf_counter() - start_time)
+#
+
+# MAIN
+
+#
+# Performs main logic
+#
+# This method measures the number of points per second pushed
+# through the legacy and the rate-limited, blitted map with
+# redraw enabled, using the Agg backend.
+#
+if __name__ == "__main__":
+
+	# initialize parser
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--num_points", type=int, default=NUM_POINTS, action="store", required=False, help="The number of points to set")
+
+	# parse arguments
+	args = parser.parse_args()
+
+	# measure maps
+	legacy_rate = measure(LegacyMap(AZIMUTH_START, AZIMUTH_END, ELEVATION_START, ELEVATION_END, STEP_ANGLE), args.num_points)
+	blitted_rate = measure(Map(AZIMUTH_START, AZIMUTH_END, ELEVATION_START, ELEVATION_END, STEP_ANGLE), args.num_points)
+
+	# debug
+	print(f'INFO: Legacy map: {legacy_rate:.0f} points/sec')
+	print(f'INFO: Blitted map: {blitted_rate:.0f} points/sec')
+	print(f'INFO: Speedup: {blitted_rate/legacy_rate:.1f}x')
+#
@@ -0,0 +1,173 @@
+
+# imports
+import argparse
+import asyncio
+import statistics
+import time
+
+# imports
+import library.async_winegard
+from rotator import Rotator
+from library.poller import POLL_INTERVAL
+from benchmark.fake_serial import FakeSerial
+
+# constants
+NUM_CLIENTS = 4
+NUM_BURSTS = 100
+BURST_SIZE = 4
+RATE = 400
+
+# constants
+LOCAL_HOST = '127.0.0.1'
+
+#
+# Drives the server with bursts of pipelined commands
+#
+# Each burst alternates position queries and position commands,
+# such as 'p\nP 180 30\n', written in a single send. Every
+# response line is read back and checked before the next burst.
+#
+# @param port the server port
+# @param client_index the client index
+# @param num_bursts the number of bursts
+# @param burst_size the number of commands of each burst
+# @param interval the time between bursts
+#
+# @return the list of burst latencies
+# @return the number of failed responses
+#
+async def drive_client(port, client_index, num_bursts, burst_size, interval):
+
+	# connect to server
+	reader, writer = await asyncio.open_connection(LOCAL_HOST, port)
+
+	# initialize results
+	latencies = []
+	num_failures = 0
+
+	# loop through bursts
+	for burst_index in range(num_bursts):
+
+		# build burst
+		commands = []
+		num_lines = 0
+		for index in range(burst_size):
+			if index % 2 == 0:
+				commands.append('p\n')
+				num_lines += 2
+			else:
+				commands.append(f'P {100 + (burst_index + client_index) % 100} {20 + index}\n')
+				num_lines += 1
+			#
+		#
+
+		# send burst
+		start_time = time.perf_counter()
+		writer.write(''.join(commands).encode('utf-8'))
+		await writer.drain()
+
+		# read responses
+		for index in range(num_lines):
+			line = await reader.readline()
+			num_failures += line.startswith(b'RPRT 1') or len(line) == 0
+		#
+
+		# append latency
+		latencies.append(time.perf_counter() - start_time)
+
+		# wait for the next burst
+		await asyncio.sleep(max(interval - latencies[-1], 0))
+	#
+
+	# disconnect without sending the quit command
+	writer.close()
+
+	# return the results
+	return latencies, num_failures
+#
+
+#
+# Runs the load test
+#
+# @param num_clients the number of concurrent clients
+# @param num_bursts the number of bursts per client
+# @param burst_size the number of commands of each burst
+# @param rate the total command rate in commands/sec
+# @param poll_interval the position poll interval, or 0 to query the position on demand
+#
+# @return the results dictionary (commands/sec, median and max burst latency, failures, reconnect status)
+#
+async def run(num_clients, num_bursts, burst_size, rate, poll_interval):
+
+	# initialize rotator on a fake serial port
+	rotator = Rotator(None, LOCAL_HOST, 0, 0, poll_interval)
+	rotator.winegard.start(FakeSerial())
+	await rotator.winegard.enter_motor_menu()
+	await rotator.listen()
+	port = rotator.server.sockets[0].getsockname()[1]
+
+	# start background tasks
+	rotator.start_tasks()
+
+	# determine the time between the bursts of each client
+	interval = num_clients * burst_size / rate
+
+	# drive clients concurrently
+	start_time = time.perf_counter()
+	results = await asyncio.gather(*[drive_client(port, index, num_bursts, burst_size, interval) for index in range(num_clients)])
+	elapsed_time = time.perf_counter() - start_time
+
+	# reconnect after the clients disconnected
+	latencies, num_failures = await drive_client(port, num_clients, 1, burst_size, 0)
+
+	# determine statistics
+	all_latencies = sorted(latency for client_latencies, client_failures in results for latency in client_latencies)
+	total_failures = sum(client_failures for client_latencies, client_failures in results)
+	num_commands = num_clients * num_bursts * burst_size
+
+	# debug
+	print(f'INFO: Clients: {num_clients}')
+	print(f'INFO: Commands: {num_commands} in {elapsed_time:.2f} sec ({num_commands/elapsed_time:.0f} commands/sec)')
+	print(f'INFO: Burst latency: median {statistics.median(all_latencies)*1e3:.2f} ms, max {all_latencies[-1]*1e3:.2f} ms')
+	print(f'INFO: Failed responses: {total_failures}')
+	print(f'INFO: Reconnect: {"ok" if num_failures == 0 and len(latencies) == 1 else "failed"}')
+
+	# perform cleanup
+	await rotator.cleanup()
+
+	# return the results
+	return {	'commands_per_sec': num_commands / elapsed_time,
+				'median_latency': statistics.median(all_latencies),
+				'max_latency': all_latencies[-1],
+				'failures': total_failures,
+				'reconnect': num_failures == 0 and len(latencies) == 1 }
+#
+
+# MAIN
+
+#
+# Performs main logic
+#
+# This method serves the rotctld protocol from a fake Winegard
+# and drives it with several local clients sending pipelined
+# bursts of commands at the specified total rate.
+#
+if __name__ == "__main__":
+
+	# initialize parser
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--num_clients", type=int, default=NUM_CLIENTS, action="store", required=False, help="The number of concurrent clients")
+	parser.add_argument("--num_bursts", type=int, default=NUM_BURSTS, action="store", required=False, help="The number of bursts per client")
+	parser.add_argument("--burst_size", type=int, default=BURST_SIZE, action="store", required=False, help="The number of commands per burst")
+	parser.add_argument("--rate", type=float, default=RATE, action="store", required=False, help="The total command rate in commands/sec")
+	parser.add_argument("--poll_interval", type=float, default=POLL_INTERVAL, action="store", required=False, help="The position poll interval in seconds, or 0 to query the position on demand")
+
+	# parse arguments
+	args = parser.parse_args()
+
+	# disable inter-command delay
+	library.async_winegard.COMMAND_DELAY = 0
+
+	# run load test
+	asyncio.run(run(args.num_clients, args.num_bursts, args.burst_size, args.rate, args.poll_interval))
+#
@@ -0,0 +1,232 @@
+
+# imports
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+
+# imports
+from benchmark.map import LegacyMap
+from library.map import Map
+from library.scanfile import read_scan_data
+from library.scanfile import infer_grid
+from library.scanfile import convert_to_binary
+
+# constants
+STEP_ANGLE = 0.1
+NUM_AZIMUTHS = 1000
+NUM_ELEVATIONS = 1000
+NUM_LEGACY_POINTS = 2000
+
+# constants
+AZIMUTH_START = 100
+ELEVATION_START = 0
+
+#
+# Writes a synthetic serpentine scan data file
+#
+# @param file_path the scan data file path
+# @param num_azimuths the number of azimuth angles
+# @param num_elevations the number of elevation angles
+#
+def write_scan_file(file_path, num_azimuths, num_elevations):
+
+	# determine the grid angles
+	azimuths = np.round(AZIMUTH_START + np.arange(num_azimuths) * STEP_ANGLE, 1)
+	elevations = np.round(ELEVATION_START + np.arange(num_elevations) * STEP_ANGLE, 1)
+
+	# reverse the azimuth direction of every other row
+	grid = np.tile(azimuths, (num_elevations, 1))
+	grid[1::2] = grid[1::2, ::-1]
+
+	# determine the data points
+	data = np.empty((num_azimuths * num_elevations, 5))
+	data[:, 0] = grid.ravel()
+	data[:, 1] = np.repeat(elevations, num_azimuths)
+	data[:, 2] = np.random.randint(400, 580, len(data))
+	data[:, 3] = STEP_ANGLE
+	data[:, 4] = 40
+
+	# write to file
+	np.savetxt(file_path, data, fmt=['%.1f', '%.1f', '%d', '%.1f', '%d'])
+#
+
+#
+# Reads the scan data as open.py did before the NumPy loader
+#
+# @param file_path the scan data file path
+#
+# @return the list of data entries
+#
+def legacy_read(file_path):
+
+	# initialize data
+	scan_data = []
+
+	# open input file
+	with open(file_path, 'r') as file:
+
+		# loop through file lines
+		for line in file:
+
+			# split line into values
+			line_data = line.split()
+
+			# determine if valid number of values
+			if len(line_data) >= 3:
+
+				# parse optional step angle
+				step = None
+				if len(line_data) > 3:
+					step = float(line_data[3])
+				#
+
+				# append scan data
+				scan_data.append({'azimuth': float(line_data[0]), 'elevation': float(line_data[1]), 'rssi': float(line_data[2]), 'step': step})
+			#
+		#
+	#
+
+	# return the scan data
+	return scan_data
+#
+
+#
+# Determines the map grid as open.py did before the NumPy loader
+#
+# @param scan_data the list of data entries
+#
+# @return the map grid
+#
+def legacy_grid(scan_data):
+
+	# determine start/end angles
+	azimuth_start = min(d['azimuth'] for d in scan_data)
+	azimuth_end = max(d['azimuth'] for d in scan_data)
+	elevation_start = min(d['elevation'] for d in scan_data)
+	elevation_end = max(d['elevation'] for d in scan_data)
+
+	# use the finest recorded step angle
+	step_angle = min(d['step'] for d in scan_data if d['step'] != None)
+
+	# return the grid
+	return azimuth_start, azimuth_end, elevation_start, elevation_end, step_angle
+#
+
+#
+# Measures the time and peak memory to read a scan data file
+#
+# @param file_path the scan data file path
+#
+# @return the time to read the scan data and determine its grid
+# @return the peak memory allocated while reading
+#
+def measure_read(file_path):
+
+	# start measurement
+	tracemalloc.start()
+	start_time = time.perf_counter()
+
+	# read scan data
+	status, scan_data = read_scan_data(file_path)
+	grid = infer_grid(scan_data)
+
+	# stop measurement
+	read_time = time.perf_counter() - start_time
+	size, peak = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+
+	# return the time and peak memory
+	return read_time, peak
+#
+
+# MAIN
+
+#
+# Performs main logic
+#
+# This method writes a synthetic serpentine scan data file at a
+# 0.1 degree step angle and measures the time to read it and fill
+# the map, using the line by line parser with one set_data call
+# per point, and the NumPy loader with one set_data_batch call.
+# Filling the legacy map is measured on the first data points
+# only and extrapolated to the whole file. The file is then
+# converted to the binary format, which is memory mapped, and
+# the time and peak memory to read both formats are measured.
+#
+if __name__ == "__main__":
+
+	# initialize parser
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--num_azimuths", type=int, default=NUM_AZIMUTHS, action="store", required=False, help="The number of azimuth angles")
+	parser.add_argument("--num_elevations", type=int, default=NUM_ELEVATIONS, action="store", required=False, help="The number of elevation angles")
+	parser.add_argument("--num_legacy_points", type=int, default=NUM_LEGACY_POINTS, action="store", required=False, help="The number of points set on the legacy map")
+
+	# parse arguments
+	args = parser.parse_args()
+
+	# initialize file path
+	file_path = os.path.join(tempfile.mkdtemp(), 'scan_data.txt')
+
+	# debug
+	print(f'INFO: Writing {args.num_azimuths * args.num_elevations} data points')
+
+	# write scan file
+	write_scan_file(file_path, args.num_azimuths, args.num_elevations)
+
+	# LEGACY
+
+	# read scan data
+	start_time = time.perf_counter()
+	scan_data = legacy_read(file_path)
+	grid = legacy_grid(scan_data)
+	scan_data.sort(key=lambda d: d['step'] or 0, reverse=True)
+	legacy_read_time = time.perf_counter() - start_time
+
+	# fill the first data points
+	map = LegacyMap(*grid)
+	num_points = min(args.num_legacy_points, len(scan_data))
+	start_time = time.perf_counter()
+	for data_entry in scan_data[:num_points]:
+		map.set_data(data_entry['azimuth'], data_entry['elevation'], data_entry['rssi'], redraw=False, step_angle=data_entry['step'])
+	#
+	legacy_fill_time = (time.perf_counter() - start_time) * len(scan_data) / num_points
+
+	# VECTORIZED
+
+	# read scan data
+	start_time = time.perf_counter()
+	status, scan_data = read_scan_data(file_path)
+	grid = infer_grid(scan_data)
+	read_time = time.perf_counter() - start_time
+
+	# fill the map
+	map = Map(*grid)
+	start_time = time.perf_counter()
+	map.set_data_batch(scan_data['azimuth'], scan_data['elevation'], scan_data['rssi'], redraw=True, step_angles=scan_data['step'])
+	fill_time = time.perf_counter() - start_time
+
+	# BINARY
+
+	# convert scan file
+	binary_path = os.path.join(os.path.dirname(file_path), 'scan_data.scan')
+	convert_to_binary(file_path, binary_path)
+
+	# measure the text and binary loaders
+	text_read_time, text_memory = measure_read(file_path)
+	binary_read_time, binary_memory = measure_read(binary_path)
+
+	# remove scan files
+	os.remove(file_path)
+	os.remove(binary_path)
+	os.rmdir(os.path.dirname(file_path))
+
+	# debug
+	print(f'INFO: Legacy read: {legacy_read_time:.2f} sec, fill: {legacy_fill_time:.2f} sec (extrapolated from {num_points} points)')
+	print(f'INFO: Vectorized read: {read_time:.2f} sec, fill and redraw: {fill_time:.2f} sec')
+	print(f'INFO: Speedup: {(legacy_read_time + legacy_fill_time) / (read_time + fill_time):.0f}x')
+	print(f'INFO: Text read: {text_read_time*1000:.1f} ms, peak memory: {text_memory/1e6:.1f} MB')
+	print(f'INFO: Binary read: {binary_read_time*1000:.1f} ms, peak memory: {binary_memory/1e6:.1f} MB')
+#
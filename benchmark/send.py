@@ -0,0 +1,147 @@
+
+# imports
+import argparse
+import time
+
+# imports
+import library.winegard
+from library.winegard import Winegard
+from benchmark.fake_serial import FakeSerial
+
+# constants
+NUM_COMMANDS = 20000
+
+#
+# This class provides the original Winegard send implementation,
+# which reads the response one byte at a time, as the baseline
+# for the benchmark.
+#
+class LegacyWinegard(Winegard):
+
+	#
+	# Sends the supplied command
+	#
+	# @param cmd_string the command to send
+	#
+	# @return true if successful, false otherwise
+	# @return the response string if successful
+	#
+	def send(self, cmd_string):
+
+		# initialize status
+		status = False
+
+		# initialize response
+		response = []
+
+		# write serial data
+		self.ser.write(cmd_string.encode('utf-8'))
+
+		# initialize response data
+		resp_data = []
+		resp_timeout = False
+
+		# read until end character is encountered
+		while 62 not in resp_data and resp_timeout == False:
+
+			# read one byte of data
+			resp_bytes = self.ser.read(size=1)
+
+			# determine number of bytes received
+			if len(resp_bytes) > 0:
+				resp_data += resp_bytes
+			else:
+				resp_timeout = True
+			#
+		#
+
+		# determine whether timeout occurred
+		if resp_timeout == False:
+
+			# convert response data to string
+			response = bytearray(resp_data).decode('utf-8')
+			status = True
+		#
+
+		# wait before allowing next command
+		time.sleep(library.winegard.COMMAND_DELAY)
+
+		# return the status and response string
+		return status, response
+	#
+#
+
+#
+# Measures the per-command time of the supplied driver
+#
+# Position and RSSI queries are measured, which are the two
+# commands issued most often during a sky scan. The queries of
+# each type are sent within their menu, which is entered before
+# the timer starts, such that no menu changes are measured and
+# only the send and response reader overhead is compared.
+#
+# @param winegard the winegard driver
+# @param num_commands the number of commands
+#
+# @return the time per command in seconds
+#
+def measure(winegard, num_commands):
+
+	# connect fake serial
+	winegard.ser = FakeSerial()
+
+	# enter motor menu
+	winegard.enter_motor_menu()
+
+	# measure position queries
+	start_time = time.perf_counter()
+	for index in range(num_commands // 2):
+		winegard.get_motor_angle_data()
+	#
+	elapsed_time = time.perf_counter() - start_time
+
+	# enter DVB menu
+	winegard.enter_dvb_menu()
+
+	# measure RSSI queries
+	start_time = time.perf_counter()
+	for index in range(num_commands // 2):
+		winegard.get_dvb_rssi_data()
+	#
+	elapsed_time += time.perf_counter() - start_time
+
+	# return the time per command
+	return elapsed_time / (num_commands // 2 * 2)
+#
+
+# MAIN
+
+#
+# Performs main logic
+#
+# This method measures the per-command overhead of the legacy
+# and framed response readers within a fixed menu. The
+# inter-command delay is disabled so that only the driver
+# overhead is measured.
+#
+if __name__ == "__main__":
+
+	# initialize parser
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--num_commands", type=int, default=NUM_COMMANDS, action="store", required=False, help="The number of commands to send")
+
+	# parse arguments
+	args = parser.parse_args()
+
+	# disable inter-command delay
+	library.winegard.COMMAND_DELAY = 0
+
+	# measure drivers
+	legacy_time = measure(LegacyWinegard(None), args.num_commands)
+	framed_time = measure(Winegard(None), args.num_commands)
+
+	# debug
+	print(f'INFO: Legacy reader: {legacy_time*1e6:.1f} us/command')
+	print(f'INFO: Framed reader: {framed_time*1e6:.1f} us/command')
+	print(f'INFO: Speedup: {legacy_time/framed_time:.1f}x')
+#
@@ -0,0 +1,378 @@
+
+# imports
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import asyncio
+import platform
+import tempfile
+import subprocess
+import contextlib
+from unittest import mock
+
+# imports
+import matplotlib
+matplotlib.use('Agg')
+import numpy as np
+
+# imports
+import library.winegard
+import library.async_winegard
+from library.map import Map
+from library.winegard import Winegard
+from library.scanfile import read_scan_data
+from library.scanfile import infer_grid
+from library.scanfile import convert_to_binary
+from benchmark import send
+from benchmark import map as map_benchmark
+from benchmark import rotctld
+from benchmark.scanfile import write_scan_file
+from benchmark.fake_serial import FakeSerial
+
+# constants
+NUM_COMMANDS = 20000
+NUM_MAP_POINTS = 500
+NUM_BATCH_POINTS = 5000
+NUM_ROTATOR_BURSTS = 200
+OPEN_SIZE = 1000
+NUM_REPEATS = 3
+
+# constants
+SCAN_GRID = (110, 130, 18, 28, 1.0)
+
+# constants
+THRESHOLD = 0.15
+THRESHOLDS = {'rotctld.median_latency': 0.5}
+
+# constants
+HIGHER_IS_BETTER = 'higher'
+LOWER_IS_BETTER = 'lower'
+
+#
+# Measures the Winegard send rate
+#
+# @return the dictionary of metrics
+#
+def run_send():
+
+	# measure the driver
+	command_time = send.measure(Winegard(None), NUM_COMMANDS)
+
+	# return the metrics
+	return {'send.commands_per_sec': (1 / command_time, 'commands/sec', HIGHER_IS_BETTER)}
+#
+
+#
+# Measures the sky scan loop
+#
+# The scan runs headless against a fake serial port with every
+# sleep stubbed out, such that only the cost of the scan loop
+# (commands, settle detection, integration, journaling and file
+# output) is measured.
+#
+# @return the dictionary of metrics
+#
+def run_scan():
+
+	# imports
+	from skyscan import SkyScan
+
+	# initialize output directory
+	output_dir = tempfile.mkdtemp()
+
+	# initialize sky scan with a fake serial port
+	skyscan = SkyScan(None, *SCAN_GRID[:4], SCAN_GRID[4], 0, headless=True)
+	skyscan.output_dir = output_dir
+	skyscan.winegard.connect = lambda: connect_fake(skyscan.winegard)
+
+	# scan without sleeping or printing the data points
+	with mock.patch('time.sleep', lambda duration: None), open(os.devnull, 'w') as null_file, contextlib.redirect_stdout(null_file):
+
+		# perform scan
+		skyscan.setup()
+		start_time = time.perf_counter()
+		skyscan.scan()
+		scan_time = time.perf_counter() - start_time
+		skyscan.cleanup()
+	#
+
+	# remove output directory
+	shutil.rmtree(output_dir)
+
+	# return the metrics
+	return {'scan.points_per_sec': (skyscan.timer.num_done / scan_time, 'points/sec', HIGHER_IS_BETTER)}
+#
+
+#
+# Measures the map point rate with and without redraw
+#
+# @return the dictionary of metrics
+#
+def run_map():
+
+	# measure maps
+	redraw_rate = map_benchmark.measure(Map(map_benchmark.AZIMUTH_START, map_benchmark.AZIMUTH_END, map_benchmark.ELEVATION_START, map_benchmark.ELEVATION_END, map_benchmark.STEP_ANGLE), NUM_MAP_POINTS)
+	batch_rate = map_benchmark.measure(Map(map_benchmark.AZIMUTH_START, map_benchmark.AZIMUTH_END, map_benchmark.ELEVATION_START, map_benchmark.ELEVATION_END, map_benchmark.STEP_ANGLE), NUM_BATCH_POINTS, redraw=False)
+
+	# return the metrics
+	return {	'map.redraw.points_per_sec': (redraw_rate, 'points/sec', HIGHER_IS_BETTER),
+				'map.no_redraw.points_per_sec': (batch_rate, 'points/sec', HIGHER_IS_BETTER) }
+#
+
+#
+# Measures the time to open a large scan data file
+#
+# A synthetic scan at a 0.1 degree step angle is read and filled
+# into the map, as open.py does, from both the text and the
+# binary formats.
+#
+# @return the dictionary of metrics
+#
+def run_open():
+
+	# write scan files
+	file_dir = tempfile.mkdtemp()
+	text_path = os.path.join(file_dir, 'scan_data.txt')
+	binary_path = os.path.join(file_dir, 'scan_data.scan')
+	write_scan_file(text_path, OPEN_SIZE, OPEN_SIZE)
+	convert_to_binary(text_path, binary_path)
+
+	# initialize metrics
+	metrics = {}
+
+	# loop through formats
+	for name, file_path in (('text', text_path), ('binary', binary_path)):
+
+		# read the scan data and fill the map
+		start_time = time.perf_counter()
+		status, scan_data = read_scan_data(file_path)
+		map = Map(*infer_grid(scan_data))
+		map.set_data_batch(scan_data['azimuth'], scan_data['elevation'], scan_data['rssi'], redraw=True, step_angles=scan_data['step'])
+		metrics[f'open.{name}.seconds'] = (time.perf_counter() - start_time, 'sec', LOWER_IS_BETTER)
+
+		# release the memory map before removing the file
+		del map, scan_data
+	#
+
+	# remove scan files
+	shutil.rmtree(file_dir)
+
+	# return the metrics
+	return metrics
+#
+
+#
+# Measures the rotator command throughput over loopback sockets
+#
+# The clients send their bursts back to back, such that the
+# throughput is limited by the rotator rather than the rate.
+#
+# @return the dictionary of metrics
+#
+def run_rotctld():
+
+	# run load test without printing its report
+	with open(os.devnull, 'w') as null_file, contextlib.redirect_stdout(null_file):
+		results = asyncio.run(rotctld.run(rotctld.NUM_CLIENTS, NUM_ROTATOR_BURSTS, rotctld.BURST_SIZE, float('inf'), rotctld.POLL_INTERVAL))
+	#
+
+	# return the metrics
+	return {	'rotctld.commands_per_sec': (results['commands_per_sec'], 'commands/sec', HIGHER_IS_BETTER),
+				'rotctld.median_latency': (results['median_latency'], 'sec', LOWER_IS_BETTER) }
+#
+
+# constants
+CASES = {'send': run_send, 'scan': run_scan, 'map': run_map, 'open': run_open, 'rotctld': run_rotctld}
+
+# HELPER
+
+#
+# Connects the supplied driver to a fake serial port
+#
+# @param winegard the winegard driver
+#
+# @return true
+#
+def connect_fake(winegard):
+
+	# connect fake serial
+	winegard.ser = FakeSerial()
+	winegard.menu = library.winegard.MENU_UNKNOWN
+
+	# return the status
+	return True
+#
+
+#
+# Runs the supplied benchmark cases
+#
+# Each case is run the specified number of times and the best
+# value of each metric is kept, which is the least affected by
+# other load on the machine.
+#
+# @param case_names the list of case names
+# @param num_repeats the number of runs of each case
+#
+# @return the dictionary of results
+#
+def run_cases(case_names, num_repeats):
+
+	# initialize results
+	results = {}
+
+	# loop through cases
+	for case_name in case_names:
+
+		# loop through runs
+		for index in range(num_repeats):
+
+			# loop through metrics
+			for name, (value, unit, better) in CASES[case_name]().items():
+
+				# keep the best value
+				best = results.get(name, {}).get('value')
+				if best == None or (better == HIGHER_IS_BETTER and value > best) or (better == LOWER_IS_BETTER and value < best):
+					results[name] = {'value': value, 'unit': unit, 'better': better}
+				#
+			#
+		#
+
+		# debug
+		print(f'INFO: Completed {case_name}', file=sys.stderr)
+	#
+
+	# return the results
+	return results
+#
+
+#
+# Determines the environment of the benchmark
+#
+# @return the environment dictionary
+#
+def environment():
+
+	# determine the commit
+	try:
+		commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+	except (OSError, subprocess.CalledProcessError):
+		commit = None
+	#
+
+	# return the environment
+	return {	'commit': commit,
+				'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+				'python': platform.python_version(),
+				'numpy': np.__version__,
+				'matplotlib': matplotlib.__version__,
+				'platform': platform.platform(),
+				'cpu_count': os.cpu_count() }
+#
+
+#
+# Compares the supplied results with a baseline
+#
+# A metric regresses when it is worse than the baseline by more
+# than its threshold, as a fraction of the baseline value.
+#
+# @param results the dictionary of results
+# @param baseline the dictionary of baseline results
+# @param threshold the default regression threshold
+#
+# @return the list of comparison entries (name, baseline value, value, change, threshold, regressed)
+#
+def compare(results, baseline, threshold):
+
+	# initialize comparison
+	comparison = []
+
+	# loop through the metrics of both
+	for name, result in results.items():
+		if name in baseline and baseline[name]['value'] > 0:
+
+			# determine the change, positive if better
+			change = (result['value'] - baseline[name]['value']) / baseline[name]['value']
+			change = change if result['better'] == HIGHER_IS_BETTER else -change
+
+			# determine if regressed
+			metric_threshold = THRESHOLDS.get(name, threshold)
+			comparison.append((name, baseline[name]['value'], result['value'], change, metric_threshold, change < -metric_threshold))
+		#
+	#
+
+	# return the comparison
+	return comparison
+#
+
+# MAIN
+
+#
+# Performs main logic
+#
+# This method runs the benchmarks of the scan, render and rotator
+# hot paths against an in-process fake of the Winegard serial port,
+# and prints the results as JSON with the commit and environment,
+# such that runs can be saved and compared across commits. When a
+# baseline result file is supplied, each metric which regressed by
+# more than its threshold is reported and the exit status is 1.
+#
+if __name__ == "__main__":
+
+	# initialize parser
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES), help="The benchmark cases to run")
+	parser.add_argument("--repeat", type=int, default=NUM_REPEATS, action="store", required=False, help="The number of runs of each case, keeping the best")
+	parser.add_argument("--output", action="store", required=False, help="The JSON file path of the results")
+	parser.add_argument("--baseline", action="store", required=False, help="The JSON file path of the baseline results to compare with")
+	parser.add_argument("--threshold", type=float, default=THRESHOLD, action="store", required=False, help="The regression threshold as a fraction of the baseline")
+
+	# parse arguments
+	args = parser.parse_args()
+
+	# disable inter-command delay
+	library.winegard.COMMAND_DELAY = 0
+	library.async_winegard.COMMAND_DELAY = 0
+
+	# run benchmarks
+	report = {'environment': environment(), 'results': run_cases(args.cases, args.repeat)}
+
+	# determine if output requested
+	if args.output != None:
+
+		# write results
+		with open(args.output, 'w') as json_file:
+			json.dump(report, json_file, indent='\t')
+		#
+	#
+
+	# print results
+	print(json.dumps(report, indent='\t'))
+
+	# initialize status
+	status = 0
+
+	# determine if baseline supplied
+	if args.baseline != None:
+
+		# read baseline
+		with open(args.baseline, 'r') as json_file:
+			baseline = json.load(json_file)
+		#
+
+		# loop through comparison
+		for name, baseline_value, value, change, metric_threshold, regressed in compare(report['results'], baseline['results'], args.threshold):
+
+			# debug
+			print(f'{"REGRESSION" if regressed == True else "INFO"}: {name}: {baseline_value:.6g} -> {value:.6g} ({change:+.1%}, threshold {metric_threshold:.0%})', file=sys.stderr)
+
+			# update status
+			status = 1 if regressed == True else status
+		#
+	#
+
+	# exit with the status
+	sys.exit(status)
+#
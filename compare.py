@@ -0,0 +1,271 @@
+
+# imports
+import os
+import argparse
+import numpy as np
+
+# imports
+from library.scanfile import read_scan_data
+
+# constants
+AXIS_AZIMUTH = 'azimuth'
+AXIS_ELEVATION = 'elevation'
+
+# constants
+MAX_LAG = 5
+PEAK_THRESHOLD = 20
+
+#
+# Loads a scan data file
+#
+# @param file_path the scan data file path
+#
+# @return the dictionary of (azimuth, elevation) RSSI values
+#
+def load_scan(file_path):
+
+	# read scan data
+	status, data = read_scan_data(file_path)
+
+	# determine if valid scan data
+	if status == False:
+		return {}
+	#
+
+	# return the scan values
+	return {(round(azimuth, 6), round(elevation, 6)): rssi for azimuth, elevation, rssi in zip(data['azimuth'].tolist(), data['elevation'].tolist(), data['rssi'].tolist())}
+#
+
+#
+# Builds the aligned grids of two scans
+#
+# Only positions with valid RSSI values in both scans are
+# populated; all other grid positions are NaN.
+#
+# @param reference the reference scan values
+# @param test the test scan values
+#
+# @return the azimuth values
+# @return the elevation values
+# @return the reference grid, indexed [elevation, azimuth]
+# @return the test grid, indexed [elevation, azimuth]
+#
+def align(reference, test):
+
+	# determine common positions
+	positions = [p for p in reference if p in test and reference[p] > 0 and test[p] > 0]
+
+	# determine grid axes
+	azimuths = np.array(sorted(set(p[0] for p in positions)))
+	elevations = np.array(sorted(set(p[1] for p in positions)))
+
+	# initialize grids
+	reference_grid = np.full((len(elevations), len(azimuths)), np.nan)
+	test_grid = np.full((len(elevations), len(azimuths)), np.nan)
+
+	# determine grid indexes
+	x_pos = np.searchsorted(azimuths, [p[0] for p in positions])
+	y_pos = np.searchsorted(elevations, [p[1] for p in positions])
+
+	# set grid values
+	reference_grid[y_pos, x_pos] = [reference[p] for p in positions]
+	test_grid[y_pos, x_pos] = [test[p] for p in positions]
+
+	# return the axes and grids
+	return azimuths, elevations, reference_grid, test_grid
+#
+
+#
+# Measures the smearing of the test scan along the sweep axis
+#
+# Each line of the sweep axis containing a peak is cross
+# correlated against the reference line to determine the shift
+# of the test line. The smear width is the width of the moving
+# average which, applied to the shifted reference lines, best
+# reproduces the test lines. Measurement noise adds the same
+# error to every width, so it does not bias the smear width.
+#
+# @param reference_grid the reference grid
+# @param test_grid the test grid
+# @param sweep_axis the sweep axis
+#
+# @return the list of line shifts in grid points
+# @return the smear width in grid points
+#
+def measure_smearing(reference_grid, test_grid, sweep_axis):
+
+	# orient lines along the sweep axis
+	if sweep_axis == AXIS_ELEVATION:
+		reference_grid = reference_grid.T
+		test_grid = test_grid.T
+	#
+
+	# initialize lines
+	shifts = []
+	lines = []
+
+	# loop through lines
+	for reference_line, test_line in zip(reference_grid, test_grid):
+
+		# determine valid points
+		valid = ~np.isnan(reference_line) & ~np.isnan(test_line)
+
+		# determine if line contains a peak
+		if np.count_nonzero(valid) > 2 * MAX_LAG and np.ptp(reference_line[valid]) >= PEAK_THRESHOLD:
+
+			# remove line means
+			r = reference_line[valid] - reference_line[valid].mean()
+			t = test_line[valid] - test_line[valid].mean()
+
+			# determine correlation of each lag
+			lags = range(-MAX_LAG, MAX_LAG + 1)
+			correlation = [np.dot(r[max(-lag, 0):len(r)-max(lag, 0)], t[max(lag, 0):len(t)-max(-lag, 0)]) for lag in lags]
+
+			# append best lag
+			lag = lags[int(np.argmax(correlation))]
+			shifts.append(lag)
+
+			# append the shifted line pair, excluding the edges
+			lines.append((test_line[valid], np.roll(reference_line[valid], lag)))
+		#
+	#
+
+	# initialize smear width
+	smear_width = None
+	best_error = None
+
+	# loop through smear widths
+	for width in range(1, 2 * MAX_LAG + 2):
+
+		# initialize error
+		error = 0.0
+
+		# loop through lines
+		for test_line, shifted_line in lines:
+
+			# apply moving average to reference
+			smoothed = np.convolve(shifted_line, np.ones(width) / width, mode='same')
+
+			# update error excluding the edges
+			error += np.sum((smoothed[MAX_LAG:-MAX_LAG] - test_line[MAX_LAG:-MAX_LAG]) ** 2)
+		#
+
+		# determine if best width
+		if len(lines) > 0 and (best_error == None or error < best_error):
+			smear_width = width
+			best_error = error
+		#
+	#
+
+	# return the shifts and smear width
+	return shifts, smear_width
+#
+
+#
+# Saves an image of the difference between the scans
+#
+# @param azimuths the azimuth values
+# @param elevations the elevation values
+# @param difference_grid the difference grid
+# @param file_path the image file path
+#
+def save_difference_image(azimuths, elevations, difference_grid, file_path):
+
+	# imports
+	import matplotlib
+	matplotlib.use('Agg')
+	import matplotlib.pyplot as plt
+
+	# determine color limit
+	limit = max(np.nanmax(np.abs(difference_grid)), 1)
+
+	# plot difference
+	extent = [azimuths[0], azimuths[-1], elevations[0], elevations[-1]]
+	plt.imshow(difference_grid[::-1], cmap='coolwarm', vmin=-limit, vmax=limit, extent=extent)
+	plt.colorbar(pad=0.2, orientation='horizontal', location='bottom', label='RSSI Difference (test - reference)')
+
+	# set annotations
+	plt.title('Scan Comparison')
+	plt.xlabel('Azimuth (deg)')
+	plt.ylabel('Elevation (deg)')
+
+	# save plot
+	plt.savefig(file_path)
+#
+
+# MAIN
+
+#
+# Performs main logic
+#
+# This method compares a continuous (on-the-fly) scan against
+# a stop-and-stare scan of the same region and reports the
+# RSSI difference and the smearing along the sweep axis.
+#
+if __name__ == "__main__":
+
+	# initialize parser
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--reference_file", action="store", required=True, help="The stop-and-stare scan data file path")
+	parser.add_argument("--test_file", action="store", required=True, help="The continuous scan data file path")
+	parser.add_argument("--sweep_axis", choices=[AXIS_AZIMUTH, AXIS_ELEVATION], default=AXIS_AZIMUTH, action="store", required=False, help="The axis swept by the continuous scan")
+	parser.add_argument("--output_image", action="store", required=False, help="The difference image file path")
+
+	# parse arguments
+	args = parser.parse_args()
+
+	# determine if files exist
+	if os.path.isfile(args.reference_file) == True and os.path.isfile(args.test_file) == True:
+
+		# debug
+		print('INFO: Reading scan data')
+
+		# align scans
+		azimuths, elevations, reference_grid, test_grid = align(load_scan(args.reference_file), load_scan(args.test_file))
+
+		# determine if valid number of points
+		if reference_grid.size > 0:
+
+			# determine differences
+			difference_grid = test_grid - reference_grid
+			differences = difference_grid[~np.isnan(difference_grid)]
+
+			# determine smearing
+			shifts, smear_width = measure_smearing(reference_grid, test_grid, args.sweep_axis)
+			sweep_values = azimuths if args.sweep_axis == AXIS_AZIMUTH else elevations
+			step_angle = np.min(np.diff(sweep_values)) if len(sweep_values) > 1 else 1.0
+
+			# debug
+			print(f'INFO: Common points: {len(differences)}')
+			print(f'INFO: Mean difference: {differences.mean():.2f}')
+			print(f'INFO: RMS difference: {np.sqrt(np.mean(differences**2)):.2f}')
+			print(f'INFO: Max difference: {np.abs(differences).max():.2f}')
+
+			# determine if shifts measured
+			if len(shifts) > 0:
+
+				# debug
+				print(f'INFO: Lines with peaks: {len(shifts)}')
+				print(f'INFO: Mean absolute shift along {args.sweep_axis}: {np.mean(np.abs(shifts)) * step_angle:.2f} degrees')
+				print(f'INFO: Smear width along {args.sweep_axis}: {smear_width * step_angle:.2f} degrees')
+			#
+
+			# determine if image requested
+			if args.output_image != None:
+
+				# save image
+				save_difference_image(azimuths, elevations, difference_grid, args.output_image)
+			#
+
+		else:
+
+			# debug
+			print('ERROR: The scans have no points in common')
+		#
+
+	else:
+
+		# debug
+		print('ERROR: The specified scan data file doesn\'t exist')
+	#
+#
@@ -0,0 +1,9 @@
+#!/bin/bash
+
+# constants
+REFERENCE_FILE=example/scan_data.txt
+TEST_FILE=scan_data/continuous_scan_data.txt
+SWEEP_AXIS=azimuth
+
+# compare scan files
+python3 compare.py --reference_file $REFERENCE_FILE --test_file $TEST_FILE --sweep_axis $SWEEP_AXIS
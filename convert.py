@@ -0,0 +1,83 @@
+
+# imports
+import os
+import argparse
+
+# imports
+from library.scanfile import is_binary_scan
+from library.scanfile import convert_to_binary
+from library.scanfile import convert_to_text
+from library.scanfile import read_binary_header
+
+# MAIN
+
+#
+# Performs main logic
+#
+# This method converts a text scan data file to the binary scan
+# data format, or a binary scan data file back to the text
+# format, depending on the format of the input file. The scan
+# parameters which text files don't record can be supplied to be
+# stored in the binary header.
+#
+if __name__ == "__main__":
+
+	# initialize parser
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--input_file", action="store", required=True, help="The input scan data file path")
+	parser.add_argument("--output_file", action="store", required=True, help="The output scan data file path")
+	parser.add_argument("--offset_angle", type=float, action="store", required=False, help="The azimuth offset angle in degrees of a text scan")
+	parser.add_argument("--rssi_iterations", type=int, action="store", required=False, help="The number of RSSI iterations of a text scan")
+
+	# parse arguments
+	args = parser.parse_args()
+
+	# determine if file exists
+	if os.path.isfile(args.input_file) == True:
+
+		# determine if binary file
+		if is_binary_scan(args.input_file) == True:
+
+			# debug
+			header, offset = read_binary_header(args.input_file)
+			print(f'INFO: Converting binary scan data to text: {header}')
+
+			# convert scan data
+			status = convert_to_text(args.input_file, args.output_file)
+
+		else:
+
+			# initialize header
+			header = {}
+			if args.offset_angle != None:
+				header['offset_angle'] = args.offset_angle
+			#
+			if args.rssi_iterations != None:
+				header['rssi_iterations'] = args.rssi_iterations
+			#
+
+			# debug
+			print('INFO: Converting text scan data to binary')
+
+			# convert scan data
+			status = convert_to_binary(args.input_file, args.output_file, header)
+		#
+
+		# determine conversion status
+		if status == True:
+
+			# debug
+			print('INFO: Conversion complete!')
+
+		else:
+
+			# debug
+			print('ERROR: The input file has no valid scan data')
+		#
+
+	else:
+
+		# debug
+		print('ERROR: The specified scan data file doesn\'t exist')
+	#
+#
@@ -0,0 +1,8 @@
+#!/bin/bash
+
+# constants
+INPUT_FILE=example/scan_data.txt
+OUTPUT_FILE=scan_data/scan_data.scan
+
+# convert scan file
+python3 convert.py --input_file $INPUT_FILE --output_file $OUTPUT_FILE
@@ -0,0 +1,76 @@
+
+# imports
+import random
+import argparse
+
+# imports
+from library.emulator import Firmware
+from library.emulator import EmulatorTerminal
+from library.emulator import load_sky
+from library.emulator import SLEW_RATE
+from library.emulator import COMMAND_LATENCY
+from library.emulator import SAMPLE_TIME
+from library.emulator import RSSI_NOISE
+
+# MAIN
+
+#
+# Performs main logic
+#
+# This method emulates the firmware of a Winegard satellite dish
+# on a pseudo-terminal, such that home.py, skyscan.py and
+# rotator.py can be run without a dish by supplying the printed
+# port as their --comm_port. The RSSI is interpolated from the
+# supplied scan data file, plus noise.
+#
+if __name__ == "__main__":
+
+	# initialize parser
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--scan_file", action="store", required=False, help="The scan data file of the emulated sky, or none for a sky of the noise floor")
+	parser.add_argument("--link", action="store", required=False, help="The path of a symbolic link to the emulated port (eg: /tmp/ttyWinegard)")
+	parser.add_argument("--slew_rate", type=float, default=SLEW_RATE, action="store", required=False, help="The motor slew rate in degrees/sec")
+	parser.add_argument("--command_latency", type=float, default=COMMAND_LATENCY, action="store", required=False, help="The latency of each command in seconds")
+	parser.add_argument("--sample_time", type=float, default=SAMPLE_TIME, action="store", required=False, help="The sampling time of each RSSI iteration in seconds")
+	parser.add_argument("--noise", type=float, default=RSSI_NOISE, action="store", required=False, help="The RSSI noise of a single iteration")
+	parser.add_argument("--speed", type=float, default=1.0, action="store", required=False, help="The speed of the emulation relative to real time (eg: 10 for 10x faster)")
+	parser.add_argument("--seed", type=int, action="store", required=False, help="The random seed of the RSSI noise")
+
+	# parse arguments
+	args = parser.parse_args()
+
+	# seed the noise
+	random.seed(args.seed)
+
+	# load sky
+	sky = load_sky(args.scan_file)
+
+	# determine load status
+	if sky != None:
+
+		# open emulator
+		firmware = Firmware(sky, args.slew_rate, args.command_latency, args.sample_time, args.noise, args.speed)
+		terminal = EmulatorTerminal(firmware, args.link)
+		port_name = terminal.open()
+
+		# debug
+		print(f'INFO: Emulating Winegard on {port_name} at {args.speed}x speed')
+
+		# serve until interrupted
+		try:
+			terminal.serve()
+		except KeyboardInterrupt:
+			print('INFO: Stopping emulator')
+		finally:
+			terminal.close()
+		#
+
+		# debug
+		print(f'INFO: Served {firmware.num_commands} commands')
+
+	else:
+
+		# debug
+		print(f'ERROR: Unable to read the scan data file {args.scan_file}')
+	#
+#
@@ -0,0 +1,9 @@
+#!/bin/bash
+
+# constants
+SCAN_FILE=example/scan_data.txt
+LINK=/tmp/ttyWinegard
+SPEED=10
+
+# perform emulation
+python3 emulator.py --scan_file $SCAN_FILE --link $LINK --speed $SPEED
@@ -1,13 +1,12 @@
 
 # imports
 import argparse
-import time
 
 # imports
 from library.winegard import Winegard
+from library.settle import SettleDetector
 
 # constants
-START_DELAY = 4.0
 SOUTH_DEGREES = 180
 
 # PARSE ARGS
@@ -46,13 +45,19 @@ if status0 == True:
 	status3 = winegard.home_azimuth_motor()
 	status4 = winegard.home_elevation_motor()
 	status5 = winegard.set_azimuth_motor_angle(SOUTH_DEGREES)
-	status6 = winegard.quit_motor_menu()
 
 	# wait for motor movement to complete
-	time.sleep(START_DELAY)
+	settle = SettleDetector(winegard)
+	status6, settle_time = settle.wait(SOUTH_DEGREES, None)
+
+	# debug
+	print(f'INFO: Motors settled in {settle_time:.2f} seconds')
+
+	# perform commands
+	status7 = winegard.quit_motor_menu()
 
 	# determine status
-	if status1 and status2 and status3 and status4 and status5 and status6:
+	if status1 and status2 and status3 and status4 and status5 and status6 and status7:
 
 		# debug
 		print('INFO: Homing complete!')
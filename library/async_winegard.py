@@ -0,0 +1,963 @@
+
+# imports
+import asyncio
+import serial
+import time
+from collections import deque
+
+# imports
+from library.protocol import ResponseReader
+from library.protocol import parse_angle_data
+from library.protocol import parse_rssi_data
+from library.winegard import SERIAL_BAUD
+from library.winegard import SERIAL_TIMEOUT
+from library.winegard import COMMAND_DELAY
+from library.winegard import AZIMUTH_MOTOR_INDEX
+from library.winegard import ELEVATION_MOTOR_INDEX
+from library.winegard import LNA_MODE_ODU
+from library.winegard import RSSI_ITERATIONS
+from library.winegard import MENU_UNKNOWN
+from library.winegard import MENU_MAIN
+from library.winegard import MENU_MOTOR
+from library.winegard import MENU_DVB
+
+# constants
+PIPELINE_DEPTH = 1
+POLL_INTERVAL = 0.001
+
+#
+# This class provides the asyncio equivalent of the Winegard
+# class, with the same command surface, such that the serial
+# I/O can overlap rendering and socket handling in a single
+# event loop without blocking on the serial port.
+#
+# Commands are submitted to a queue and written by a single
+# writer task. Each command is paired with a future which is
+# resolved with the (status, response) of the matching prompt,
+# since the firmware answers commands in the order they were
+# written. The serial port is opened non-blocking and read by an
+# event loop reader callback, or by a polling task on platforms
+# whose event loop cannot watch the serial port.
+#
+# Up to the pipeline depth of commands are written before their
+# responses are received. A cancelled command which has not been
+# written is never sent, while the response of a cancelled
+# command which has been written is still consumed to keep the
+# responses aligned. A response timeout fails every command in
+# flight and leaves the current menu unknown.
+#
+class AsyncWinegard:
+
+	#
+	# Constructor
+	#
+	# @param serial_port the Winegard serial port
+	#
+	def __init__(self, serial_port):
+
+		# set parameters
+		self.SERIAL_PORT = serial_port
+		self.OFFSET_ANGLE = 0
+		self.PIPELINE_DEPTH = PIPELINE_DEPTH
+
+		# initialize serial
+		self.ser = None
+
+		# initialize response reader
+		self.reader = ResponseReader()
+
+		# initialize tasks
+		self.loop = None
+		self.writer_task = None
+		self.poll_task = None
+		self.watching = False
+
+		# initialize commands
+		self.queue = None
+		self.in_flight = deque()
+		self.slots = None
+
+		# initialize state
+		self.menu = MENU_UNKNOWN
+		self.azimuth_target = None
+		self.elevation_target = None
+
+		# initialize instrumentation
+		self.stats = None
+	#
+
+	#
+	# Sets the azimuth offset angle
+	#
+	# @param offset_angle the azimuth offset angle
+	#
+	def set_offset_angle(self, offset_angle):
+
+		# set parameters
+		self.OFFSET_ANGLE = offset_angle
+	#
+
+	#
+	# Sets the pipeline depth
+	#
+	# This is the number of commands which are written before
+	# their responses are received. The default of 1 waits for
+	# each response before writing the next command. This must be
+	# set before connecting.
+	#
+	# @param pipeline_depth the pipeline depth
+	#
+	def set_pipeline_depth(self, pipeline_depth):
+
+		# set parameters
+		self.PIPELINE_DEPTH = max(int(pipeline_depth), 1)
+	#
+
+	#
+	# Enables instrumentation
+	#
+	# Every command written is recorded in the supplied
+	# statistics, with the latency from writing the command to
+	# receiving its response.
+	#
+	# @param stats the command statistics
+	#
+	def enable_stats(self, stats):
+
+		# set parameters
+		self.stats = stats
+	#
+
+	# CONNECTION
+
+	#
+	# Performs connect
+	#
+	# This method attempts to open a non-blocking serial
+	# connection to the Winegard satellite dish and starts the
+	# reader and writer tasks.
+	#
+	# @return true if successful, false otherwise
+	#
+	async def connect(self):
+
+		# open serial port
+		return self.start(serial.Serial(port=self.SERIAL_PORT, baudrate=SERIAL_BAUD, timeout=0))
+	#
+
+	#
+	# Starts the reader and writer tasks on the supplied port
+	#
+	# @param ser the open, non-blocking serial port
+	#
+	# @return true if successful, false otherwise
+	#
+	def start(self, ser):
+
+		# set serial
+		self.ser = ser
+
+		# discard any previously buffered data
+		self.reader.reset()
+
+		# the current menu is unknown until the first menu change
+		self.menu = MENU_UNKNOWN
+
+		# initialize commands
+		self.loop = asyncio.get_running_loop()
+		self.queue = asyncio.Queue()
+		self.in_flight.clear()
+		self.slots = asyncio.Semaphore(self.PIPELINE_DEPTH)
+
+		# start writer task
+		self.writer_task = self.loop.create_task(self.write_commands())
+
+		# determine if the event loop can watch the serial port
+		try:
+
+			# watch the serial port
+			self.loop.add_reader(self.ser.fileno(), self.read_available)
+			self.watching = True
+
+		except (AttributeError, NotImplementedError, ValueError, OSError):
+
+			# start polling task
+			self.poll_task = self.loop.create_task(self.poll_serial())
+		#
+
+		# return the status
+		return self.ser != None
+	#
+
+	#
+	# Performs disconnect
+	#
+	# This method stops the reader and writer tasks, fails any
+	# outstanding commands and disconnects from the Winegard
+	# satellite dish.
+	#
+	# @return true if successful, false otherwise
+	#
+	async def disconnect(self):
+
+		# initialize status
+		status = False
+
+		# determine if valid serial
+		if self.ser != None:
+
+			# stop watching the serial port
+			if self.watching == True:
+				self.loop.remove_reader(self.ser.fileno())
+				self.watching = False
+			#
+
+			# stop tasks
+			for task in [self.writer_task, self.poll_task]:
+				if task != None:
+					task.cancel()
+				#
+			#
+
+			# fail outstanding commands
+			self.fail_in_flight()
+			while self.queue.empty() == False:
+				cmd_bytes, future = self.queue.get_nowait()
+				self.resolve(future, False, '')
+			#
+
+			# close the serial port
+			self.ser.close()
+			self.ser = None
+
+			# update status to indicate successful
+			status = True
+		#
+
+		# return the status
+		return status
+	#
+
+	# MAIN MENU
+
+	#
+	# Quits the menu
+	#
+	# @return true if successful, false otherwise
+	#
+	async def quit_menu(self):
+
+		# send command
+		cmd_status, cmd_response = await self.send('q\r')
+
+		# update the current menu
+		self.update_menu(cmd_status, MENU_MAIN)
+
+		# return the status
+		return cmd_status
+	#
+
+	#
+	# Selects the specified menu
+	#
+	# This method enters the specified menu if the dish is not
+	# already in it, following the same rules as the Winegard
+	# class.
+	#
+	# @param menu the desired menu
+	#
+	# @return true if successful, false otherwise
+	#
+	async def select_menu(self, menu):
+
+		# initialize status
+		status = True
+
+		# loop through the menu commands
+		for future in self.submit_menu(menu):
+
+			# obtain the menu command status
+			cmd_status, cmd_response = await asyncio.shield(future)
+
+			# update status
+			status = status and cmd_status
+		#
+
+		# return the status
+		return status
+	#
+
+	# MOTOR MENU
+
+	#
+	# Enters the motor menu
+	#
+	# @return true if successful, false otherwise
+	#
+	async def enter_motor_menu(self):
+		return await self.select_menu(MENU_MOTOR)
+	#
+
+	#
+	# Homes the azimuth motor
+	#
+	# @return true if successful, false otherwise
+	#
+	async def home_azimuth_motor(self):
+
+		# send command
+		cmd_status, cmd_response = await self.send_menu_command(MENU_MOTOR, f'h {AZIMUTH_MOTOR_INDEX}\r')
+
+		# the position is no longer the commanded position
+		self.azimuth_target = None
+
+		# return the status
+		return cmd_status
+	#
+
+	#
+	# Homes the elevation motor
+	#
+	# @return true if successful, false otherwise
+	#
+	async def home_elevation_motor(self):
+
+		# send command
+		cmd_status, cmd_response = await self.send_menu_command(MENU_MOTOR, f'h {ELEVATION_MOTOR_INDEX}\r')
+
+		# the position is no longer the commanded position
+		self.elevation_target = None
+
+		# return the status
+		return cmd_status
+	#
+
+	#
+	# Determines the motor angle data
+	#
+	# @return true if successful, false otherwise
+	# @return the motor angle data if successful
+	#
+	async def get_motor_angle_data(self):
+
+		# initialize status
+		status = False
+
+		# initialize response data
+		resp_data = {}
+
+		# send command
+		cmd_status, cmd_response = await self.send_menu_command(MENU_MOTOR, 'a\r')
+
+		# determine if valid status
+		if cmd_status == True:
+
+			# parse data from response
+			status, resp_data = parse_angle_data(cmd_response, self.OFFSET_ANGLE)
+		#
+
+		# return the status and response data
+		return status, resp_data
+	#
+
+	#
+	# Sets the azimuth motor angle
+	#
+	# @param angle the desired azimuth angle
+	#
+	# @return true if successful, false otherwise
+	#
+	async def set_azimuth_motor_angle(self, angle):
+
+		# determine adjusted angle
+		angle_adjusted = (angle + self.OFFSET_ANGLE) % 360
+
+		# send command
+		cmd_status, cmd_response = await self.send_menu_command(MENU_MOTOR, f'a {AZIMUTH_MOTOR_INDEX} {angle_adjusted}\r')
+
+		# update the commanded position
+		self.azimuth_target = angle if cmd_status == True else None
+
+		# return the status
+		return cmd_status
+	#
+
+	#
+	# Sets the elevation motor angle
+	#
+	# @param angle the desired elevation angle
+	#
+	# @return true if successful, false otherwise
+	#
+	async def set_elevation_motor_angle(self, angle):
+
+		# send command
+		cmd_status, cmd_response = await self.send_menu_command(MENU_MOTOR, f'a {ELEVATION_MOTOR_INDEX} {angle}\r')
+
+		# update the commanded position
+		self.elevation_target = angle if cmd_status == True else None
+
+		# return the status
+		return cmd_status
+	#
+
+	#
+	# Quits the motor menu
+	#
+	# @return true if successful, false otherwise
+	#
+	async def quit_motor_menu(self):
+		return await self.quit_menu()
+	#
+
+	# DVB MENU
+
+	#
+	# Enters the DVB menu
+	#
+	# @return true if successful, false otherwise
+	#
+	async def enter_dvb_menu(self):
+		return await self.select_menu(MENU_DVB)
+	#
+
+	#
+	# Enables the DVB LNA
+	#
+	# @return true if successful, false otherwise
+	#
+	async def enable_dvb_lna(self):
+
+		# send command
+		cmd_status, cmd_response = await self.send_menu_command(MENU_DVB, f'lnbdc {LNA_MODE_ODU}\r')
+
+		# return the status
+		return cmd_status
+	#
+
+	#
+	# Determines the DVB RSSI
+	#
+	# @param iterations the number of iterations
+	#
+	# @return true if successful, false otherwise
+	# @return the DVB RSSI data if successful
+	#
+	async def get_dvb_rssi_data(self, iterations=RSSI_ITERATIONS):
+
+		# initialize status
+		status = False
+
+		# initialize response data
+		resp_data = {}
+
+		# send command
+		cmd_status, cmd_response = await self.send_menu_command(MENU_DVB, f'rssi {iterations}\r')
+
+		# determine if valid status
+		if cmd_status == True:
+
+			# parse data from response
+			status, resp_data = parse_rssi_data(cmd_response)
+		#
+
+		# return the status and response data
+		return status, resp_data
+	#
+
+	#
+	# Quits the DVB menu
+	#
+	# @return true if successful, false otherwise
+	#
+	async def quit_dvb_menu(self):
+		return await self.quit_menu()
+	#
+
+	# BATCHED
+
+	#
+	# Moves to the specified position
+	#
+	# Both motor commands are submitted before either response
+	# is awaited. Motors which are already at the commanded
+	# angle are not moved again.
+	#
+	# @param azimuth the azimuth angle
+	# @param elevation the elevation angle
+	#
+	# @return true if successful, false otherwise
+	#
+	async def move_motors(self, azimuth, elevation):
+
+		# initialize moves
+		moves = []
+
+		# determine if azimuth move required
+		if azimuth != self.azimuth_target:
+			moves.append(self.set_azimuth_motor_angle(azimuth))
+		#
+
+		# determine if elevation move required
+		if elevation != self.elevation_target:
+			moves.append(self.set_elevation_motor_angle(elevation))
+		#
+
+		# position motors
+		statuses = await asyncio.gather(*moves)
+
+		# return the status
+		return all(statuses)
+	#
+
+	#
+	# Moves to the specified position and measures the RSSI
+	#
+	# The DVB menu is entered while the motors are still moving
+	# such that the menu change overlaps the settle time.
+	#
+	# @param azimuth the azimuth angle
+	# @param elevation the elevation angle
+	# @param settle_time the time to wait for motor movement
+	# @param iterations the number of RSSI iterations
+	#
+	# @return true if successful, false otherwise
+	# @return the DVB RSSI data if successful
+	#
+	async def move_and_measure(self, azimuth, elevation, settle_time, iterations=RSSI_ITERATIONS):
+
+		# position motors
+		status1 = await self.move_motors(azimuth, elevation)
+
+		# determine movement start time
+		move_time = time.monotonic()
+
+		# open DVB menu
+		status2 = await self.select_menu(MENU_DVB)
+
+		# wait for the remaining motor movement to complete
+		await asyncio.sleep(max(settle_time - (time.monotonic() - move_time), 0))
+
+		# initialize response data
+		resp_data = {}
+		status3 = False
+
+		# determine if valid status
+		if status1 and status2:
+
+			# obtain RSSI data
+			status3, resp_data = await self.get_dvb_rssi_data(iterations)
+		#
+
+		# return the status and response data
+		return status3, resp_data
+	#
+
+	#
+	# Streams the DVB RSSI
+	#
+	# Each reading is time stamped with the midpoint of its
+	# command.
+	#
+	# @param num_reads the number of readings
+	# @param iterations the number of iterations of each reading
+	#
+	# @return true if successful, false otherwise
+	# @return the list of (timestamp, rssi) readings
+	#
+	async def stream_dvb_rssi_data(self, num_reads, iterations):
+
+		# initialize status
+		status = True
+
+		# initialize readings
+		readings = []
+
+		# loop through readings
+		for index in range(num_reads):
+
+			# determine if previous readings successful
+			if status == True:
+
+				# obtain RSSI data
+				start_time = time.monotonic()
+				status, resp_data = await self.get_dvb_rssi_data(iterations)
+				end_time = time.monotonic()
+
+				# determine if valid RSSI data
+				if status == True:
+
+					# append reading
+					readings.append(((start_time + end_time) / 2, resp_data['rssi_avg']))
+				#
+			#
+		#
+
+		# return the status and readings
+		return status, readings
+	#
+
+	# HELPER
+
+	#
+	# Sends the supplied menu command
+	#
+	# The menu commands and the command are submitted together,
+	# without yielding to the event loop, such that commands of
+	# other tasks can't be interleaved between them.
+	#
+	# @param menu the menu the command is valid on
+	# @param cmd_string the command to send
+	#
+	# @return true if successful, false otherwise
+	# @return the response string if successful
+	#
+	async def send_menu_command(self, menu, cmd_string):
+
+		# submit commands
+		menu_futures = self.submit_menu(menu)
+		future = self.submit(cmd_string)
+
+		# initialize status
+		status = True
+
+		# determine if cancelled while waiting
+		try:
+
+			# loop through the menu commands
+			for menu_future in menu_futures:
+
+				# obtain the menu command status
+				cmd_status, cmd_response = await asyncio.shield(menu_future)
+
+				# update status
+				status = status and cmd_status
+			#
+
+			# obtain the command response
+			cmd_status, response = await future
+
+		except asyncio.CancelledError:
+
+			# cancel the command if not yet written
+			future.cancel()
+			raise
+		#
+
+		# return the status and response string
+		return status and cmd_status, response if status == True else ''
+	#
+
+	#
+	# Submits the commands which select the specified menu
+	#
+	# The current menu is updated when the commands are
+	# submitted, such that subsequently submitted commands don't
+	# repeat the menu change, and is reset to unknown if any of
+	# the commands fail. Menu commands are never cancelled,
+	# since the menu state depends on them.
+	#
+	# @param menu the desired menu
+	#
+	# @return the list of command futures
+	#
+	def submit_menu(self, menu):
+
+		# initialize futures
+		futures = []
+
+		# determine if menu change required
+		if self.menu != menu:
+
+			# determine if quit required
+			if self.menu != MENU_MAIN:
+				futures.append(self.submit('q\r'))
+			#
+
+			# determine if enter required
+			if menu != MENU_MAIN:
+				futures.append(self.submit(f'{menu}\r'))
+			#
+
+			# update the current menu
+			self.menu = menu
+
+			# reset the current menu on failure
+			for future in futures:
+				future.add_done_callback(self.check_menu)
+			#
+		#
+
+		# return the futures
+		return futures
+	#
+
+	#
+	# Resets the current menu if the supplied menu command failed
+	#
+	# @param future the menu command future
+	#
+	def check_menu(self, future):
+
+		# determine if the menu command failed
+		if future.cancelled() == True or future.result()[0] == False:
+
+			# update the current menu
+			self.update_menu(False, MENU_UNKNOWN)
+		#
+	#
+
+	#
+	# Updates the current menu
+	#
+	# @param status the menu command status
+	# @param menu the menu entered if successful
+	#
+	def update_menu(self, status, menu):
+
+		# update the current menu
+		self.menu = menu if status == True else MENU_UNKNOWN
+	#
+
+	#
+	# Sends the supplied command
+	#
+	# @param cmd_string the command to send
+	#
+	# @return true if successful, false otherwise
+	# @return the response string if successful
+	#
+	async def send(self, cmd_string):
+		return await self.submit(cmd_string)
+	#
+
+	#
+	# Sends the supplied commands together
+	#
+	# @param cmd_strings the list of commands to send
+	#
+	# @return true if successful, false otherwise
+	# @return the list of response strings
+	#
+	async def send_batch(self, cmd_strings):
+
+		# submit commands
+		results = await asyncio.gather(*[self.submit(cmd_string) for cmd_string in cmd_strings])
+
+		# return the status and response strings
+		return all(status for status, response in results), [response for status, response in results]
+	#
+
+	#
+	# Submits the supplied command
+	#
+	# This method queues the command for the writer task without
+	# waiting for it to be written.
+	#
+	# @param cmd_string the command to send
+	#
+	# @return the future of the (status, response string) of the command
+	#
+	def submit(self, cmd_string):
+
+		# initialize future
+		future = asyncio.get_running_loop().create_future()
+
+		# determine if valid serial
+		if self.ser != None:
+
+			# queue command
+			self.queue.put_nowait((cmd_string.encode('utf-8'), future))
+
+		else:
+
+			# fail command
+			self.resolve(future, False, '')
+		#
+
+		# return the future
+		return future
+	#
+
+	# TASKS
+
+	#
+	# Writes the queued commands
+	#
+	# This is the only task which writes to the serial port.
+	# Each command occupies a pipeline slot from when it is
+	# written until its response is received or times out.
+	#
+	async def write_commands(self):
+
+		# loop forever
+		while True:
+
+			# obtain the next command
+			cmd_bytes, future = await self.queue.get()
+
+			# determine if the command was cancelled before it was written
+			if future.done() == False:
+
+				# wait for a pipeline slot
+				await self.slots.acquire()
+
+				# determine if cancelled while waiting
+				if future.done() == False:
+
+					# determine start time if instrumentation enabled
+					start_time = time.perf_counter() if self.stats != None else None
+
+					# write serial data
+					self.ser.write(cmd_bytes)
+
+					# track command until its response is received
+					timer = self.loop.call_later(SERIAL_TIMEOUT, self.timeout)
+					self.in_flight.append((future, timer, cmd_bytes, start_time))
+
+					# determine if polling
+					if self.watching == False:
+
+						# check for the response without waiting for the next poll
+						self.loop.call_soon(self.read_available)
+					#
+
+				else:
+
+					# release the pipeline slot
+					self.slots.release()
+				#
+			#
+		#
+	#
+
+	#
+	# Polls the serial port
+	#
+	# This task is used instead of the event loop reader
+	# callback on platforms whose event loop can't watch the
+	# serial port.
+	#
+	async def poll_serial(self):
+
+		# loop forever
+		while True:
+
+			# read available data
+			self.read_available()
+
+			# wait before polling again
+			await asyncio.sleep(POLL_INTERVAL)
+		#
+	#
+
+	#
+	# Reads the available serial data
+	#
+	# Each complete response resolves the oldest command in
+	# flight. The pipeline slot of the command is released after
+	# the command delay.
+	#
+	def read_available(self):
+
+		# determine if data available
+		if self.ser != None and self.ser.in_waiting > 0:
+
+			# append bytes to buffer
+			self.reader.feed(self.ser.read(self.ser.in_waiting))
+
+			# extract complete responses
+			response = self.reader.next_response()
+			while response != None:
+
+				# determine if a command is in flight
+				if len(self.in_flight) > 0:
+
+					# resolve the oldest command
+					future, timer, cmd_bytes, start_time = self.in_flight.popleft()
+					timer.cancel()
+					self.resolve(future, True, response.decode('utf-8'))
+
+					# determine if instrumentation enabled
+					if start_time != None:
+
+						# record command
+						self.stats.record(cmd_bytes.decode('utf-8'), time.perf_counter() - start_time, len(cmd_bytes), len(response), True)
+					#
+
+					# release the pipeline slot after the command delay
+					self.loop.call_later(COMMAND_DELAY, self.slots.release)
+				#
+
+				# extract next response
+				response = self.reader.next_response()
+			#
+		#
+	#
+
+	#
+	# Handles a response timeout
+	#
+	# The responses of the commands in flight can no longer be
+	# matched to their commands, so all of them are failed and
+	# any partial response is discarded.
+	#
+	def timeout(self):
+
+		# fail commands in flight
+		self.fail_in_flight(timed_out=True)
+
+		# discard partial response
+		self.reader.reset()
+
+		# the current menu is unknown after a timeout
+		self.update_menu(False, MENU_UNKNOWN)
+	#
+
+	#
+	# Fails the commands in flight
+	#
+	# @param timed_out the timeout state, which records the commands as timed out
+	#
+	def fail_in_flight(self, timed_out=False):
+
+		# loop through commands in flight
+		while len(self.in_flight) > 0:
+
+			# fail command
+			future, timer, cmd_bytes, start_time = self.in_flight.popleft()
+			timer.cancel()
+			self.resolve(future, False, '')
+
+			# determine if instrumentation enabled
+			if start_time != None and timed_out == True:
+
+				# record command
+				self.stats.record(cmd_bytes.decode('utf-8'), time.perf_counter() - start_time, len(cmd_bytes), 0, False)
+			#
+
+			# release the pipeline slot
+			self.slots.release()
+		#
+	#
+
+	#
+	# Resolves the supplied command future
+	#
+	# Cancelled futures are left untouched, since the response of
+	# a cancelled command is discarded.
+	#
+	# @param future the command future
+	# @param status the command status
+	# @param response the response string
+	#
+	def resolve(self, future, status, response):
+
+		# determine if still awaited
+		if future.done() == False:
+
+			# set the result
+			future.set_result((status, response))
+		#
+	#
+#
@@ -0,0 +1,243 @@
+
+# imports
+import asyncio
+import time
+
+# constants
+AZIMUTH_DEADBAND = 0.1
+ELEVATION_DEADBAND = 0.1
+MIN_UPDATE_INTERVAL = 0.2
+
+#
+# This class implements the target coalescing stage of the
+# rotator. Position commands are accepted immediately and only
+# the newest pending target is kept, such that commands received
+# faster than the dish can be updated replace each other rather
+# than piling up in the serial queue.
+#
+# The pending target is applied by a background task no more
+# often than the minimum update interval. A motor command is only
+# sent for an axis whose target moved by more than the deadband
+# of the axis from its last commanded angle.
+#
+class TargetCoalescer:
+
+	#
+	# Constructor
+	#
+	# @param winegard the asyncio winegard
+	# @param azimuth_deadband the azimuth deadband in degrees
+	# @param elevation_deadband the elevation deadband in degrees
+	# @param min_interval the minimum time between updates in seconds
+	#
+	def __init__(self, winegard, azimuth_deadband=AZIMUTH_DEADBAND, elevation_deadband=ELEVATION_DEADBAND, min_interval=MIN_UPDATE_INTERVAL):
+
+		# set parameters
+		self.winegard = winegard
+		self.AZIMUTH_DEADBAND = azimuth_deadband
+		self.ELEVATION_DEADBAND = elevation_deadband
+		self.MIN_INTERVAL = min_interval
+
+		# initialize task
+		self.task = None
+		self.pending_event = asyncio.Event()
+
+		# initialize state
+		self.pending = None
+		self.status = True
+		self.update_time = None
+
+		# initialize counters
+		self.num_received = 0
+		self.num_merged = 0
+		self.num_dropped = 0
+		self.num_azimuth_commands = 0
+		self.num_elevation_commands = 0
+	#
+
+	#
+	# Starts applying targets
+	#
+	def start(self):
+
+		# start update task
+		self.task = asyncio.get_running_loop().create_task(self.apply_targets())
+	#
+
+	#
+	# Stops applying targets
+	#
+	# Any pending target is discarded.
+	#
+	async def stop(self):
+
+		# determine if applying targets
+		if self.task != None:
+
+			# stop update task
+			self.task.cancel()
+			await asyncio.gather(self.task, return_exceptions=True)
+			self.task = None
+		#
+	#
+
+	#
+	# Submits the supplied target
+	#
+	# The target replaces any target which has not been applied
+	# yet.
+	#
+	# @param azimuth the azimuth angle
+	# @param elevation the elevation angle
+	#
+	# @return the status of the most recent update
+	#
+	def submit(self, azimuth, elevation):
+
+		# update counters
+		self.num_received += 1
+		self.num_merged += self.pending != None
+
+		# set pending target
+		self.pending = (azimuth, elevation)
+		self.pending_event.set()
+
+		# return the status
+		return self.status
+	#
+
+	#
+	# Cancels the pending target
+	#
+	# The target which has not been applied yet is discarded,
+	# such that the dish is not moved to it.
+	#
+	def cancel(self):
+
+		# clear pending target
+		self.pending = None
+		self.pending_event.clear()
+	#
+
+	#
+	# Applies the pending targets until stopped
+	#
+	async def apply_targets(self):
+
+		# loop forever
+		while True:
+
+			# wait for a pending target
+			await self.pending_event.wait()
+
+			# wait for the minimum update interval
+			if self.update_time != None:
+				await asyncio.sleep(max(self.update_time + self.MIN_INTERVAL - time.monotonic(), 0))
+			#
+
+			# determine if the pending target was not cancelled
+			if self.pending != None:
+
+				# obtain the newest pending target
+				azimuth, elevation = self.pending
+				self.pending = None
+				self.pending_event.clear()
+
+				# apply target
+				await self.apply(azimuth, elevation)
+			#
+		#
+	#
+
+	#
+	# Applies the supplied target
+	#
+	# @param azimuth the azimuth angle
+	# @param elevation the elevation angle
+	#
+	async def apply(self, azimuth, elevation):
+
+		# initialize moves
+		moves = []
+
+		# determine if azimuth outside deadband
+		if outside(self.winegard.azimuth_target, azimuth, self.AZIMUTH_DEADBAND, 360) == True:
+			moves.append(self.winegard.set_azimuth_motor_angle(azimuth))
+			self.num_azimuth_commands += 1
+		#
+
+		# determine if elevation outside deadband
+		if outside(self.winegard.elevation_target, elevation, self.ELEVATION_DEADBAND, None) == True:
+			moves.append(self.winegard.set_elevation_motor_angle(elevation))
+			self.num_elevation_commands += 1
+		#
+
+		# determine if any axis changed
+		if len(moves) > 0:
+
+			# position motors
+			statuses = await asyncio.gather(*moves)
+
+			# update state
+			self.status = all(statuses)
+			self.update_time = time.monotonic()
+
+			# determine the status
+			if self.status == False:
+
+				# debug
+				print('WARNING: Unable to set position')
+			#
+
+		else:
+
+			# update counters
+			self.num_dropped += 1
+		#
+	#
+
+	#
+	# Formats the counters
+	#
+	# @return the counter string
+	#
+	def summary(self):
+		return f'{self.num_received} received, {self.num_merged} merged, {self.num_dropped} within deadband, {self.num_azimuth_commands} azimuth and {self.num_elevation_commands} elevation motor commands'
+	#
+#
+
+# HELPER
+
+#
+# Determines whether a target is outside the deadband
+#
+# @param current the last commanded angle, or None if unknown
+# @param target the target angle
+# @param deadband the deadband in degrees
+# @param period the angle period for wrapping, or None
+#
+# @return true if outside the deadband, false otherwise
+#
+def outside(current, target, deadband, period):
+
+	# initialize state
+	result = True
+
+	# determine if commanded angle known
+	if current != None:
+
+		# determine the difference
+		difference = target - current
+
+		# determine if wrapping
+		if period != None:
+			difference = (difference + period / 2) % period - period / 2
+		#
+
+		# determine if outside deadband
+		result = abs(difference) > deadband
+	#
+
+	# return the state
+	return result
+#
@@ -0,0 +1,445 @@
+
+# imports
+import os
+import tty
+import math
+import time
+import random
+import select
+import numpy as np
+
+# imports
+from library.scanfile import read_scan_data
+from library.scanfile import infer_grid
+from library.grid import grid_shape
+from library.grid import scatter
+
+# constants
+PROMPT_MAIN = 'TRK>'
+PROMPT_MOTOR = 'MOT>'
+PROMPT_DVB = 'DVB>'
+
+# constants
+AZIMUTH_MOTOR_INDEX = 0
+ELEVATION_MOTOR_INDEX = 1
+
+# constants
+AZIMUTH_MIN = 0.0
+AZIMUTH_MAX = 359.99
+ELEVATION_MIN = 18.0
+ELEVATION_MAX = 65.0
+
+# constants
+START_ANGLES = (180.0, 45.0)
+HOME_ANGLES = (0.0, 65.0)
+
+# constants
+SLEW_RATE = 10.0
+COMMAND_LATENCY = 0.005
+SAMPLE_TIME = 0.01
+BYTE_TIME = 10 / 115200
+
+# constants
+RSSI_FLOOR = 400
+RSSI_NOISE = 5
+
+# constants
+READ_SIZE = 4096
+SELECT_TIMEOUT = 1.0
+
+#
+# This class implements the sky of the emulator. The RSSI of
+# a scan data file is placed on its grid, and the RSSI at any
+# position is bilinearly interpolated between the four nearest
+# grid points. Grid points without data, and positions outside
+# of the grid, have the noise floor of the scan.
+#
+class Sky:
+
+	#
+	# Constructor
+	#
+	# @param scan_data the scan data arrays, or None for a sky of the noise floor
+	#
+	def __init__(self, scan_data=None):
+
+		# initialize grid
+		self.grid = None
+		self.floor = RSSI_FLOOR
+
+		# determine if scan data supplied
+		if scan_data != None and len(scan_data['rssi']) > 0:
+
+			# determine the grid
+			self.AZIMUTH_START, self.AZIMUTH_END, self.ELEVATION_START, self.ELEVATION_END, self.STEP_ANGLE = infer_grid(scan_data)
+			self.STEP_ANGLE = self.STEP_ANGLE or 1.0
+
+			# place the data points on the grid, highest elevation first
+			self.grid = np.full(grid_shape(self.AZIMUTH_START, self.AZIMUTH_END, self.ELEVATION_START, self.ELEVATION_END, self.STEP_ANGLE), np.nan)
+			scatter(self.grid, scan_data['azimuth'], scan_data['elevation'], scan_data['rssi'], scan_data['step'], self.AZIMUTH_START, self.ELEVATION_END, self.STEP_ANGLE)
+
+			# fill the grid points without data with the noise floor
+			self.floor = float(np.nanmedian(self.grid)) if np.isnan(self.grid).all() == False else RSSI_FLOOR
+			self.grid[np.isnan(self.grid)] = self.floor
+		#
+	#
+
+	#
+	# Determines the RSSI at the supplied position
+	#
+	# @param azimuth the azimuth angle
+	# @param elevation the elevation angle
+	#
+	# @return the RSSI
+	#
+	def rssi(self, azimuth, elevation):
+
+		# determine if the sky is empty
+		if self.grid is None:
+			return self.floor
+		#
+
+		# determine the fractional grid position
+		height, width = self.grid.shape
+		x = (azimuth - self.AZIMUTH_START) / self.STEP_ANGLE
+		y = (self.ELEVATION_END - elevation) / self.STEP_ANGLE
+
+		# determine if outside of the grid
+		if x < 0 or x > width - 1 or y < 0 or y > height - 1:
+			return self.floor
+		#
+
+		# determine the surrounding grid points
+		x0 = min(int(x), max(width - 2, 0))
+		y0 = min(int(y), max(height - 2, 0))
+		x1 = min(x0 + 1, width - 1)
+		y1 = min(y0 + 1, height - 1)
+		dx = x - x0
+		dy = y - y0
+
+		# interpolate
+		top = self.grid[y0, x0] * (1 - dx) + self.grid[y0, x1] * dx
+		bottom = self.grid[y1, x0] * (1 - dx) + self.grid[y1, x1] * dx
+
+		# return the RSSI
+		return float(top * (1 - dy) + bottom * dy)
+	#
+#
+
+#
+# Loads the sky of the specified scan data file
+#
+# @param file_path the scan data file path, or None for a sky of the noise floor
+#
+# @return the sky, or None if the file could not be read
+#
+def load_sky(file_path):
+
+	# determine if scan data file supplied
+	if file_path == None:
+		return Sky()
+	#
+
+	# read scan data
+	status, scan_data = read_scan_data(file_path)
+
+	# return the sky
+	return Sky(scan_data) if status == True else None
+#
+
+#
+# This class implements the menu protocol of the Winegard
+# firmware. Every command is echoed and answered in the firmware
+# format, ending with the prompt of the current menu, and motor
+# commands are only accepted on the motor menu and RSSI commands
+# on the DVB menu, as on the dish.
+#
+# The motors move at the slew rate towards their commanded angle,
+# such that the reported angles and the measured RSSI change while
+# the dish moves. Each response is delayed by the latency model:
+# a fixed command latency, the serial transfer time of the
+# response and the sampling time of each RSSI iteration.
+#
+# Time runs at the supplied speed, such that a speed of 10 moves
+# the motors 10 times faster and shortens every latency 10 times,
+# which runs a scan faster than real time.
+#
+class Firmware:
+
+	#
+	# Constructor
+	#
+	# @param sky the sky
+	# @param slew_rate the motor slew rate in degrees/sec
+	# @param command_latency the latency of each command in seconds
+	# @param sample_time the sampling time of each RSSI iteration in seconds
+	# @param noise the RSSI noise of a single iteration
+	# @param speed the speed of time relative to real time
+	#
+	def __init__(self, sky, slew_rate=SLEW_RATE, command_latency=COMMAND_LATENCY, sample_time=SAMPLE_TIME, noise=RSSI_NOISE, speed=1.0):
+
+		# set parameters
+		self.sky = sky
+		self.SLEW_RATE = slew_rate
+		self.COMMAND_LATENCY = command_latency
+		self.SAMPLE_TIME = sample_time
+		self.NOISE = noise
+		self.SPEED = speed
+
+		# initialize state
+		self.prompt = PROMPT_MAIN
+		self.moves = [(angle, angle, 0.0) for angle in START_ANGLES]
+		self.lna_mode = None
+		self.num_commands = 0
+	#
+
+	#
+	# Determines the emulated time
+	#
+	# @return the emulated time in seconds
+	#
+	def now(self):
+		return time.monotonic() * self.SPEED
+	#
+
+	#
+	# Determines the current angle of the specified motor
+	#
+	# @param index the motor index
+	#
+	# @return the motor angle
+	#
+	def angle(self, index):
+
+		# obtain the current move
+		start_angle, end_angle, start_time = self.moves[index]
+
+		# determine the distance travelled
+		travel = min(self.SLEW_RATE * (self.now() - start_time), abs(end_angle - start_angle))
+
+		# return the angle
+		return start_angle + travel * (1 if end_angle >= start_angle else -1)
+	#
+
+	#
+	# Moves the specified motor to the supplied angle
+	#
+	# @param index the motor index
+	# @param angle the motor angle
+	#
+	def move(self, index, angle):
+
+		# limit the angle to the travel of the motor
+		if index == AZIMUTH_MOTOR_INDEX:
+			angle = min(max(angle, AZIMUTH_MIN), AZIMUTH_MAX)
+		else:
+			angle = min(max(angle, ELEVATION_MIN), ELEVATION_MAX)
+		#
+
+		# start the move from the current angle
+		self.moves[index] = (self.angle(index), angle, self.now())
+	#
+
+	#
+	# Measures the RSSI at the current position
+	#
+	# The noise of the average decreases with the square root of
+	# the number of iterations.
+	#
+	# @param iterations the number of iterations
+	#
+	# @return the average RSSI
+	# @return the current RSSI
+	#
+	def measure(self, iterations):
+
+		# determine the RSSI at the current position
+		rssi = self.sky.rssi(self.angle(AZIMUTH_MOTOR_INDEX), self.angle(ELEVATION_MOTOR_INDEX))
+
+		# add noise
+		rssi_avg = int(round(rssi + random.gauss(0, self.NOISE / math.sqrt(max(iterations, 1)))))
+		rssi_cur = int(round(rssi + random.gauss(0, self.NOISE)))
+
+		# return the RSSI
+		return max(rssi_avg, 0), max(rssi_cur, 0)
+	#
+
+	#
+	# Builds the response to the supplied command
+	#
+	# @param command the command string
+	#
+	# @return the response string
+	# @return the latency of the response in seconds of emulated time
+	#
+	def respond(self, command):
+
+		# initialize values
+		values = command.split()
+		body = ''
+		latency = self.COMMAND_LATENCY
+
+		# update command count
+		self.num_commands += 1
+
+		# determine the command
+		if command == 'q':
+			self.prompt = PROMPT_MAIN
+		elif command == 'mot' and self.prompt == PROMPT_MAIN:
+			self.prompt = PROMPT_MOTOR
+		elif command == 'dvb' and self.prompt == PROMPT_MAIN:
+			self.prompt = PROMPT_DVB
+		elif command == 'a' and self.prompt == PROMPT_MOTOR:
+			body = f'Angle[0] = {self.angle(AZIMUTH_MOTOR_INDEX):.2f}\r\nAngle[1] = {self.angle(ELEVATION_MOTOR_INDEX):.2f}\r\n'
+		elif len(values) == 3 and values[0] == 'a' and values[1] in ('0', '1') and self.prompt == PROMPT_MOTOR:
+			self.move(int(values[1]), float(values[2]))
+		elif len(values) == 2 and values[0] == 'h' and values[1] in ('0', '1') and self.prompt == PROMPT_MOTOR:
+			self.move(int(values[1]), HOME_ANGLES[int(values[1])])
+		elif len(values) == 2 and values[0] == 'lnbdc' and self.prompt == PROMPT_DVB:
+			self.lna_mode = values[1]
+			body = f'LNB DC mode: {self.lna_mode}\r\n'
+		elif len(values) == 2 and values[0] == 'rssi' and values[1].isdigit() == True and self.prompt == PROMPT_DVB:
+			iterations = int(values[1])
+			rssi_avg, rssi_cur = self.measure(iterations)
+			body = f'LNB 0 Tuner 1\r\nReads:{iterations} RSSI[avg: {rssi_avg} cur: {rssi_cur}]\r\n'
+			latency += self.SAMPLE_TIME * iterations
+		elif command != '':
+			body = f'Unknown command: {command}\r\n'
+		#
+
+		# build the response string
+		response = f'{command}\r\n{body}{self.prompt}'
+
+		# return the response string and latency, including the transfer time
+		return response, latency + BYTE_TIME * len(response)
+	#
+#
+
+#
+# This class implements the pseudo-terminal of the emulator. The
+# firmware is served on the slave side of a pty, which the
+# drivers open like the serial port of the dish. Commands are
+# read from the master side, and each response is written once
+# its latency has elapsed, in order, as the firmware answers one
+# command at a time.
+#
+class EmulatorTerminal:
+
+	#
+	# Constructor
+	#
+	# @param firmware the firmware
+	# @param link_path the path of a symbolic link to the pty, or None
+	#
+	def __init__(self, firmware, link_path=None):
+
+		# set parameters
+		self.firmware = firmware
+		self.LINK_PATH = link_path
+
+		# initialize state
+		self.master_fd = None
+		self.slave_fd = None
+		self.port_name = None
+		self.buffer = bytearray()
+	#
+
+	#
+	# Opens the pty
+	#
+	# The slave side is kept open by the emulator, such that the
+	# pty survives the drivers closing and reopening the port.
+	#
+	# @return the path of the port
+	#
+	def open(self):
+
+		# open the pty without line processing (eg: echo or CR/LF translation)
+		self.master_fd, self.slave_fd = os.openpty()
+		tty.setraw(self.slave_fd)
+		self.port_name = os.ttyname(self.slave_fd)
+
+		# determine if link requested
+		if self.LINK_PATH != None:
+
+			# replace the link
+			if os.path.islink(self.LINK_PATH) == True:
+				os.remove(self.LINK_PATH)
+			#
+			os.symlink(self.port_name, self.LINK_PATH)
+		#
+
+		# return the path of the port
+		return self.LINK_PATH or self.port_name
+	#
+
+	#
+	# Closes the pty
+	#
+	def close(self):
+
+		# determine if link created
+		if self.LINK_PATH != None and os.path.islink(self.LINK_PATH) == True:
+			os.remove(self.LINK_PATH)
+		#
+
+		# loop through the file descriptors
+		for fd in (self.master_fd, self.slave_fd):
+
+			# close the file descriptor
+			if fd != None:
+				os.close(fd)
+			#
+		#
+
+		# reset state
+		self.master_fd = None
+		self.slave_fd = None
+	#
+
+	#
+	# Serves the commands received on the pty
+	#
+	# @param duration the time to serve in seconds, or None to serve until interrupted
+	#
+	def serve(self, duration=None):
+
+		# determine end time
+		end_time = time.monotonic() + duration if duration != None else None
+
+		# serve until the end time
+		while end_time == None or time.monotonic() < end_time:
+
+			# wait for commands
+			readable, _, _ = select.select([self.master_fd], [], [], SELECT_TIMEOUT if end_time == None else max(min(SELECT_TIMEOUT, end_time - time.monotonic()), 0))
+
+			# determine if commands received
+			if len(readable) > 0:
+
+				# read commands
+				self.buffer += os.read(self.master_fd, READ_SIZE)
+
+				# loop through each complete command
+				end_index = self.buffer.find(b'\r')
+				while end_index >= 0:
+
+					# extract command
+					command = self.buffer[:end_index].decode('utf-8', errors='replace').strip()
+					del self.buffer[:end_index+1]
+
+					# determine response
+					response, latency = self.firmware.respond(command)
+
+					# wait for the latency in real time
+					time.sleep(latency / self.firmware.SPEED)
+
+					# write response
+					os.write(self.master_fd, response.encode('utf-8'))
+
+					# find the next command
+					end_index = self.buffer.find(b'\r')
+				#
+			#
+		#
+	#
+#
@@ -0,0 +1,238 @@
+
+# imports
+import os
+import json
+import hashlib
+import numpy as np
+
+# imports
+from library.scanfile import read_satellite_data
+from library.scanfile import write_satellite_data
+from library.grid import grid_shape
+from library.grid import grid_angles
+
+# constants
+EARTH_RADIUS = 6378137.0
+EARTH_FLATTENING = 1 / 298.257223563
+GEO_RADIUS = 42164172.0
+
+# constants
+CACHE_DIR = 'geo_cache'
+ANGLE_DECIMALS = 3
+NUM_ARC_POINTS = 721
+BAND_WIDTH = 10.0
+
+#
+# Determines the azimuth/elevation of geostationary satellites
+#
+# The observer and satellite positions are converted to earth
+# centered coordinates, and the line of sight between them is
+# rotated into the east/north/up frame of the observer. Every
+# satellite is computed in one pass.
+#
+# @param latitude the observer geodetic latitude in degrees
+# @param longitude the observer longitude in degrees east
+# @param altitude the observer altitude in meters
+# @param satellite_longitudes the sub-satellite longitudes in degrees east
+#
+# @return the azimuth angles, clockwise from north
+# @return the elevation angles
+#
+def geo_angles(latitude, longitude, altitude, satellite_longitudes):
+
+	# convert to radians
+	phi = np.radians(latitude)
+	lam = np.radians(longitude)
+	satellite_lam = np.radians(np.asarray(satellite_longitudes, dtype=np.float64))
+
+	# determine the observer position on the WGS84 ellipsoid
+	eccentricity2 = EARTH_FLATTENING * (2 - EARTH_FLATTENING)
+	normal = EARTH_RADIUS / np.sqrt(1 - eccentricity2 * np.sin(phi) ** 2)
+	observer = np.array([(normal + altitude) * np.cos(phi) * np.cos(lam), (normal + altitude) * np.cos(phi) * np.sin(lam), (normal * (1 - eccentricity2) + altitude) * np.sin(phi)])
+
+	# determine the lines of sight to the satellites
+	line_of_sight = np.stack([GEO_RADIUS * np.cos(satellite_lam), GEO_RADIUS * np.sin(satellite_lam), np.zeros_like(satellite_lam)], axis=-1) - observer
+
+	# rotate into the east/north/up frame of the observer
+	east = line_of_sight @ np.array([-np.sin(lam), np.cos(lam), 0])
+	north = line_of_sight @ np.array([-np.sin(phi) * np.cos(lam), -np.sin(phi) * np.sin(lam), np.cos(phi)])
+	up = line_of_sight @ np.array([np.cos(phi) * np.cos(lam), np.cos(phi) * np.sin(lam), np.sin(phi)])
+
+	# determine the angles
+	azimuths = np.degrees(np.arctan2(east, north)) % 360
+	elevations = np.degrees(np.arctan2(up, np.hypot(east, north)))
+
+	# return the angles
+	return azimuths, elevations
+#
+
+#
+# Determines the satellite data of a satellite catalog
+#
+# Satellites below the horizon are excluded. The result is cached
+# per observer site and catalog in the cache directory, in the
+# format of a satellite data file.
+#
+# @param catalog_data the list of catalog data entries (name, longitude)
+# @param latitude the observer geodetic latitude in degrees
+# @param longitude the observer longitude in degrees east
+# @param altitude the observer altitude in meters
+# @param cache_dir the cache directory, or None to disable the cache
+#
+# @return the list of satellite data entries (name, azimuth, elevation)
+#
+def catalog_satellite_data(catalog_data, latitude, longitude, altitude=0.0, cache_dir=CACHE_DIR):
+
+	# determine the cache file path
+	cache_key = json.dumps([latitude, longitude, altitude, [[data_entry['name'], data_entry['longitude']] for data_entry in catalog_data]])
+	cache_path = os.path.join(cache_dir, hashlib.sha1(cache_key.encode('utf-8')).hexdigest() + '.csv') if cache_dir != None else None
+
+	# determine if cached
+	if cache_path != None and os.path.isfile(cache_path) == True:
+		return read_satellite_data(cache_path)
+	#
+
+	# determine the satellite angles
+	azimuths, elevations = geo_angles(latitude, longitude, altitude, [data_entry['longitude'] for data_entry in catalog_data])
+	azimuths = np.round(azimuths, ANGLE_DECIMALS).tolist()
+	elevations = np.round(elevations, ANGLE_DECIMALS).tolist()
+
+	# obtain the satellites above the horizon
+	satellite_data = [{'name': data_entry['name'], 'azimuth': azimuth, 'elevation': elevation} for data_entry, azimuth, elevation in zip(catalog_data, azimuths, elevations) if elevation > 0]
+
+	# determine if cache enabled
+	if cache_path != None:
+
+		# write cache file
+		os.makedirs(cache_dir, exist_ok=True)
+		write_satellite_data(cache_path, satellite_data)
+	#
+
+	# return the satellite data
+	return satellite_data
+#
+
+#
+# Determines the geostationary (Clarke belt) arc of an observer
+#
+# The arc is sampled across the sub-satellite longitudes visible
+# from the observer, in order along the arc. The azimuths are
+# unwrapped such that the arc is continuous and increasing in
+# azimuth, starting within [0, 360), so an arc which crosses north
+# (eg: from the southern hemisphere) ends beyond 360 degrees.
+#
+# @param latitude the observer geodetic latitude in degrees
+# @param longitude the observer longitude in degrees east
+# @param altitude the observer altitude in meters
+# @param num_points the number of arc points
+#
+# @return the unwrapped azimuth angles of the arc, or empty arrays if not visible
+# @return the elevation angles of the arc
+#
+def clarke_belt(latitude, longitude, altitude=0.0, num_points=NUM_ARC_POINTS):
+
+	# determine the arc angles, in order of longitude
+	azimuths, elevations = geo_angles(latitude, longitude, altitude, np.linspace(longitude - 90, longitude + 90, num_points))
+
+	# obtain the arc above the horizon, which is a single span of longitudes
+	visible = elevations >= 0
+	azimuths = np.unwrap(azimuths[visible], period=360)
+	elevations = elevations[visible]
+
+	# determine if visible
+	if len(azimuths) == 0:
+		return azimuths, elevations
+	#
+
+	# order the arc by increasing azimuth, starting within [0, 360)
+	if azimuths[-1] < azimuths[0]:
+		azimuths, elevations = azimuths[::-1], elevations[::-1]
+	#
+	azimuths = azimuths - 360 * np.floor(azimuths[0] / 360)
+
+	# return the arc
+	return azimuths, elevations
+#
+
+#
+# Determines the grid points of a band around the geostationary arc
+#
+# The distance of each grid point from the arc is its elevation
+# difference from the arc at the same azimuth, reduced by the
+# slope of the arc, which approximates the perpendicular distance
+# where the arc climbs gently. Where the arc climbs steeply (eg:
+# rising from the horizon at a constant azimuth at an equatorial
+# site), the distance is instead the azimuth difference from the
+# arc at the same elevation, reduced by the slope. Otherwise, grid
+# points at azimuths beyond either end of the visible arc (eg: the
+# azimuths between the ends of an arc which crosses north) are
+# outside of the band.
+#
+# @param azimuth_start the azimuth start angle of the grid
+# @param azimuth_end the azimuth end angle of the grid
+# @param elevation_start the elevation start angle of the grid
+# @param elevation_end the elevation end angle of the grid
+# @param step_angle the step angle of the grid
+# @param latitude the observer geodetic latitude in degrees
+# @param longitude the observer longitude in degrees east
+# @param altitude the observer altitude in meters
+# @param band_width the full width of the band in degrees
+#
+# @return the band array, indexed [elevation, azimuth], true within the band
+#
+def band_mask(azimuth_start, azimuth_end, elevation_start, elevation_end, step_angle, latitude, longitude, altitude=0.0, band_width=BAND_WIDTH):
+
+	# determine the grid angles
+	height, width = grid_shape(azimuth_start, azimuth_end, elevation_start, elevation_end, step_angle)
+	azimuths, elevations = grid_angles(np.arange(width), np.arange(height), azimuth_start, elevation_end, step_angle)
+
+	# determine the arc
+	arc_azimuths, arc_elevations = clarke_belt(latitude, longitude, altitude)
+
+	# determine if the arc is visible
+	if len(arc_azimuths) < 2:
+		return np.zeros((height, width), dtype=bool)
+	#
+
+	# determine the slope of the arc
+	with np.errstate(divide='ignore', invalid='ignore'):
+		arc_slopes = np.nan_to_num(np.gradient(arc_elevations, arc_azimuths))
+	#
+
+	# determine the steep segments of the arc, which climb more in elevation than in azimuth (eg: near an equatorial site)
+	steep = np.flatnonzero(np.abs(np.diff(arc_elevations)) > np.abs(np.diff(arc_azimuths)))
+
+	# initialize distances
+	distances = np.full((height, width), np.inf)
+
+	# loop through the whole turns of azimuth, since the arc azimuths are unwrapped
+	for turn in (-360.0, 0.0, 360.0):
+
+		# determine the arc elevation and slope at each azimuth of the grid, unknown beyond the ends of the arc
+		band_elevations = np.interp(azimuths + turn, arc_azimuths, arc_elevations, left=np.nan, right=np.nan)
+		band_slopes = np.interp(azimuths + turn, arc_azimuths, arc_slopes)
+
+		# determine the distance of each grid point from the arc
+		turn_distances = np.abs(elevations[:, np.newaxis] - band_elevations[np.newaxis, :]) * np.cos(np.arctan(band_slopes[np.newaxis, :]))
+		distances = np.fmin(distances, np.nan_to_num(turn_distances, nan=np.inf))
+
+		# loop through the steep segments
+		for index in steep:
+
+			# determine the grid rows alongside the segment
+			low_elevation, high_elevation = sorted(arc_elevations[index:index+2])
+			rows = (elevations >= low_elevation) & (elevations <= high_elevation)
+
+			# determine the arc azimuth at the elevation of each row
+			ratio = (arc_azimuths[index+1] - arc_azimuths[index]) / (arc_elevations[index+1] - arc_elevations[index])
+			row_azimuths = arc_azimuths[index] + (elevations[rows] - arc_elevations[index]) * ratio
+
+			# determine the distance of each grid point alongside the segment from the arc
+			segment_distances = np.abs(azimuths[np.newaxis, :] + turn - row_azimuths[:, np.newaxis]) * np.cos(np.arctan(ratio))
+			distances[rows] = np.fmin(distances[rows], segment_distances)
+		#
+	#
+
+	# return the band
+	return distances <= band_width / 2
+#
@@ -0,0 +1,154 @@
+
+# imports
+import numpy as np
+
+# constants
+GRID_EPSILON = 1e-6
+
+#
+# Determines the shape of a map grid
+#
+# The grid has a point at every step angle from the start
+# angles, up to and including the end angles.
+#
+# @param azimuth_start the azimuth start angle
+# @param azimuth_end the azimuth end angle
+# @param elevation_start the elevation start angle
+# @param elevation_end the elevation end angle
+# @param step_angle the azimuth/elevation step angle
+#
+# @return the grid height (elevation points)
+# @return the grid width (azimuth points)
+#
+def grid_shape(azimuth_start, azimuth_end, elevation_start, elevation_end, step_angle):
+
+	# determine grid width/height
+	width = int((azimuth_end - azimuth_start) / step_angle + GRID_EPSILON)
+	height = int((elevation_end - elevation_start) / step_angle + GRID_EPSILON)
+
+	# return the grid shape
+	return height+1, width+1
+#
+
+#
+# Determines the grid indexes of the supplied angles
+#
+# Rows run from the elevation end angle down, such that the grid
+# is displayed with the highest elevation at the top.
+#
+# @param azimuths the azimuth angles
+# @param elevations the elevation angles
+# @param azimuth_start the azimuth start angle
+# @param elevation_end the elevation end angle
+# @param step_angle the azimuth/elevation step angle
+#
+# @return the x (azimuth) indexes
+# @return the y (elevation) indexes
+#
+def grid_index(azimuths, elevations, azimuth_start, elevation_end, step_angle):
+
+	# determine x/y positions
+	x_pos = np.rint((np.asarray(azimuths, dtype=np.float64) - azimuth_start) / step_angle).astype(np.int64)
+	y_pos = np.rint((elevation_end - np.asarray(elevations, dtype=np.float64)) / step_angle).astype(np.int64)
+
+	# return the positions
+	return x_pos, y_pos
+#
+
+#
+# Determines the angles of the supplied grid indexes
+#
+# @param x_pos the x (azimuth) indexes
+# @param y_pos the y (elevation) indexes
+# @param azimuth_start the azimuth start angle
+# @param elevation_end the elevation end angle
+# @param step_angle the azimuth/elevation step angle
+#
+# @return the azimuth angles
+# @return the elevation angles
+#
+def grid_angles(x_pos, y_pos, azimuth_start, elevation_end, step_angle):
+	return azimuth_start + np.asarray(x_pos) * step_angle, elevation_end - np.asarray(y_pos) * step_angle
+#
+
+#
+# Sets the supplied data points on a grid
+#
+# Every data point is set with one scatter, which is equivalent
+# to setting each data point in order, coarsest step angle
+# first. Data points measured at a step angle larger than the
+# grid step angle fill every grid point within the cell of the
+# data point. Data points with invalid RSSI values or outside
+# the grid are ignored.
+#
+# @param grid_array the grid array, indexed [elevation, azimuth]
+# @param azimuths the azimuth angles
+# @param elevations the elevation angles
+# @param rssis the signal strengths
+# @param step_angles the step angles of the data points, or None
+# @param azimuth_start the azimuth start angle of the grid
+# @param elevation_end the elevation end angle of the grid
+# @param step_angle the step angle of the grid
+#
+# @return the number of data points set
+#
+def scatter(grid_array, azimuths, elevations, rssis, step_angles, azimuth_start, elevation_end, step_angle):
+
+	# initialize data arrays
+	rssis = np.asarray(rssis, dtype=np.float64)
+
+	# determine x/y positions
+	x_pos, y_pos = grid_index(azimuths, elevations, azimuth_start, elevation_end, step_angle)
+
+	# determine the cell half sizes in grid points
+	half_sizes = np.zeros(len(rssis), dtype=np.int64)
+	if step_angles is not None:
+		step_angles = np.nan_to_num(np.asarray(step_angles, dtype=np.float64))
+		coarse = step_angles > step_angle
+		half_sizes[coarse] = (step_angles[coarse] / step_angle / 2).astype(np.int64)
+	#
+
+	# determine valid data points
+	height, width = grid_array.shape
+	valid = (rssis > 0) & (x_pos >= 0) & (x_pos < width) & (y_pos >= 0) & (y_pos < height)
+
+	# order the valid data points coarsest first, in order
+	order = np.flatnonzero(valid)
+	order = order[np.argsort(-half_sizes[order], kind='stable')]
+
+	# determine if any valid data points
+	if len(order) > 0:
+
+		# initialize the latest data point of each grid point
+		latest = np.full(grid_array.shape, -1, dtype=np.int64)
+		ranks = np.arange(len(order))
+
+		# loop through the groups of equal cell size
+		for half_size in np.unique(half_sizes[order]):
+
+			# determine the data points of the group
+			group = half_sizes[order] == half_size
+
+			# loop through the cell offsets
+			for y_offset in range(-half_size, half_size+1):
+				for x_offset in range(-half_size, half_size+1):
+
+					# determine the offset grid points within the grid
+					x_cell = x_pos[order[group]] + x_offset
+					y_cell = y_pos[order[group]] + y_offset
+					inside = (x_cell >= 0) & (x_cell < width) & (y_cell >= 0) & (y_cell < height)
+
+					# keep the latest data point of each grid point
+					np.maximum.at(latest, (y_cell[inside], x_cell[inside]), ranks[group][inside])
+				#
+			#
+		#
+
+		# set data values
+		filled = latest >= 0
+		grid_array[filled] = rssis[order][latest[filled]]
+	#
+
+	# return the number of data points set
+	return len(order)
+#
@@ -0,0 +1,222 @@
+
+# imports
+import math
+import statistics
+from collections import deque
+
+# constants
+INITIAL_ITERATIONS = 2
+CHUNK_ITERATIONS = 4
+MAX_ITERATIONS = 20
+
+# constants
+CONFIDENCE_Z = 2.0
+TARGET_ERROR = 4.0
+
+# constants
+BOUNDARY_MARGIN = 10
+NOISE_FLOOR_WINDOW = 200
+
+# constants
+RSSI_INVALID = -1
+
+#
+# This class implements the adaptive RSSI integration policy.
+# Each point starts with a short RSSI reading, and further
+# readings are requested only while the estimated RSSI is too
+# close to the noise floor decision boundary to classify it
+# with the desired confidence, or while its standard error is
+# above the target. Points well clear of the boundary, such as
+# empty sky, therefore cost a single short reading, and the
+# dwell time is spent where it changes the heatmap.
+#
+# The per-sample noise is pooled across all points, such that a
+# single reading can be judged once earlier points have been
+# measured. Unless supplied, the noise floor is estimated as the
+# median RSSI of recent points, since most of the sky is empty.
+#
+class AdaptiveIntegrator:
+
+	#
+	# Constructor
+	#
+	# @param winegard the winegard
+	# @param initial_iterations the number of iterations of the first reading
+	# @param chunk_iterations the number of iterations of each further reading
+	# @param max_iterations the maximum number of iterations per point
+	# @param confidence_z the number of standard errors required between the RSSI and the boundary
+	# @param target_error the target standard error of the RSSI
+	# @param noise_floor the noise floor RSSI, or None to estimate it
+	#
+	def __init__(self, winegard, initial_iterations=INITIAL_ITERATIONS, chunk_iterations=CHUNK_ITERATIONS, max_iterations=MAX_ITERATIONS, confidence_z=CONFIDENCE_Z, target_error=TARGET_ERROR, noise_floor=None):
+
+		# set parameters
+		self.winegard = winegard
+		self.INITIAL_ITERATIONS = initial_iterations
+		self.CHUNK_ITERATIONS = chunk_iterations
+		self.MAX_ITERATIONS = max_iterations
+		self.CONFIDENCE_Z = confidence_z
+		self.TARGET_ERROR = target_error
+		self.NOISE_FLOOR = noise_floor
+
+		# initialize pooled noise sums
+		self.sum_squares = 0.0
+		self.degrees_of_freedom = 0
+
+		# initialize recent values
+		self.recent_values = deque(maxlen=NOISE_FLOOR_WINDOW)
+	#
+
+	#
+	# Integrates the RSSI of the current point
+	#
+	# This method accepts the result of the first reading, which
+	# the caller obtains together with the move, and requests
+	# further readings until the stopping criteria are met.
+	#
+	# @param status the status of the first reading
+	# @param data the RSSI data of the first reading
+	#
+	# @return the RSSI, or RSSI_INVALID if unsuccessful
+	# @return the number of samples
+	#
+	def integrate(self, status, data):
+
+		# initialize readings
+		readings = []
+
+		# loop while more readings are required
+		while status == True:
+
+			# append reading
+			readings.append((data['rssi_avg'], max(data['rssi_reads'], 1)))
+
+			# determine if complete
+			if self.is_complete(readings) == True:
+
+				# stop reading
+				status = False
+
+			else:
+
+				# obtain further RSSI data
+				status, data = self.winegard.get_dvb_rssi_data(self.CHUNK_ITERATIONS)
+			#
+		#
+
+		# initialize values
+		rssi = RSSI_INVALID
+		num_samples = sum(count for value, count in readings)
+
+		# determine if valid readings
+		if num_samples > 0:
+
+			# determine weighted mean
+			rssi = int(round(sum(value * count for value, count in readings) / num_samples))
+
+			# update noise statistics
+			self.update(readings, rssi)
+		#
+
+		# return the RSSI and number of samples
+		return rssi, num_samples
+	#
+
+	#
+	# Determines whether the readings of a point are sufficient
+	#
+	# @param readings the list of (average, count) readings
+	#
+	# @return true if complete, false otherwise
+	#
+	def is_complete(self, readings):
+
+		# determine sample count and mean
+		num_samples = sum(count for value, count in readings)
+		mean = sum(value * count for value, count in readings) / num_samples
+
+		# determine per-sample noise
+		sigma = self.sigma()
+
+		# initialize state
+		complete = num_samples >= self.MAX_ITERATIONS
+
+		# determine if noise is known
+		if complete == False and sigma != None:
+
+			# determine standard error
+			standard_error = sigma / math.sqrt(num_samples)
+
+			# determine boundary distance
+			boundary_distance = abs(mean - self.boundary())
+
+			# determine if confidently classified and precise enough
+			complete = boundary_distance >= self.CONFIDENCE_Z * standard_error and standard_error <= self.TARGET_ERROR
+		#
+
+		# return the state
+		return complete
+	#
+
+	#
+	# Determines the noise floor decision boundary
+	#
+	# @return the boundary RSSI
+	#
+	def boundary(self):
+
+		# initialize noise floor
+		noise_floor = self.NOISE_FLOOR
+
+		# determine if noise floor must be estimated
+		if noise_floor == None:
+			noise_floor = statistics.median(self.recent_values) if len(self.recent_values) > 0 else 0
+		#
+
+		# return the boundary
+		return noise_floor + BOUNDARY_MARGIN
+	#
+
+	#
+	# Determines the pooled per-sample noise
+	#
+	# @return the standard deviation of a single sample, or None if unknown
+	#
+	def sigma(self):
+
+		# initialize sigma
+		sigma = None
+
+		# determine if valid statistics
+		if self.degrees_of_freedom > 0:
+			sigma = math.sqrt(self.sum_squares / self.degrees_of_freedom)
+		#
+
+		# return sigma
+		return sigma
+	#
+
+	#
+	# Updates the noise statistics with the readings of a point
+	#
+	# The variance of a reading averaged over n samples is the
+	# per-sample variance divided by n, so each squared deviation
+	# is weighted by its sample count.
+	#
+	# @param readings the list of (average, count) readings
+	# @param rssi the RSSI of the point
+	#
+	def update(self, readings, rssi):
+
+		# determine if multiple readings
+		if len(readings) > 1:
+
+			# update pooled sums
+			self.sum_squares += sum(count * (value - rssi) ** 2 for value, count in readings)
+			self.degrees_of_freedom += len(readings) - 1
+		#
+
+		# update recent values
+		self.recent_values.append(rssi)
+	#
+#
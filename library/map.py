@@ -1,8 +1,13 @@
 
 # includes
+import time
 import numpy as np
 import matplotlib.pyplot as plt
 
+# includes
+from library.grid import grid_shape
+from library.grid import scatter
+
 # constants
 RSSI_MIN = 400
 RSSI_MAX = 580
@@ -11,11 +16,24 @@ RSSI_MAX = 580
 NUM_X_TICKS = 5
 NUM_Y_TICKS = 3
 
+# constants
+FRAME_RATE = 10
+
+# constants
+MASK_COLOR = 'dimgray'
+
 #
 # This class implements a heatmap to display satellite signal
 # strength data in real-time as the map is constructed. Data
 # points can also be overlayed on top of the satellite data.
 #
+# Data points are accumulated in the data array and rendered at
+# no more than the frame rate, such that acquisition never waits
+# for the GUI. Only the image is redrawn for each frame, by
+# blitting it onto a cached background of the axes, annotations
+# and overlay points. The background is captured whenever the
+# whole figure is drawn, such as when the window is resized.
+#
 class Map:
 
 	#
@@ -39,39 +57,52 @@ class Map:
 		# DATA
 
 		# determine map width/height
-		width = int((self.AZIMUTH_END - self.AZIMUTH_START) / self.STEP_ANGLE)
-		height = int((self.ELEVATION_END - self.ELEVATION_START) / self.STEP_ANGLE)
+		height, width = grid_shape(self.AZIMUTH_START, self.AZIMUTH_END, self.ELEVATION_START, self.ELEVATION_END, self.STEP_ANGLE)
 
 		# initialize data array
-		self.data_array = np.empty((height+1, width+1))
+		self.data_array = np.empty((height, width))
 		self.data_array.fill(RSSI_MAX)
 
+		# initialize mask
+		self.mask = None
+
 		# PLOT
 
 		# initialize extents
 		extent = [self.AZIMUTH_START, self.AZIMUTH_END, self.ELEVATION_START, self.ELEVATION_END]
 
 		# initialize plot
-		self.plt_im = plt.imshow(self.data_array, cmap='CMRmap', vmin=RSSI_MIN, vmax=RSSI_MAX, extent=extent)
-		plt.colorbar(pad=0.2, orientation='horizontal', location='bottom', label='RSSI')
+		self.figure, self.axes = plt.subplots()
+		self.plt_im = self.axes.imshow(self.data_array, cmap='CMRmap', vmin=RSSI_MIN, vmax=RSSI_MAX, extent=extent, animated=True)
+		self.figure.colorbar(self.plt_im, ax=self.axes, pad=0.2, orientation='horizontal', location='bottom', label='RSSI')
 
 		# set annotations
-		plt.title('Sky Scan')
-		plt.xlabel('Azimuth (deg)')
-		plt.ylabel('Elevation (deg)')
+		self.axes.set_title('Sky Scan')
+		self.axes.set_xlabel('Azimuth (deg)')
+		self.axes.set_ylabel('Elevation (deg)')
 
 		# increase the size of the plot
-		plt_gcf = plt.gcf()
-		plt_size_inches = plt_gcf.get_size_inches()
-		plt_gcf.set_size_inches(plt_size_inches*1.5)
+		plt_size_inches = self.figure.get_size_inches()
+		self.figure.set_size_inches(plt_size_inches*1.5)
 
 		# set x-axis ticks
 		x_ticks = np.linspace(self.AZIMUTH_START, self.AZIMUTH_END, NUM_X_TICKS)
-		plt.xticks(x_ticks)
+		self.axes.set_xticks(x_ticks)
 
 		# set y-axis ticks
 		y_ticks = np.linspace(self.ELEVATION_START, self.ELEVATION_END, NUM_Y_TICKS)
-		plt.yticks(y_ticks)
+		self.axes.set_yticks(y_ticks)
+
+		# RENDERING
+
+		# initialize rendering state
+		self.shown = False
+		self.background = None
+		self.frame_time = None
+		self.pending = False
+
+		# capture the background whenever the figure is drawn
+		self.figure.canvas.mpl_connect('draw_event', self.on_draw)
 	#
 
 	#
@@ -82,26 +113,48 @@ class Map:
 		# show plot
 		plt.ion()
 		plt.show()
+		self.shown = True
 
 		# wait for plot to open
 		plt.pause(1.0)
 	#
 
+	#
+	# Clears the data points of the map
+	#
+	# Overlay points are kept, such that the map can be reused as
+	# a template for another scan of the same region.
+	#
+	def reset(self):
+
+		# clear data array
+		self.data_array.fill(RSSI_MAX)
+
+		# the data must be rendered
+		self.pending = True
+	#
+
 	#
 	# Sets the specified data point on the map
 	#
 	# This method will first determine the validity of the
 	# supplied RSSI value. Valid RSSI values will be added to
-	# the map. The redraw parameter will determine whether
-	# execution is suspended to redraw the map. Invalid RSSI
-	# values will be ignored.
+	# the map. The redraw parameter will determine whether the
+	# map is rendered if a frame is due. Invalid RSSI values
+	# will be ignored.
+	#
+	# Data points measured at a step angle larger than the map
+	# step angle (eg: the coarse pass of an adaptive scan) fill
+	# every map point within the cell of the data point, such
+	# that finer data points set later replace part of the cell.
 	#
 	# @param azimuth the azimuth angle
 	# @param elevation the elevation angle
 	# @param rssi the signal strength
 	# @param redraw the redraw state
+	# @param step_angle the step angle of the data point
 	#
-	def set_data(self, azimuth, elevation, rssi, redraw=True):
+	def set_data(self, azimuth, elevation, rssi, redraw=True, step_angle=None):
 
 		# determine if valid value
 		if rssi > 0:
@@ -112,17 +165,60 @@ class Map:
 			# determine y position
 			y_pos = int(round((self.ELEVATION_END - elevation) / self.STEP_ANGLE))
 
+			# determine the cell half size in map points
+			half_size = 0
+			if step_angle != None and step_angle > self.STEP_ANGLE:
+				half_size = int(step_angle / self.STEP_ANGLE / 2)
+			#
+
 			# set data value
-			self.data_array[y_pos, x_pos] = rssi
+			self.data_array[max(y_pos-half_size, 0):y_pos+half_size+1, max(x_pos-half_size, 0):x_pos+half_size+1] = rssi
 
-			# update plot data
-			self.plt_im.set_data(self.data_array)
+			# the data must be rendered
+			self.pending = True
 
 			# determine redraw state
 			if redraw == True:
 
-				# wait for plot to update
-				plt.pause(0.001)
+				# render the map if a frame is due
+				self.render()
+			#
+		#
+	#
+
+	#
+	# Sets the specified data points on the map
+	#
+	# This method sets every data point with one scatter into
+	# the data array, and is equivalent to calling set_data for
+	# each data point, coarsest step angle first, in order. Data
+	# points with invalid RSSI values or outside the map are
+	# ignored. The redraw parameter will determine whether the
+	# map is rendered once all data points are set.
+	#
+	# @param azimuths the azimuth angles
+	# @param elevations the elevation angles
+	# @param rssis the signal strengths
+	# @param redraw the redraw state
+	# @param step_angles the step angles of the data points, or None
+	#
+	def set_data_batch(self, azimuths, elevations, rssis, redraw=True, step_angles=None):
+
+		# set data values
+		num_points = scatter(self.data_array, azimuths, elevations, rssis, step_angles, self.AZIMUTH_START, self.ELEVATION_END, self.STEP_ANGLE)
+
+		# determine if any data points set
+		if num_points > 0:
+
+			# the data must be rendered
+			self.pending = True
+		#
+
+		# determine redraw state
+		if redraw == True:
+
+			# render the map
+			self.render(force=True)
 		#
 	#
 
@@ -132,8 +228,9 @@ class Map:
 	# This method will first determine the validity of the
 	# supplied azimuth/elevation position. Points with valid
 	# positions will be added to the map. The redraw parameter
-	# will determine whether execution is suspended to redraw
-	# the map. Points with invalid positions will be ignored.
+	# will determine whether the whole map is redrawn, which
+	# also captures the new background. Points with invalid
+	# positions will be ignored.
 	#
 	# @param name the point name
 	# @param azimuth the azimuth angle
@@ -150,26 +247,236 @@ class Map:
 		if valid1 and valid2:
 
 			# add point to plot
-			plt.plot(azimuth, elevation, marker='o')
-			plt.annotate(text=name, xy=(azimuth, elevation), fontsize=8, weight='light')
+			self.axes.plot(azimuth, elevation, marker='o')
+			self.axes.annotate(text=name, xy=(azimuth, elevation), fontsize=8, weight='light')
 
 			# determine redraw state
 			if redraw == True:
 
-				# wait for plot to update
-				plt.pause(0.001)
+				# redraw the whole map
+				self.figure.canvas.draw_idle()
+				self.figure.canvas.flush_events()
 			#
 		#
 	#
 
+	#
+	# Sets the specified points on the map
+	#
+	# This method adds every point with a valid position in one
+	# marker collection, rather than a line per point, such that
+	# catalogs of thousands of points can be overlayed. Points
+	# with invalid positions will be ignored.
+	#
+	# @param names the point names
+	# @param azimuths the azimuth angles
+	# @param elevations the elevation angles
+	# @param redraw the redraw state
+	#
+	def set_points(self, names, azimuths, elevations, redraw=True):
+
+		# initialize data arrays
+		azimuths = np.asarray(azimuths, dtype=np.float64)
+		elevations = np.asarray(elevations, dtype=np.float64)
+
+		# determine position validity
+		valid1 = (azimuths >= self.AZIMUTH_START) & (azimuths <= self.AZIMUTH_END)
+		valid2 = (elevations >= self.ELEVATION_START) & (elevations <= self.ELEVATION_END)
+		indexes = np.flatnonzero(valid1 & valid2)
+
+		# determine if any valid positions
+		if len(indexes) > 0:
+
+			# add points to plot, cycling through the line colors
+			colors = plt.rcParams['axes.prop_cycle'].by_key()['color']
+			self.axes.scatter(azimuths[indexes], elevations[indexes], c=[colors[index % len(colors)] for index in range(len(indexes))], marker='o', zorder=2)
+
+			# loop through valid positions
+			for index in indexes:
+
+				# add point name to plot
+				self.axes.annotate(text=names[index], xy=(azimuths[index], elevations[index]), fontsize=8, weight='light')
+			#
+
+			# determine redraw state
+			if redraw == True:
+
+				# redraw the whole map
+				self.figure.canvas.draw_idle()
+				self.figure.canvas.flush_events()
+			#
+		#
+	#
+
+	#
+	# Sets the mask of the map
+	#
+	# Masked map points are not scanned (eg: outside of the band
+	# of a band scan), and are drawn in the mask color instead of
+	# the RSSI color.
+	#
+	# @param mask the mask array, indexed [elevation, azimuth], true for the masked map points
+	# @param redraw the redraw state
+	#
+	def set_mask(self, mask, redraw=True):
+
+		# set mask
+		self.mask = np.asarray(mask, dtype=bool)
+		self.plt_im.cmap.set_bad(MASK_COLOR)
+
+		# the data must be rendered
+		self.pending = True
+
+		# determine redraw state
+		if redraw == True:
+
+			# render the map if a frame is due
+			self.render()
+		#
+	#
+
+	#
+	# Sets the specified arc on the map
+	#
+	# The arc is drawn as a curve through the supplied positions,
+	# broken wherever it leaves the map. The azimuths may be
+	# unwrapped beyond [0, 360), so the arc is drawn at every
+	# whole turn of azimuth which overlaps the map.
+	#
+	# @param azimuths the azimuth angles of the arc
+	# @param elevations the elevation angles of the arc
+	# @param redraw the redraw state
+	#
+	def set_arc(self, azimuths, elevations, redraw=True):
+
+		# initialize data arrays
+		azimuths = np.array(azimuths, dtype=np.float64)
+		elevations = np.array(elevations, dtype=np.float64)
+
+		# determine the arc at each whole turn of azimuth, separated by breaks
+		turns = [-360.0, 0.0, 360.0]
+		azimuths = np.concatenate([np.append(azimuths + turn, np.nan) for turn in turns])
+		elevations = np.concatenate([np.append(elevations, np.nan) for turn in turns])
+
+		# break the arc outside the map
+		outside = (azimuths < self.AZIMUTH_START) | (azimuths > self.AZIMUTH_END) | (elevations < self.ELEVATION_START) | (elevations > self.ELEVATION_END)
+		elevations[outside] = np.nan
+
+		# add arc to plot, without changing the map limits
+		self.axes.plot(azimuths, elevations, color='white', linestyle='--', linewidth=1, scalex=False, scaley=False)
+
+		# determine redraw state
+		if redraw == True:
+
+			# redraw the whole map
+			self.figure.canvas.draw_idle()
+			self.figure.canvas.flush_events()
+		#
+	#
+
 	#
 	# Saves the map to the specified file path
 	#
+	# Saving draws the whole figure, so the map is only rendered
+	# beforehand if it is shown, such that the displayed map is
+	# also up to date.
+	#
 	# @param file_path the file path
 	#
 	def save(self, file_path):
 
+		# determine if shown
+		if self.shown == True:
+
+			# render any pending data
+			self.render(force=True)
+
+		else:
+
+			# update plot data
+			self.plt_im.set_data(self.image_data())
+		#
+
 		# save plot
-		plt.savefig(file_path)
+		self.figure.savefig(file_path)
+	#
+
+	#
+	# Renders the map
+	#
+	# This method renders the data points set since the previous
+	# frame. Unless forced, the map is only rendered if the frame
+	# interval has elapsed since the previous frame, otherwise
+	# the data points are rendered by a later frame. A forced
+	# render also draws any overlay points added without redraw.
+	#
+	# @param force the force state
+	#
+	def render(self, force=False):
+
+		# determine the time since the previous frame
+		now = time.monotonic()
+		frame_due = self.frame_time == None or now - self.frame_time >= 1.0 / FRAME_RATE
+
+		# determine if a frame should be rendered
+		if force == True or (self.pending == True and frame_due == True):
+
+			# update plot data
+			self.plt_im.set_data(self.image_data())
+
+			# determine if the background is valid
+			if self.background != None and self.figure.stale == False:
+
+				# blit the image onto the background
+				self.figure.canvas.restore_region(self.background)
+				self.axes.draw_artist(self.plt_im)
+				self.figure.canvas.blit(self.figure.bbox)
+
+			else:
+
+				# draw the whole figure, which captures the background
+				self.figure.canvas.draw_idle()
+			#
+
+			# process GUI events without waiting
+			self.figure.canvas.flush_events()
+
+			# update rendering state
+			self.frame_time = now
+			self.pending = False
+		#
+	#
+
+	#
+	# Determines the image data of the map
+	#
+	# @return the data array, masked if the map has a mask
+	#
+	def image_data(self):
+		return np.ma.masked_array(self.data_array, self.mask) if self.mask is not None else self.data_array
+	#
+
+	#
+	# Handles a draw of the whole figure
+	#
+	# The image is animated, so it is excluded from the figure
+	# draw. The background is captured and the image is drawn on
+	# top of it. Draws made to save the figure already include
+	# the image and are ignored.
+	#
+	# @param event the draw event
+	#
+	def on_draw(self, event):
+
+		# determine if drawing to the canvas
+		if self.figure.canvas.is_saving() == False:
+
+			# capture the background
+			self.background = self.figure.canvas.copy_from_bbox(self.figure.bbox)
+
+			# draw the image
+			self.plt_im.set_data(self.image_data())
+			self.axes.draw_artist(self.plt_im)
+		#
 	#
 #
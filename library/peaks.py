@@ -0,0 +1,447 @@
+
+# imports
+import csv
+import math
+import numpy as np
+
+# imports
+from library.grid import grid_shape
+from library.grid import grid_index
+from library.grid import grid_angles
+from library.grid import scatter
+
+# constants
+NOISE_SIGMA = 6.0
+MIN_NOISE = 1.0
+MAD_SCALE = 1.4826
+
+# constants
+MATCH_TOLERANCE = 2.0
+
+# constants
+STATUS_MATCHED = 'matched'
+STATUS_UNRESOLVED = 'unresolved'
+STATUS_UNMATCHED = 'unmatched'
+STATUS_MISSING = 'missing'
+
+#
+# This class implements a spatial index of the satellite
+# catalog. Satellites are bucketed into cells of the match
+# tolerance, such that only the satellites of the neighboring
+# cells of a position are compared with it.
+#
+class SatelliteIndex:
+
+	#
+	# Constructor
+	#
+	# @param satellite_data the list of satellite data entries
+	# @param tolerance the match tolerance in degrees
+	#
+	def __init__(self, satellite_data, tolerance=MATCH_TOLERANCE):
+
+		# set parameters
+		self.satellite_data = satellite_data
+		self.TOLERANCE = tolerance
+
+		# initialize satellite angles
+		self.azimuths = np.array([data_entry['azimuth'] for data_entry in satellite_data], dtype=np.float64)
+		self.elevations = np.array([data_entry['elevation'] for data_entry in satellite_data], dtype=np.float64)
+
+		# determine the number of azimuth cells, which wrap at 360 degrees
+		self.num_azimuth_cells = max(int(360 / tolerance), 1)
+
+		# initialize cells
+		self.cells = {}
+
+		# loop through satellites
+		for index, (azimuth, elevation) in enumerate(zip(self.azimuths, self.elevations)):
+
+			# append satellite to its cell
+			self.cells.setdefault(self.cell(azimuth, elevation), []).append(index)
+		#
+	#
+
+	#
+	# Determines the cell of the specified position
+	#
+	# @param azimuth the azimuth angle
+	# @param elevation the elevation angle
+	#
+	# @return the (azimuth, elevation) cell
+	#
+	def cell(self, azimuth, elevation):
+		return int(math.floor((azimuth % 360) / 360 * self.num_azimuth_cells)), int(math.floor(elevation / self.TOLERANCE))
+	#
+
+	#
+	# Finds the satellites within the tolerance of a position
+	#
+	# The azimuth separation of satellites within the tolerance
+	# grows with elevation, so more azimuth cells are searched at
+	# higher elevations.
+	#
+	# @param azimuth the azimuth angle
+	# @param elevation the elevation angle
+	#
+	# @return the indexes of the satellites within the tolerance
+	# @return the angular distances of the satellites
+	#
+	def query(self, azimuth, elevation):
+
+		# determine the searched cells
+		azimuth_cell, elevation_cell = self.cell(azimuth, elevation)
+		num_cells = min(int(math.ceil(1 / max(math.cos(math.radians(min(abs(elevation) + self.TOLERANCE, 90))), 1e-3))) + 1, self.num_azimuth_cells // 2)
+
+		# obtain the candidate satellites
+		candidates = [index for x_offset in range(-num_cells, num_cells+1) for y_offset in (-1, 0, 1) for index in self.cells.get(((azimuth_cell + x_offset) % self.num_azimuth_cells, elevation_cell + y_offset), [])]
+		candidates = np.array(sorted(set(candidates)), dtype=np.int64)
+
+		# determine the distances of the candidates
+		distances = angular_distance(azimuth, elevation, self.azimuths[candidates], self.elevations[candidates])
+		within = distances <= self.TOLERANCE
+
+		# return the satellites within the tolerance
+		return candidates[within], distances[within]
+	#
+#
+
+#
+# This class implements satellite identification on a scan grid.
+# Data points are accumulated into a grid of the scan region, on
+# which peaks are detected above an adaptive noise floor and
+# matched to the satellite catalog. Identification only uses the
+# measured grid points, such that it can be repeated as the scan
+# progresses.
+#
+class SatelliteIdentifier:
+
+	#
+	# Constructor
+	#
+	# @param azimuth_start the azimuth start angle
+	# @param azimuth_end the azimuth end angle
+	# @param elevation_start the elevation start angle
+	# @param elevation_end the elevation end angle
+	# @param step_angle the azimuth/elevation step angle
+	# @param satellite_data the list of satellite data entries
+	# @param tolerance the match tolerance in degrees
+	# @param noise_sigma the number of noise deviations a peak must be above the noise floor
+	#
+	def __init__(self, azimuth_start, azimuth_end, elevation_start, elevation_end, step_angle, satellite_data, tolerance=MATCH_TOLERANCE, noise_sigma=NOISE_SIGMA):
+
+		# set scan parameters
+		self.AZIMUTH_START = azimuth_start
+		self.AZIMUTH_END = azimuth_end
+		self.ELEVATION_START = elevation_start
+		self.ELEVATION_END = elevation_end
+		self.STEP_ANGLE = float(step_angle)
+		self.NOISE_SIGMA = noise_sigma
+
+		# initialize grid, where unmeasured grid points are NaN
+		self.grid_array = np.full(grid_shape(azimuth_start, azimuth_end, elevation_start, elevation_end, self.STEP_ANGLE), np.nan)
+
+		# initialize satellite index
+		self.index = SatelliteIndex(satellite_data, tolerance)
+	#
+
+	#
+	# Sets the specified data points on the grid
+	#
+	# @param azimuths the azimuth angles
+	# @param elevations the elevation angles
+	# @param rssis the signal strengths
+	# @param step_angles the step angles of the data points, or None
+	#
+	def set_data_batch(self, azimuths, elevations, rssis, step_angles=None):
+		scatter(self.grid_array, azimuths, elevations, rssis, step_angles, self.AZIMUTH_START, self.ELEVATION_END, self.STEP_ANGLE)
+	#
+
+	#
+	# Identifies the satellites of the grid
+	#
+	# Each peak is matched to the nearest unmatched satellite
+	# within the tolerance, closest pairs first. Satellites within
+	# the tolerance of a peak matched to another satellite are
+	# unresolved, as the dish can't separate them. Peaks without a
+	# satellite are unmatched, and satellites on a measured grid
+	# point without a peak are missing.
+	#
+	# @return the list of identification entries (status, name, satellite azimuth, satellite elevation, peak azimuth, peak elevation, rssi, separation)
+	#
+	def identify(self):
+
+		# detect peaks
+		peak_data = detect_peaks(self.grid_array, self.AZIMUTH_START, self.ELEVATION_END, self.STEP_ANGLE, self.NOISE_SIGMA)
+
+		# determine the candidate pairs of every peak
+		pairs = []
+		for peak, (azimuth, elevation) in enumerate(zip(peak_data['azimuth'], peak_data['elevation'])):
+			pairs.extend((distance, peak, satellite) for satellite, distance in zip(*self.index.query(azimuth, elevation)))
+		#
+
+		# initialize matches
+		peak_matches = {}
+		satellite_matches = {}
+		unresolved = {}
+
+		# loop through pairs, closest first
+		for distance, peak, satellite in sorted(pairs):
+
+			# determine if neither matched
+			if peak not in peak_matches and satellite not in satellite_matches:
+
+				# match the pair
+				peak_matches[peak] = satellite
+				satellite_matches[satellite] = (peak, distance)
+
+			elif satellite not in satellite_matches and satellite not in unresolved:
+
+				# the satellite shares a peak with another satellite
+				unresolved[satellite] = (peak, distance)
+			#
+		#
+
+		# initialize identification data
+		identification_data = []
+
+		# loop through satellites
+		for satellite, data_entry in enumerate(self.index.satellite_data):
+
+			# determine satellite status
+			if satellite in satellite_matches or satellite in unresolved:
+
+				# append matched satellite
+				peak, distance = satellite_matches[satellite] if satellite in satellite_matches else unresolved[satellite]
+				status = STATUS_MATCHED if satellite in satellite_matches else STATUS_UNRESOLVED
+				identification_data.append((status, data_entry['name'], data_entry['azimuth'], data_entry['elevation'], peak_data['azimuth'][peak], peak_data['elevation'][peak], peak_data['rssi'][peak], distance))
+
+			elif self.measured(data_entry['azimuth'], data_entry['elevation']) == True:
+
+				# append missing satellite
+				identification_data.append((STATUS_MISSING, data_entry['name'], data_entry['azimuth'], data_entry['elevation'], None, None, None, None))
+			#
+		#
+
+		# loop through unmatched peaks
+		for peak in range(len(peak_data['rssi'])):
+
+			# determine if unmatched
+			if peak not in peak_matches:
+
+				# append unmatched peak
+				identification_data.append((STATUS_UNMATCHED, None, None, None, peak_data['azimuth'][peak], peak_data['elevation'][peak], peak_data['rssi'][peak], None))
+			#
+		#
+
+		# return the identification data
+		return identification_data
+	#
+
+	#
+	# Determines whether the specified position has been measured
+	#
+	# @param azimuth the azimuth angle
+	# @param elevation the elevation angle
+	#
+	# @return true if measured, false otherwise
+	#
+	def measured(self, azimuth, elevation):
+
+		# determine x/y positions
+		x_pos, y_pos = grid_index(azimuth, elevation, self.AZIMUTH_START, self.ELEVATION_END, self.STEP_ANGLE)
+
+		# determine if within the grid
+		height, width = self.grid_array.shape
+		if x_pos < 0 or x_pos >= width or y_pos < 0 or y_pos >= height:
+			return False
+		#
+
+		# return the measured state
+		return bool(np.isnan(self.grid_array[y_pos, x_pos]) == False)
+	#
+#
+
+# HELPER
+
+#
+# Prints the supplied identification data
+#
+# @param identification_data the list of identification entries
+#
+def print_identification_data(identification_data):
+
+	# loop through identification entries
+	for status, name, azimuth, elevation, peak_azimuth, peak_elevation, rssi, separation in identification_data:
+
+		# debug
+		if status == STATUS_UNMATCHED:
+			print(f'INFO: {status}: Peak Az={peak_azimuth:.2f}, El={peak_elevation:.2f}, RSSI={rssi}')
+		elif status == STATUS_MISSING:
+			print(f'INFO: {status}: {name} Az={azimuth}, El={elevation}')
+		else:
+			print(f'INFO: {status}: {name} Az={azimuth}, El={elevation}, Peak Az={peak_azimuth:.2f}, El={peak_elevation:.2f}, RSSI={rssi}, Separation={separation:.2f}')
+		#
+	#
+#
+
+#
+# Writes the supplied identification data to a CSV file
+#
+# @param file_path the file path
+# @param identification_data the list of identification entries
+#
+def write_identification_data(file_path, identification_data):
+
+	# open output file
+	with open(file_path, 'w', newline='') as csv_file:
+
+		# write identification data
+		writer = csv.writer(csv_file)
+		writer.writerow(['status', 'name', 'azimuth', 'elevation', 'peak_azimuth', 'peak_elevation', 'rssi', 'separation'])
+		writer.writerows([value if isinstance(value, (float, np.floating)) == False else round(float(value), 3) for value in entry] for entry in identification_data)
+	#
+#
+
+#
+# Determines the noise floor of a grid
+#
+# The noise floor is the median of the measured grid points, and
+# the noise deviation is their scaled median absolute deviation,
+# such that the few hot grid points of the satellites don't raise
+# either of them.
+#
+# @param grid_array the grid array, where unmeasured grid points are NaN
+#
+# @return the noise floor RSSI, or None if no grid points are measured
+# @return the noise deviation
+#
+def noise_floor(grid_array):
+
+	# obtain measured grid points
+	values = grid_array[np.isnan(grid_array) == False]
+
+	# determine if any measured grid points
+	if len(values) == 0:
+		return None, None
+	#
+
+	# determine the noise floor
+	floor = float(np.median(values))
+	deviation = max(float(np.median(np.abs(values - floor))) * MAD_SCALE, MIN_NOISE)
+
+	# return the noise floor
+	return floor, deviation
+#
+
+#
+# Detects the peaks of a grid
+#
+# Peaks are local maxima more than the supplied number of noise
+# deviations above the noise floor. The position of each peak is
+# the centroid of its neighborhood weighted by the RSSI above the
+# noise floor, such that it is resolved finer than the grid.
+#
+# @param grid_array the grid array, where unmeasured grid points are NaN
+# @param azimuth_start the azimuth start angle of the grid
+# @param elevation_end the elevation end angle of the grid
+# @param step_angle the step angle of the grid
+# @param noise_sigma the number of noise deviations above the noise floor
+#
+# @return the dictionary of peak arrays (azimuth, elevation, rssi)
+#
+def detect_peaks(grid_array, azimuth_start, elevation_end, step_angle, noise_sigma=NOISE_SIGMA):
+
+	# determine the noise floor
+	floor, deviation = noise_floor(grid_array)
+
+	# determine if any measured grid points
+	if floor == None:
+		return {'azimuth': np.empty(0), 'elevation': np.empty(0), 'rssi': np.empty(0)}
+	#
+
+	# find peaks
+	y_pos, x_pos = find_peaks(grid_array, floor + noise_sigma * deviation)
+
+	# determine the weights of the neighborhood of each peak
+	padded = np.pad(np.nan_to_num(grid_array - floor, nan=0.0).clip(min=0), 1)
+	offsets = np.array([-1, 0, 1])
+	weights = padded[y_pos[:, None, None] + 1 + offsets[None, :, None], x_pos[:, None, None] + 1 + offsets[None, None, :]]
+	totals = weights.sum(axis=(1, 2))
+
+	# determine the centroid of each peak
+	y_centroid = y_pos + (weights.sum(axis=2) * offsets).sum(axis=1) / totals
+	x_centroid = x_pos + (weights.sum(axis=1) * offsets).sum(axis=1) / totals
+	azimuths, elevations = grid_angles(x_centroid, y_centroid, azimuth_start, elevation_end, step_angle)
+
+	# return the peaks
+	return {'azimuth': azimuths, 'elevation': elevations, 'rssi': grid_array[y_pos, x_pos]}
+#
+
+#
+# Finds the peaks of a grid
+#
+# A peak is a grid point at or above the threshold which is not
+# below any of its eight neighbors. Ties are broken in raster
+# order, such that a flat top is a single peak.
+#
+# @param grid_array the grid array, where unmeasured grid points are NaN
+# @param threshold the peak RSSI threshold
+#
+# @return the y (elevation) indexes of the peaks
+# @return the x (azimuth) indexes of the peaks
+#
+def find_peaks(grid_array, threshold):
+
+	# pad the grid such that the edges have neighbors
+	padded = np.pad(np.nan_to_num(grid_array, nan=-np.inf), 1, constant_values=-np.inf)
+	height, width = grid_array.shape
+
+	# initialize peaks
+	peaks = padded[1:-1, 1:-1] >= threshold
+
+	# loop through neighbors
+	for y_offset in (-1, 0, 1):
+		for x_offset in (-1, 0, 1):
+
+			# determine if neighbor
+			if y_offset != 0 or x_offset != 0:
+
+				# obtain the neighbors
+				neighbors = padded[1+y_offset:1+y_offset+height, 1+x_offset:1+x_offset+width]
+
+				# remove grid points below the neighbor, or equal to a preceding neighbor
+				if (y_offset, x_offset) < (0, 0):
+					peaks &= padded[1:-1, 1:-1] > neighbors
+				else:
+					peaks &= padded[1:-1, 1:-1] >= neighbors
+				#
+			#
+		#
+	#
+
+	# return the peaks
+	return np.nonzero(peaks)
+#
+
+#
+# Determines the angular distance between positions
+#
+# @param azimuth1 the azimuth angles of the first positions
+# @param elevation1 the elevation angles of the first positions
+# @param azimuth2 the azimuth angles of the second positions
+# @param elevation2 the elevation angles of the second positions
+#
+# @return the angular distances in degrees
+#
+def angular_distance(azimuth1, elevation1, azimuth2, elevation2):
+
+	# convert to radians
+	azimuth1, elevation1, azimuth2, elevation2 = np.radians(azimuth1), np.radians(elevation1), np.radians(azimuth2), np.radians(elevation2)
+
+	# determine the haversine of the distance
+	haversine = np.sin((elevation2 - elevation1) / 2) ** 2 + np.cos(elevation1) * np.cos(elevation2) * np.sin((azimuth2 - azimuth1) / 2) ** 2
+
+	# return the distance
+	return np.degrees(2 * np.arcsin(np.sqrt(np.clip(haversine, 0, 1))))
+#
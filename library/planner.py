@@ -0,0 +1,431 @@
+
+# imports
+import decimal
+import math
+
+# constants
+AXIS_AZIMUTH = 'azimuth'
+AXIS_ELEVATION = 'elevation'
+
+# constants
+AZIMUTH_SLEW_RATE = 10.0
+ELEVATION_SLEW_RATE = 5.0
+MOVE_OVERHEAD = 0.2
+MEASURE_TIME = 0.5
+
+# constants
+COORDINATE_PRECISION = 6
+
+#
+# This class implements the scan path planner. The planner
+# orders the points of the scan region into a serpentine
+# (boustrophedon) path, where each line of the inner axis is
+# traversed in the opposite direction of the previous line,
+# such that every move between points is a single step. The
+# inner axis is chosen as the axis which results in the lowest
+# estimated slew time.
+#
+class ScanPlanner:
+
+	#
+	# Constructor
+	#
+	# @param azimuth_rate the azimuth slew rate in degrees/sec
+	# @param elevation_rate the elevation slew rate in degrees/sec
+	# @param move_overhead the fixed time of each move in seconds
+	#
+	def __init__(self, azimuth_rate=AZIMUTH_SLEW_RATE, elevation_rate=ELEVATION_SLEW_RATE, move_overhead=MOVE_OVERHEAD):
+
+		# set parameters
+		self.AZIMUTH_RATE = azimuth_rate
+		self.ELEVATION_RATE = elevation_rate
+		self.MOVE_OVERHEAD = move_overhead
+	#
+
+	#
+	# Plans the scan path
+	#
+	# This method builds the serpentine path for each choice of
+	# inner axis and returns the path with the lowest estimated
+	# slew time.
+	#
+	# @param azimuth_start the azimuth start angle
+	# @param azimuth_end the azimuth end angle
+	# @param elevation_start the elevation start angle
+	# @param elevation_end the elevation end angle
+	# @param step_angle the azimuth/elevation step angle
+	#
+	# @return the ordered list of (azimuth, elevation) points
+	# @return the inner axis
+	#
+	def plan(self, azimuth_start, azimuth_end, elevation_start, elevation_end, step_angle):
+
+		# determine axis angles
+		azimuths = list(drange(azimuth_start, azimuth_end, step_angle))
+		elevations = list(drange(elevation_start, elevation_end, step_angle))
+
+		# build paths for each inner axis
+		elevation_path = serpentine(azimuths, elevations)
+		azimuth_path = [(azimuth, elevation) for elevation, azimuth in serpentine(elevations, azimuths)]
+
+		# determine the lowest cost path
+		if self.path_time(azimuth_path) < self.path_time(elevation_path):
+			points, inner_axis = azimuth_path, AXIS_AZIMUTH
+		else:
+			points, inner_axis = elevation_path, AXIS_ELEVATION
+		#
+
+		# return the points and inner axis
+		return points, inner_axis
+	#
+
+	#
+	# Estimates the time of a single move
+	#
+	# Both motors move simultaneously, so the move time is
+	# determined by the slowest axis.
+	#
+	# @param start the (azimuth, elevation) start point
+	# @param end the (azimuth, elevation) end point
+	#
+	# @return the estimated move time in seconds
+	#
+	def move_time(self, start, end):
+
+		# determine axis slew times
+		azimuth_time = abs(end[0] - start[0]) / self.AZIMUTH_RATE
+		elevation_time = abs(end[1] - start[1]) / self.ELEVATION_RATE
+
+		# return the move time
+		return self.MOVE_OVERHEAD + max(azimuth_time, elevation_time)
+	#
+
+	#
+	# Estimates the slew time of the supplied path
+	#
+	# @param points the ordered list of (azimuth, elevation) points
+	#
+	# @return the estimated slew time in seconds
+	#
+	def path_time(self, points):
+		return sum(self.move_time(start, end) for start, end in zip(points, points[1:]))
+	#
+
+	#
+	# Estimates the scan time of the supplied path
+	#
+	# @param points the ordered list of (azimuth, elevation) points
+	#
+	# @return the estimated scan time in seconds
+	#
+	def scan_time(self, points):
+		return self.path_time(points) + len(points) * MEASURE_TIME
+	#
+#
+
+#
+# This class implements the coarse-to-fine scan planner. The
+# region is first scanned at the coarse step angle. Each point
+# whose RSSI, or RSSI difference to a neighboring point, is at or
+# above the threshold is considered hot, and the area of each
+# hot point is rescanned at half of the step angle. This repeats
+# until the requested step angle is reached, such that only the
+# neighborhoods of satellites are scanned at full resolution.
+#
+class AdaptivePlanner:
+
+	#
+	# Constructor
+	#
+	# @param planner the scan path planner
+	# @param azimuth_start the azimuth start angle
+	# @param azimuth_end the azimuth end angle
+	# @param elevation_start the elevation start angle
+	# @param elevation_end the elevation end angle
+	# @param step_angle the final step angle
+	# @param coarse_angle the coarse step angle
+	# @param rssi_threshold the hot point RSSI threshold
+	# @param gradient_threshold the hot point RSSI gradient threshold
+	#
+	def __init__(self, planner, azimuth_start, azimuth_end, elevation_start, elevation_end, step_angle, coarse_angle, rssi_threshold, gradient_threshold):
+
+		# set parameters
+		self.planner = planner
+		self.AZIMUTH_START = azimuth_start
+		self.AZIMUTH_END = azimuth_end
+		self.ELEVATION_START = elevation_start
+		self.ELEVATION_END = elevation_end
+		self.STEP_ANGLE = float(step_angle)
+		self.RSSI_THRESHOLD = rssi_threshold
+		self.GRADIENT_THRESHOLD = gradient_threshold
+
+		# determine the number of halvings from the coarse step
+		num_levels = max(int(math.floor(math.log2(coarse_angle / self.STEP_ANGLE) + 1e-9)), 0)
+
+		# determine the step angle of each pass
+		self.steps = [self.STEP_ANGLE * 2 ** level for level in range(num_levels, -1, -1)]
+	#
+
+	#
+	# Plans the coarse pass
+	#
+	# @return the ordered list of (azimuth, elevation) points
+	# @return the inner axis
+	#
+	def plan_coarse(self):
+		return self.planner.plan(self.AZIMUTH_START, self.AZIMUTH_END, self.ELEVATION_START, self.ELEVATION_END, self.steps[0])
+	#
+
+	#
+	# Plans a refinement pass
+	#
+	# This method determines the hot points of the previous
+	# pass and plans the points of the area of each hot point
+	# at half of the previous step angle that have not yet been
+	# measured.
+	#
+	# @param samples the dictionary of measured (azimuth, elevation) RSSI values
+	# @param pass_points the points of the previous pass
+	# @param step_angle the step angle of the previous pass
+	# @param inner_axis the inner axis
+	#
+	# @return the ordered list of (azimuth, elevation) points
+	# @return the list of hot points
+	#
+	def plan_refinement(self, samples, pass_points, step_angle, inner_axis):
+
+		# determine hot points
+		hot_points = [point for point in pass_points if self.is_hot(samples, point, step_angle)]
+
+		# initialize points
+		points = set()
+
+		# determine the refinement offsets
+		half_step = step_angle / 2
+		offsets = (-half_step, 0.0, half_step)
+
+		# loop through hot points
+		for azimuth, elevation in hot_points:
+
+			# loop through neighborhood
+			for azimuth_offset in offsets:
+				for elevation_offset in offsets:
+
+					# determine point
+					point = coordinate(azimuth + azimuth_offset, elevation + elevation_offset)
+
+					# determine if point is unmeasured and within the region
+					if point not in samples and self.contains(point):
+
+						# add point
+						points.add(point)
+					#
+				#
+			#
+		#
+
+		# return the ordered points and hot points
+		return serpentine_order(points, inner_axis), hot_points
+	#
+
+	#
+	# Determines whether a point is hot
+	#
+	# @param samples the dictionary of measured (azimuth, elevation) RSSI values
+	# @param point the (azimuth, elevation) point
+	# @param step_angle the step angle
+	#
+	# @return true if hot, false otherwise
+	#
+	def is_hot(self, samples, point, step_angle):
+
+		# obtain point RSSI
+		rssi = samples.get(coordinate(point[0], point[1]))
+
+		# initialize hot state
+		hot = rssi != None and rssi >= self.RSSI_THRESHOLD
+
+		# determine if gradient check required
+		if rssi != None and hot == False:
+
+			# loop through neighbors
+			for azimuth_offset, elevation_offset in ((step_angle, 0), (-step_angle, 0), (0, step_angle), (0, -step_angle)):
+
+				# obtain neighbor RSSI
+				neighbor_rssi = samples.get(coordinate(point[0] + azimuth_offset, point[1] + elevation_offset))
+
+				# determine if valid neighbor
+				if neighbor_rssi != None and neighbor_rssi > 0:
+
+					# update hot state
+					hot = hot or abs(neighbor_rssi - rssi) >= self.GRADIENT_THRESHOLD
+				#
+			#
+		#
+
+		# return the hot state
+		return hot
+	#
+
+	#
+	# Determines whether a point is within the scan region
+	#
+	# @param point the (azimuth, elevation) point
+	#
+	# @return true if within the region, false otherwise
+	#
+	def contains(self, point):
+
+		# determine position validity
+		valid1 = point[0] >= self.AZIMUTH_START and point[0] <= self.AZIMUTH_END
+		valid2 = point[1] >= self.ELEVATION_START and point[1] <= self.ELEVATION_END
+
+		# return the validity
+		return valid1 and valid2
+	#
+
+	#
+	# Estimates the savings compared with the full grid
+	#
+	# The number of coarse points is exact. Each refinement pass
+	# is estimated to rescan the supplied fraction of the region
+	# at its step angle, of which one quarter of the points were
+	# already measured by the previous pass.
+	#
+	# @param hot_fraction the expected fraction of the region which is hot
+	#
+	# @return the estimate data
+	#
+	def estimate(self, hot_fraction):
+
+		# plan full grid
+		full_points, inner_axis = self.planner.plan(self.AZIMUTH_START, self.AZIMUTH_END, self.ELEVATION_START, self.ELEVATION_END, self.STEP_ANGLE)
+
+		# plan coarse pass
+		coarse_points, inner_axis = self.plan_coarse()
+
+		# initialize estimate
+		num_points = len(coarse_points)
+		scan_time = self.planner.scan_time(coarse_points)
+
+		# loop through refinement passes
+		for step_angle in self.steps[1:]:
+
+			# determine the number of grid points at this step
+			num_grid_points = (int((self.AZIMUTH_END - self.AZIMUTH_START) / step_angle) + 1) * (int((self.ELEVATION_END - self.ELEVATION_START) / step_angle) + 1)
+
+			# determine the number of new points
+			num_pass_points = int(round(num_grid_points * hot_fraction * 0.75))
+
+			# update estimate
+			num_points += num_pass_points
+			scan_time += num_pass_points * (self.planner.move_time((0, 0), (step_angle, 0)) + MEASURE_TIME)
+		#
+
+		# initialize estimate data
+		estimate_data = {}
+		estimate_data['points'] = num_points
+		estimate_data['time'] = scan_time
+		estimate_data['full_points'] = len(full_points)
+		estimate_data['full_time'] = self.planner.scan_time(full_points)
+
+		# return the estimate data
+		return estimate_data
+	#
+#
+
+# HELPER
+
+#
+# Builds a serpentine path
+#
+# @param outer_values the outer axis values
+# @param inner_values the inner axis values
+#
+# @return the ordered list of (outer, inner) points
+#
+def serpentine(outer_values, inner_values):
+
+	# initialize points
+	points = []
+
+	# loop through outer values
+	for index, outer in enumerate(outer_values):
+
+		# reverse every other line
+		line = inner_values if index % 2 == 0 else inner_values[::-1]
+
+		# append line points
+		points.extend((outer, inner) for inner in line)
+	#
+
+	# return the points
+	return points
+#
+
+#
+# Orders an unordered set of points into a serpentine path
+#
+# @param points the set of (azimuth, elevation) points
+# @param inner_axis the inner axis
+#
+# @return the ordered list of (azimuth, elevation) points
+#
+def serpentine_order(points, inner_axis):
+
+	# determine the outer and inner coordinate index
+	outer_index = 1 if inner_axis == AXIS_AZIMUTH else 0
+	inner_index = 1 - outer_index
+
+	# initialize lines
+	lines = {}
+
+	# group points by outer coordinate
+	for point in points:
+		lines.setdefault(point[outer_index], []).append(point)
+	#
+
+	# initialize ordered points
+	ordered_points = []
+
+	# loop through lines
+	for index, outer in enumerate(sorted(lines)):
+
+		# append line points, reversing every other line
+		ordered_points.extend(sorted(lines[outer], key=lambda point: point[inner_index], reverse=index % 2 == 1))
+	#
+
+	# return the ordered points
+	return ordered_points
+#
+
+#
+# Rounds a point to the coordinate precision
+#
+# Points are used as dictionary keys, so this ensures that the
+# same position computed in different ways is the same key.
+#
+# @param azimuth the azimuth angle
+# @param elevation the elevation angle
+#
+# @return the (azimuth, elevation) point
+#
+def coordinate(azimuth, elevation):
+	return (round(azimuth, COORDINATE_PRECISION), round(elevation, COORDINATE_PRECISION))
+#
+
+#
+# Generates list of decimal numbers
+#
+# @param x the list start value
+# @param y the list end value
+# @param jump the jump value
+#
+# @return the list of decimal numbers
+#
+def drange(x, y, jump):
+	while x <= y:
+		yield float(x)
+		x += decimal.Decimal(jump)
+	#
+#
@@ -0,0 +1,228 @@
+
+# imports
+import asyncio
+import time
+
+# imports
+from library.planner import AZIMUTH_SLEW_RATE
+from library.planner import ELEVATION_SLEW_RATE
+from library.settle import SETTLE_TOLERANCE
+from library.settle import distance
+
+# constants
+POLL_INTERVAL = 0.25
+MAX_AGE = 2.0
+
+# constants
+RATE_SMOOTHING = 0.2
+
+#
+# This class implements the background position poller of the
+# asyncio Winegard client. The motor angles are polled at a
+# fixed interval and the latest position is kept in memory with
+# its timestamp, such that position queries can be answered
+# without a serial round trip.
+#
+# Between polls, the position of each axis is extrapolated
+# towards its commanded target at the slew rate measured from
+# consecutive polls while the axis was moving. A position older
+# than the staleness limit is not reported, in which case the
+# caller queries the dish directly.
+#
+class PositionPoller:
+
+	#
+	# Constructor
+	#
+	# @param winegard the asyncio winegard
+	# @param poll_interval the time between polls in seconds
+	# @param max_age the maximum age of a reported position in seconds
+	#
+	def __init__(self, winegard, poll_interval=POLL_INTERVAL, max_age=MAX_AGE):
+
+		# set parameters
+		self.winegard = winegard
+		self.POLL_INTERVAL = poll_interval
+		self.MAX_AGE = max_age
+
+		# initialize task
+		self.task = None
+
+		# initialize position
+		self.timestamp = None
+		self.azimuth = None
+		self.elevation = None
+
+		# initialize slew rates
+		self.azimuth_rate = AZIMUTH_SLEW_RATE
+		self.elevation_rate = ELEVATION_SLEW_RATE
+	#
+
+	#
+	# Starts polling
+	#
+	def start(self):
+
+		# start polling task
+		self.task = asyncio.get_running_loop().create_task(self.poll_positions())
+	#
+
+	#
+	# Stops polling
+	#
+	async def stop(self):
+
+		# determine if polling
+		if self.task != None:
+
+			# stop polling task
+			self.task.cancel()
+			await asyncio.gather(self.task, return_exceptions=True)
+			self.task = None
+		#
+	#
+
+	#
+	# Polls the position until stopped
+	#
+	async def poll_positions(self):
+
+		# loop forever
+		while True:
+
+			# obtain the winegard angles
+			status, data = await self.winegard.get_motor_angle_data()
+
+			# determine if valid angle data
+			if status == True:
+
+				# update position
+				self.update(data['azimuth_angle'], data['elevation_angle'], time.monotonic())
+			#
+
+			# wait before polling again
+			await asyncio.sleep(self.POLL_INTERVAL)
+		#
+	#
+
+	#
+	# Updates the position
+	#
+	# The slew rate of an axis is measured from consecutive
+	# positions only while the axis is still short of its target,
+	# such that the motion covered the entire interval.
+	#
+	# @param azimuth the azimuth angle
+	# @param elevation the elevation angle
+	# @param timestamp the timestamp of the angles
+	#
+	def update(self, azimuth, elevation, timestamp):
+
+		# determine if previous position known
+		if self.timestamp != None and timestamp > self.timestamp:
+
+			# update slew rates
+			self.azimuth_rate = self.measure_rate(self.azimuth_rate, self.azimuth, azimuth, self.winegard.azimuth_target, timestamp - self.timestamp)
+			self.elevation_rate = self.measure_rate(self.elevation_rate, self.elevation, elevation, self.winegard.elevation_target, timestamp - self.timestamp)
+		#
+
+		# set position
+		self.azimuth = azimuth
+		self.elevation = elevation
+		self.timestamp = timestamp
+	#
+
+	#
+	# Determines the position
+	#
+	# @return true if a fresh position is known, false otherwise
+	# @return the position data if successful
+	#
+	def get_position(self):
+
+		# initialize status
+		status = False
+
+		# initialize position data
+		resp_data = {}
+
+		# determine the position age
+		now = time.monotonic()
+		age = now - self.timestamp if self.timestamp != None else None
+
+		# determine if fresh position
+		if age != None and age <= self.MAX_AGE:
+
+			# extrapolate the position towards the targets
+			resp_data['azimuth_angle'] = extrapolate(self.azimuth, self.winegard.azimuth_target, self.azimuth_rate, age) % 360
+			resp_data['elevation_angle'] = extrapolate(self.elevation, self.winegard.elevation_target, self.elevation_rate, age)
+			resp_data['age'] = age
+
+			# update status to indicate successful
+			status = True
+		#
+
+		# return the status and position data
+		return status, resp_data
+	#
+
+	#
+	# Updates the slew rate of an axis
+	#
+	# @param rate the current slew rate
+	# @param start the previous angle
+	# @param end the current angle
+	# @param target the commanded angle, or None
+	# @param interval the time between the angles
+	#
+	# @return the updated slew rate
+	#
+	def measure_rate(self, rate, start, end, target, interval):
+
+		# determine the distances
+		moved = distance(start, end)
+		remaining = distance(end, target) if target != None else None
+
+		# determine if moving throughout the interval
+		if remaining != None and remaining > SETTLE_TOLERANCE and moved > SETTLE_TOLERANCE:
+
+			# update the smoothed slew rate
+			rate += RATE_SMOOTHING * (moved / interval - rate)
+		#
+
+		# return the slew rate
+		return rate
+	#
+#
+
+# HELPER
+
+#
+# Extrapolates an axis towards its target
+#
+# @param angle the last polled angle
+# @param target the commanded angle, or None
+# @param rate the slew rate in degrees/sec
+# @param age the time since the angle was polled
+#
+# @return the extrapolated angle
+#
+def extrapolate(angle, target, rate, age):
+
+	# initialize angle
+	result = angle
+
+	# determine if target known
+	if target != None:
+
+		# determine the signed shortest distance to the target
+		remaining = (target - angle + 180) % 360 - 180
+
+		# move towards the target without passing it
+		travel = min(rate * age, abs(remaining))
+		result = angle + travel * (1 if remaining >= 0 else -1)
+	#
+
+	# return the angle
+	return result
+#
@@ -0,0 +1,262 @@
+
+# imports
+import re
+
+# constants
+END_CHARACTER = b'>'
+
+# constants
+MIN_READ_SIZE = 1
+
+# constants
+FLOAT_PATTERN = re.compile(r'\d+\.\d+')
+INTEGER_PATTERN = re.compile(r'\d+')
+
+#
+# This class implements the framed response reader for the
+# Winegard serial protocol. Every firmware response ends with
+# the menu prompt (eg: 'MOT>'), so this reader pulls all of the
+# bytes currently available from the serial port in a single
+# read and searches the reusable receive buffer for the prompt
+# character. Only the newly received bytes are searched on each
+# pass and any bytes received after the prompt are retained for
+# the next response.
+#
+class ResponseReader:
+
+	#
+	# Constructor
+	#
+	def __init__(self):
+
+		# initialize buffer
+		self.buffer = bytearray()
+		self.search_index = 0
+	#
+
+	#
+	# Resets the reader
+	#
+	# This method discards any buffered data, such as a partial
+	# response left behind by a serial timeout.
+	#
+	def reset(self):
+
+		# clear buffer
+		self.buffer.clear()
+		self.search_index = 0
+	#
+
+	#
+	# Appends the supplied bytes to the buffer
+	#
+	# This method is used when the serial port is read by the
+	# caller, such as by an event loop reader callback.
+	#
+	# @param data the received bytes
+	#
+	def feed(self, data):
+
+		# append bytes to buffer
+		self.buffer += data
+	#
+
+	#
+	# Extracts the next complete response from the buffer
+	#
+	# This method searches the bytes received since the previous
+	# search for the end character, without reading from the
+	# serial port.
+	#
+	# @return the response bytes, or None if no complete response is buffered
+	#
+	def next_response(self):
+
+		# initialize response
+		response = None
+
+		# search new data for end character
+		end_index = self.buffer.find(END_CHARACTER, self.search_index)
+
+		# determine if end character found
+		if end_index >= 0:
+
+			# extract response from buffer
+			response = bytes(self.buffer[:end_index+1])
+			del self.buffer[:end_index+1]
+			self.search_index = 0
+
+		else:
+
+			# only search the bytes received from now on
+			self.search_index = len(self.buffer)
+		#
+
+		# return the response bytes
+		return response
+	#
+
+	#
+	# Reads the next response
+	#
+	# This method reads from the supplied serial port until the
+	# end character is encountered. Each read requests all of
+	# the bytes waiting on the port, or a single byte if none
+	# are waiting such that the read will block until data
+	# arrives or the serial timeout expires.
+	#
+	# @param ser the serial port
+	#
+	# @return true if successful, false otherwise
+	# @return the response bytes if successful
+	#
+	def read_response(self, ser):
+
+		# initialize status
+		status = False
+
+		# search buffered data for end character
+		response = self.next_response()
+		resp_timeout = False
+
+		# read until end character is encountered
+		while response == None and resp_timeout == False:
+
+			# read all available data
+			# this can timeout and return 0 bytes of data
+			resp_bytes = ser.read(size=max(ser.in_waiting, MIN_READ_SIZE))
+
+			# determine number of bytes received
+			if len(resp_bytes) > 0:
+
+				# append bytes to buffer
+				self.feed(resp_bytes)
+
+				# search new data for end character
+				response = self.next_response()
+
+			else:
+
+				# serial timeout occurred
+				resp_timeout = True
+			#
+		#
+
+		# determine whether timeout occurred
+		if resp_timeout == False:
+
+			# update status to indicate successful
+			status = True
+
+		else:
+
+			# discard partial response
+			response = b''
+			self.reset()
+		#
+
+		# return the status and response bytes
+		return status, response
+	#
+#
+
+# PARSING
+
+#
+# Parses the decimal values from the supplied response
+#
+# @param response the response string
+#
+# @return the list of decimal value strings
+#
+def parse_floats(response):
+	return FLOAT_PATTERN.findall(response)
+#
+
+#
+# Parses the integer values from the supplied response
+#
+# @param response the response string
+#
+# @return the list of integer value strings
+#
+def parse_integers(response):
+	return INTEGER_PATTERN.findall(response)
+#
+
+#
+# Parses the motor angle data from the supplied response
+#
+# @param response the response string of the angle command
+# @param offset_angle the azimuth offset angle
+#
+# @return true if successful, false otherwise
+# @return the motor angle data if successful
+#
+def parse_angle_data(response, offset_angle):
+
+	# initialize status
+	status = False
+
+	# initialize response data
+	resp_data = {}
+
+	# parse data from response
+	results = parse_floats(response)
+
+	# determine if valid results
+	if len(results) == 2:
+
+		# obtain position data
+		azimuth_angle = float(results[0])
+		elevation_angle = float(results[1])
+
+		# determine adjusted angle
+		azimuth_angle_adjusted = (azimuth_angle - offset_angle) % 360
+
+		# set position data values
+		resp_data['azimuth_angle'] = azimuth_angle_adjusted
+		resp_data['elevation_angle'] = elevation_angle
+
+		# update status to indicate successful
+		status = True
+	#
+
+	# return the status and response data
+	return status, resp_data
+#
+
+#
+# Parses the RSSI data from the supplied response
+#
+# @param response the response string of the RSSI command
+#
+# @return true if successful, false otherwise
+# @return the DVB RSSI data if successful
+#
+def parse_rssi_data(response):
+
+	# initialize status
+	status = False
+
+	# initialize response data
+	resp_data = {}
+
+	# parse data from response
+	results = parse_integers(response)
+
+	# determine if valid results
+	if len(results) == 6:
+
+		# obtain rssi data values
+		resp_data['rssi_reads'] = int(results[3])
+		resp_data['rssi_avg'] = int(results[4])
+		resp_data['rssi_cur'] = int(results[5])
+
+		# update status to indicate successful
+		status = True
+	#
+
+	# return the status and response data
+	return status, resp_data
+#
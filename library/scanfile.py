@@ -0,0 +1,676 @@
+
+# imports
+import os
+import csv
+import json
+import struct
+import numpy as np
+
+# constants
+SCAN_DATA_NUM_VALUES = 3
+SCAN_DATA_MAX_VALUES = 5
+SCAN_DATA_AZIMUTH_INDEX = 0
+SCAN_DATA_ELEVATION_INDEX = 1
+SCAN_DATA_RSSI_INDEX = 2
+SCAN_DATA_STEP_INDEX = 3
+SCAN_DATA_SAMPLES_INDEX = 4
+
+# constants
+SATELLITE_DATA_NUM_VALUES = 3
+SATELLITE_DATA_NAME_INDEX = 0
+SATELLITE_DATA_AZIMUTH_INDEX = 1
+SATELLITE_DATA_ELEVATION_INDEX = 2
+
+# constants
+CATALOG_DATA_NUM_VALUES = 2
+CATALOG_DATA_NAME_INDEX = 0
+CATALOG_DATA_LONGITUDE_INDEX = 1
+
+# constants
+GRID_DECIMALS = 6
+
+# constants
+BINARY_MAGIC = b'SKYSCAN1'
+BINARY_VERSION = 1
+BINARY_ALIGNMENT = 64
+
+# constants
+RECORD_DTYPE = np.dtype([('azimuth', '<f4'), ('elevation', '<f4'), ('rssi', '<f4'), ('step', '<f4'), ('samples', '<u4'), ('time', '<f4')])
+
+#
+# Reads the specified scan data file
+#
+# Both the text and the binary scan data formats are supported,
+# and are distinguished by the magic bytes of binary files. The
+# arrays of a binary file are views of the memory mapped records.
+#
+# @param file_path the scan data file path
+#
+# @return true if successful, false otherwise
+# @return the scan data arrays (azimuth, elevation, rssi, step, samples) and header
+#
+def read_scan_data(file_path):
+
+	# determine if binary file
+	if is_binary_scan(file_path) == True:
+
+		# read binary scan data
+		status, resp_data = read_binary_scan(file_path)
+
+	else:
+
+		# read text scan data
+		status, resp_data = read_text_scan(file_path)
+	#
+
+	# return the status and scan data
+	return status, resp_data
+#
+
+#
+# Reads the specified text scan data file
+#
+# Each line of a scan data file contains the azimuth, elevation
+# and RSSI of a data point, optionally followed by the step angle
+# and the number of samples of the data point. The whole file is
+# parsed in one pass into an array with a column per value, where
+# values missing from a line are NaN. Files with a varying number
+# of values per line, or with invalid lines, are parsed line by
+# line instead, and the invalid lines are ignored. Text files
+# have no header.
+#
+# @param file_path the scan data file path
+#
+# @return true if successful, false otherwise
+# @return the scan data arrays (azimuth, elevation, rssi, step, samples) and header
+#
+def read_text_scan(file_path):
+
+	# initialize status
+	status = False
+
+	# initialize scan data
+	resp_data = {}
+
+	# initialize values
+	values = None
+
+	# open input file
+	with open(file_path, 'r') as file:
+
+		# read file contents
+		text = file.read()
+	#
+
+	# parse the whole file
+	try:
+		values = np.loadtxt(text.splitlines(), dtype=np.float64, ndmin=2)
+	except ValueError:
+		values = parse_lines(text.splitlines())
+	#
+
+	# determine if valid number of values
+	if values.shape[0] > 0 and values.shape[1] >= SCAN_DATA_NUM_VALUES:
+
+		# pad the optional values
+		if values.shape[1] < SCAN_DATA_MAX_VALUES:
+			values = np.pad(values, ((0, 0), (0, SCAN_DATA_MAX_VALUES - values.shape[1])), constant_values=np.nan)
+		#
+
+		# set scan data
+		resp_data['azimuth'] = values[:, SCAN_DATA_AZIMUTH_INDEX]
+		resp_data['elevation'] = values[:, SCAN_DATA_ELEVATION_INDEX]
+		resp_data['rssi'] = values[:, SCAN_DATA_RSSI_INDEX]
+		resp_data['step'] = values[:, SCAN_DATA_STEP_INDEX]
+		resp_data['samples'] = values[:, SCAN_DATA_SAMPLES_INDEX]
+		resp_data['header'] = {}
+
+		# update status to indicate successful
+		status = True
+	#
+
+	# return the status and scan data
+	return status, resp_data
+#
+
+#
+# Parses the supplied scan data lines one by one
+#
+# @param lines the scan data lines
+#
+# @return the array of values, padded with NaN
+#
+def parse_lines(lines):
+
+	# initialize values
+	values = np.full((len(lines), SCAN_DATA_MAX_VALUES), np.nan)
+	num_values = 0
+
+	# loop through lines
+	for line in lines:
+
+		# split line into values
+		line_data = line.split()
+
+		# determine if valid number of values
+		if len(line_data) >= SCAN_DATA_NUM_VALUES:
+
+			# parse line data
+			try:
+				values[num_values, :min(len(line_data), SCAN_DATA_MAX_VALUES)] = [float(value) for value in line_data[:SCAN_DATA_MAX_VALUES]]
+				num_values += 1
+			except ValueError:
+				print(f'WARNING: Invalid line ignored: {line}')
+			#
+
+		elif len(line_data) > 0:
+
+			# debug
+			print(f'WARNING: Invalid line ignored: {line}')
+		#
+	#
+
+	# return the parsed values
+	return values[:num_values]
+#
+
+#
+# Infers the map grid of the supplied scan data
+#
+# The grid recorded in the header of binary files is used when
+# present. Otherwise, the extents are the bounds of the data
+# points. The step angle is the finest recorded step angle or,
+# for files without step angles, the smallest spacing between
+# the unique azimuth and elevation angles, such that the grid
+# does not depend on the order of the data points (eg: serpentine
+# scans).
+#
+# @param scan_data the scan data arrays
+#
+# @return the azimuth start/end angles
+# @return the elevation start/end angles
+# @return the step angle, or None if unknown
+#
+def infer_grid(scan_data):
+
+	# obtain data values
+	azimuths = scan_data['azimuth']
+	elevations = scan_data['elevation']
+	steps = scan_data['step']
+	header = scan_data.get('header', {})
+
+	# determine if grid recorded
+	if header.get('step_angle') != None:
+
+		# use the recorded grid
+		azimuth_start = header['azimuth_start']
+		azimuth_end = header['azimuth_end']
+		elevation_start = header['elevation_start']
+		elevation_end = header['elevation_end']
+		step_angle = header['step_angle']
+
+	else:
+
+		# determine azimuth start/end
+		azimuth_start = round(float(azimuths.min()), GRID_DECIMALS)
+		azimuth_end = round(float(azimuths.max()), GRID_DECIMALS)
+
+		# determine elevation start/end
+		elevation_start = round(float(elevations.min()), GRID_DECIMALS)
+		elevation_end = round(float(elevations.max()), GRID_DECIMALS)
+
+		# determine the step angle
+		step_angle = infer_step_angle(azimuths, elevations, steps)
+	#
+
+	# return the grid
+	return azimuth_start, azimuth_end, elevation_start, elevation_end, step_angle
+#
+
+#
+# Infers the step angle of the supplied data points
+#
+# @param azimuths the azimuth angles
+# @param elevations the elevation angles
+# @param steps the recorded step angles, NaN if unknown
+#
+# @return the step angle, or None if unknown
+#
+def infer_step_angle(azimuths, elevations, steps):
+
+	# initialize step angle
+	step_angle = None
+
+	# determine if step angles recorded
+	if np.isfinite(steps).any() == True:
+
+		# use the finest recorded step angle
+		step_angle = round(float(np.nanmin(steps)), GRID_DECIMALS)
+
+	else:
+
+		# determine the spacing of the unique angles
+		spacings = np.concatenate((np.diff(np.unique(np.round(azimuths, GRID_DECIMALS))),
+									np.diff(np.unique(np.round(elevations, GRID_DECIMALS)))))
+
+		# determine if any spacing
+		if len(spacings) > 0:
+
+			# use the smallest spacing
+			step_angle = round(float(spacings.min()), GRID_DECIMALS)
+		#
+	#
+
+	# return the step angle
+	return step_angle
+#
+
+# BINARY
+
+#
+# This class implements the writer of the binary scan data
+# format. A binary file consists of the magic bytes, the length
+# of the header, a JSON header describing the scan and the
+# record layout, padded to the record alignment, and a fixed
+# width record per data point.
+#
+# The header is written once, so records are only ever appended
+# and the number of records is determined from the file size. A
+# file interrupted mid-scan therefore remains readable, and it
+# can be memory mapped while it is being written.
+#
+class ScanWriter:
+
+	#
+	# Constructor
+	#
+	# When appending to an existing file, its header is kept and
+	# any partially written record at the end of the file is
+	# removed.
+	#
+	# @param file_path the binary scan data file path
+	# @param header the header dictionary (eg: scan region, step angle, offset angle)
+	# @param append the append state, which appends to an existing file
+	#
+	def __init__(self, file_path, header, append=False):
+
+		# determine if appending to an existing file
+		if append == True and os.path.isfile(file_path) == True and is_binary_scan(file_path) == True:
+
+			# determine the size of the complete records
+			existing_header, offset = read_binary_header(file_path)
+			num_records = (os.path.getsize(file_path) - offset) // RECORD_DTYPE.itemsize
+
+			# open output file
+			self.file = open(file_path, 'r+b')
+
+			# remove any partial record
+			self.file.truncate(offset + num_records * RECORD_DTYPE.itemsize)
+			self.file.seek(0, os.SEEK_END)
+
+		else:
+
+			# open output file
+			self.file = open(file_path, 'wb')
+
+			# write header
+			self.file.write(encode_header(header))
+		#
+	#
+
+	#
+	# Appends the supplied data point
+	#
+	# @param azimuth the azimuth angle
+	# @param elevation the elevation angle
+	# @param rssi the signal strength
+	# @param step_angle the step angle of the data point
+	# @param num_samples the number of RSSI samples
+	# @param time the time since the start of the scan in seconds
+	#
+	def write(self, azimuth, elevation, rssi, step_angle, num_samples, time):
+
+		# append record
+		self.file.write(np.array([(azimuth, elevation, rssi, step_angle, num_samples, time)], dtype=RECORD_DTYPE).tobytes())
+	#
+
+	#
+	# Appends the supplied records
+	#
+	# @param records the record array
+	#
+	def write_records(self, records):
+
+		# append records
+		self.file.write(np.asarray(records, dtype=RECORD_DTYPE).tobytes())
+	#
+
+	#
+	# Flushes the written records
+	#
+	# The records are synced to the disk, such that they survive
+	# a crash of the scan.
+	#
+	def flush(self):
+
+		# flush the file data
+		self.file.flush()
+		os.fsync(self.file.fileno())
+	#
+
+	#
+	# Closes the file
+	#
+	def close(self):
+		self.file.close()
+	#
+#
+
+#
+# Encodes the supplied header
+#
+# @param header the header dictionary
+#
+# @return the encoded header, padded to the record alignment
+#
+def encode_header(header):
+
+	# initialize header
+	header = dict(header)
+	header['version'] = BINARY_VERSION
+	header['record'] = RECORD_DTYPE.descr
+
+	# encode header
+	data = json.dumps(header).encode('utf-8')
+
+	# determine padding
+	length = len(BINARY_MAGIC) + 4 + len(data)
+	padding = -length % BINARY_ALIGNMENT
+
+	# return the encoded header
+	return BINARY_MAGIC + struct.pack('<I', len(data) + padding) + data + b' ' * padding
+#
+
+#
+# Determines whether the specified file is a binary scan file
+#
+# @param file_path the scan data file path
+#
+# @return true if binary, false otherwise
+#
+def is_binary_scan(file_path):
+
+	# open input file
+	with open(file_path, 'rb') as file:
+
+		# return the binary state
+		return file.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+	#
+#
+
+#
+# Reads the header of the specified binary scan data file
+#
+# @param file_path the binary scan data file path
+#
+# @return the header dictionary
+# @return the offset of the records
+#
+def read_binary_header(file_path):
+
+	# open input file
+	with open(file_path, 'rb') as file:
+
+		# read header
+		file.seek(len(BINARY_MAGIC))
+		length = struct.unpack('<I', file.read(4))[0]
+		header = json.loads(file.read(length).decode('utf-8'))
+	#
+
+	# return the header and the offset of the records
+	return header, len(BINARY_MAGIC) + 4 + length
+#
+
+#
+# Reads the specified binary scan data file
+#
+# The records are memory mapped read-only, such that no data is
+# parsed and only the pages which are accessed are read. Any
+# partially written record at the end of the file is ignored.
+#
+# @param file_path the binary scan data file path
+#
+# @return true if successful, false otherwise
+# @return the scan data arrays (azimuth, elevation, rssi, step, samples, time) and header
+#
+def read_binary_scan(file_path):
+
+	# initialize status
+	status = False
+
+	# initialize scan data
+	resp_data = {}
+
+	# read header
+	header, offset = read_binary_header(file_path)
+
+	# determine the record layout and count
+	dtype = np.dtype([tuple(field) for field in header['record']])
+	num_records = (os.path.getsize(file_path) - offset) // dtype.itemsize
+
+	# determine if any records
+	if num_records > 0:
+
+		# map records
+		records = np.memmap(file_path, dtype=dtype, mode='r', offset=offset, shape=(num_records,))
+
+		# set scan data
+		for name in dtype.names:
+			resp_data[name] = records[name]
+		#
+		resp_data['header'] = header
+
+		# update status to indicate successful
+		status = True
+	#
+
+	# return the status and scan data
+	return status, resp_data
+#
+
+# CONVERSION
+
+#
+# Converts the specified text scan data file to a binary file
+#
+# The grid inferred from the text file is recorded in the header
+# along with any supplied header values.
+#
+# @param text_path the text scan data file path
+# @param binary_path the binary scan data file path
+# @param header the additional header values
+#
+# @return true if successful, false otherwise
+#
+def convert_to_binary(text_path, binary_path, header={}):
+
+	# read text scan data
+	status, scan_data = read_text_scan(text_path)
+
+	# determine if valid scan data
+	if status == True:
+
+		# determine grid
+		azimuth_start, azimuth_end, elevation_start, elevation_end, step_angle = infer_grid(scan_data)
+
+		# initialize header
+		header = dict({	'azimuth_start': azimuth_start,
+						'azimuth_end': azimuth_end,
+						'elevation_start': elevation_start,
+						'elevation_end': elevation_end,
+						'step_angle': step_angle }, **header)
+
+		# initialize records
+		records = np.zeros(len(scan_data['rssi']), dtype=RECORD_DTYPE)
+		records['azimuth'] = scan_data['azimuth']
+		records['elevation'] = scan_data['elevation']
+		records['rssi'] = scan_data['rssi']
+		records['step'] = scan_data['step']
+		records['samples'] = np.nan_to_num(scan_data['samples'])
+		records['time'] = np.nan
+
+		# write binary file
+		writer = ScanWriter(binary_path, header)
+		writer.write_records(records)
+		writer.close()
+	#
+
+	# return the status
+	return status
+#
+
+#
+# Converts the specified binary scan data file to a text file
+#
+# @param binary_path the binary scan data file path
+# @param text_path the text scan data file path
+#
+# @return true if successful, false otherwise
+#
+def convert_to_text(binary_path, text_path):
+
+	# read binary scan data
+	status, scan_data = read_binary_scan(binary_path)
+
+	# determine if valid scan data
+	if status == True:
+
+		# open output file
+		with open(text_path, 'w') as file:
+
+			# loop through records
+			for azimuth, elevation, rssi, step, samples in zip(scan_data['azimuth'].tolist(), scan_data['elevation'].tolist(), scan_data['rssi'].tolist(), scan_data['step'].tolist(), scan_data['samples'].tolist()):
+
+				# write to file
+				file.write(f'{azimuth:.6g} {elevation:.6g} {rssi:.6g} {step:.6g} {samples}\n')
+			#
+		#
+	#
+
+	# return the status
+	return status
+#
+
+# SATELLITES
+
+#
+# Reads the specified satellite data file
+#
+# Each row of a satellite data file consists of the name,
+# azimuth and elevation of a satellite. Invalid rows are ignored.
+#
+# @param file_path the satellite data file path
+#
+# @return the list of satellite data entries (name, azimuth, elevation)
+#
+def read_satellite_data(file_path):
+
+	# initialize data
+	satellite_data = []
+
+	# open input file
+	with open(file_path, newline='') as csv_file:
+
+		# loop through each row of satellite data
+		for row_data in csv.reader(csv_file, delimiter=','):
+
+			# determine if valid number of values
+			if len(row_data) == SATELLITE_DATA_NUM_VALUES:
+
+				# parse row data
+				name = row_data[SATELLITE_DATA_NAME_INDEX]
+				azimuth = row_data[SATELLITE_DATA_AZIMUTH_INDEX]
+				elevation = row_data[SATELLITE_DATA_ELEVATION_INDEX]
+
+				# initialize data entry
+				data_entry = {	'name': name,
+								'azimuth': float(azimuth),
+								'elevation': float(elevation) }
+
+				# append satellite data
+				satellite_data.append(data_entry)
+
+			else:
+
+				# debug
+				print(f'WARNING: Invalid row ignored: {row_data}')
+			#
+		#
+	#
+
+	# return the satellite data
+	return satellite_data
+#
+
+#
+# Writes the supplied satellite data to the specified file
+#
+# The file has the format of a satellite data file, such that it
+# can be read with read_satellite_data.
+#
+# @param file_path the satellite data file path
+# @param satellite_data the list of satellite data entries
+#
+def write_satellite_data(file_path, satellite_data):
+
+	# open output file
+	with open(file_path, 'w', newline='') as csv_file:
+
+		# write satellite data
+		writer = csv.writer(csv_file, delimiter=',')
+		writer.writerows([data_entry['name'], data_entry['azimuth'], data_entry['elevation']] for data_entry in satellite_data)
+	#
+#
+
+#
+# Reads the specified satellite catalog file
+#
+# Each row of the catalog consists of the satellite name and the
+# longitude of its sub-satellite point in degrees east.
+#
+# @param file_path the satellite catalog file path
+#
+# @return the list of catalog data entries (name, longitude)
+#
+def read_catalog_data(file_path):
+
+	# initialize data
+	catalog_data = []
+
+	# open input file
+	with open(file_path, newline='') as csv_file:
+
+		# loop through each row of catalog data
+		for row_data in csv.reader(csv_file, delimiter=','):
+
+			# determine if valid number of values
+			if len(row_data) == CATALOG_DATA_NUM_VALUES:
+
+				# initialize data entry
+				data_entry = {	'name': row_data[CATALOG_DATA_NAME_INDEX],
+								'longitude': float(row_data[CATALOG_DATA_LONGITUDE_INDEX]) }
+
+				# append catalog data
+				catalog_data.append(data_entry)
+
+			else:
+
+				# debug
+				print(f'WARNING: Invalid row ignored: {row_data}')
+			#
+		#
+	#
+
+	# return the catalog data
+	return catalog_data
+#
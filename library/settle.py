@@ -0,0 +1,441 @@
+
+# imports
+import time
+
+# imports
+from library.stats import PHASE_SETTLE
+
+# constants
+AXIS_AZIMUTH = 'azimuth'
+AXIS_ELEVATION = 'elevation'
+
+# constants
+SETTLE_TOLERANCE = 0.1
+SETTLE_TIMEOUT = 30.0
+POLL_INTERVAL = 0.05
+NUM_STABLE_POLLS = 3
+
+# constants
+MIN_NUM_SAMPLES = 5
+REPOLL_INTERVAL = 25
+PREDICT_MARGIN = 1.2
+
+#
+# This class implements the settle model of a single motor
+# axis. The settle time of polled moves is fitted against the
+# move distance (settle time = overhead + distance / slew rate)
+# such that the settle time of subsequent moves can be
+# predicted without polling.
+#
+class AxisModel:
+
+	#
+	# Constructor
+	#
+	def __init__(self):
+
+		# initialize sums
+		self.num_samples = 0
+		self.sum_distance = 0.0
+		self.sum_time = 0.0
+		self.sum_distance_squared = 0.0
+		self.sum_distance_time = 0.0
+		self.max_distance = 0.0
+	#
+
+	#
+	# Adds a measured move to the model
+	#
+	# @param distance the move distance in degrees
+	# @param settle_time the measured settle time in seconds
+	#
+	def add_sample(self, distance, settle_time):
+
+		# update sums
+		self.num_samples += 1
+		self.sum_distance += distance
+		self.sum_time += settle_time
+		self.sum_distance_squared += distance * distance
+		self.sum_distance_time += distance * settle_time
+		self.max_distance = max(self.max_distance, distance)
+	#
+
+	#
+	# Determines the fitted model parameters
+	#
+	# When all of the measured moves have the same distance the
+	# slope cannot be fitted, so the overhead is assumed to be
+	# zero and the slew rate is determined from the mean values.
+	#
+	# @return the overhead in seconds
+	# @return the slew rate in degrees/sec, or None if unknown
+	#
+	def fit(self):
+
+		# initialize values
+		overhead = 0.0
+		slew_rate = None
+
+		# determine if valid samples
+		if self.num_samples > 0 and self.sum_distance > 0:
+
+			# determine distance variance
+			n = self.num_samples
+			variance = n * self.sum_distance_squared - self.sum_distance ** 2
+
+			# determine if slope can be fitted
+			if variance > 1e-9 * n * n:
+
+				# fit overhead and seconds per degree
+				slope = (n * self.sum_distance_time - self.sum_distance * self.sum_time) / variance
+				overhead = max((self.sum_time - slope * self.sum_distance) / n, 0.0)
+
+			else:
+
+				# determine seconds per degree from mean values
+				slope = self.sum_time / self.sum_distance
+			#
+
+			# determine slew rate
+			if slope > 0:
+				slew_rate = 1.0 / slope
+			#
+		#
+
+		# return the overhead and slew rate
+		return overhead, slew_rate
+	#
+
+	#
+	# Predicts the settle time of a move
+	#
+	# Moves are only predicted once enough moves have been
+	# measured, and never for distances beyond the longest
+	# measured move.
+	#
+	# @param distance the move distance in degrees
+	#
+	# @return the predicted settle time in seconds, or None if unknown
+	#
+	def predict(self, distance):
+
+		# initialize prediction
+		prediction = None
+
+		# determine if prediction is valid
+		if self.num_samples >= MIN_NUM_SAMPLES and distance <= self.max_distance:
+
+			# obtain model parameters
+			overhead, slew_rate = self.fit()
+
+			# determine if valid slew rate
+			if slew_rate != None:
+
+				# determine prediction
+				prediction = (overhead + distance / slew_rate) * PREDICT_MARGIN
+			#
+		#
+
+		# return the prediction
+		return prediction
+	#
+#
+
+#
+# This class implements motion-complete detection for the
+# Winegard satellite dish. Moves are polled using the motor
+# angle data until the position reaches the target within the
+# tolerance. Each axis learns its settle model from the polled
+# moves, and once the model is trained, moves are predicted
+# rather than polled. Every REPOLL_INTERVAL'th move is polled
+# to keep the model up to date.
+#
+class SettleDetector:
+
+	#
+	# Constructor
+	#
+	# @param winegard the winegard
+	# @param tolerance the position tolerance in degrees
+	# @param timeout the settle timeout in seconds
+	#
+	def __init__(self, winegard, tolerance=SETTLE_TOLERANCE, timeout=SETTLE_TIMEOUT):
+
+		# set parameters
+		self.winegard = winegard
+		self.TOLERANCE = tolerance
+		self.TIMEOUT = timeout
+
+		# initialize axis models
+		self.models = {AXIS_AZIMUTH: AxisModel(), AXIS_ELEVATION: AxisModel()}
+
+		# initialize move count
+		self.num_moves = 0
+	#
+
+	#
+	# Moves to the specified position
+	#
+	# This method commands the motors to the specified position
+	# and determines the settle time of the move. Predicted moves
+	# return immediately such that the caller can overlap the
+	# remaining wait with other commands.
+	#
+	# @param azimuth the azimuth angle
+	# @param elevation the elevation angle
+	#
+	# @return true if successful, false otherwise
+	# @return the settle data
+	#
+	def move(self, azimuth, elevation):
+
+		# determine move distances
+		azimuth_distance = distance(self.winegard.azimuth_target, azimuth)
+		elevation_distance = distance(self.winegard.elevation_target, elevation)
+
+		# determine settle prediction
+		prediction = self.predict(azimuth_distance, elevation_distance)
+
+		# update move count
+		self.num_moves += 1
+
+		# determine start time
+		start_time = time.monotonic()
+
+		# position motors
+		status = self.winegard.move_motors(azimuth, elevation)
+
+		# initialize settle data
+		settle_data = {'settle_time': prediction, 'wait_time': prediction, 'polled': False}
+
+		# determine if move must be polled
+		if status == True and prediction == None:
+
+			# wait for motor movement to complete
+			status, settle_time = self.wait(azimuth, elevation, start_time)
+
+			# determine if valid settle time
+			if status == True:
+
+				# update axis models
+				self.learn(azimuth_distance, elevation_distance, settle_time)
+			#
+
+			# update settle data
+			settle_data = {'settle_time': settle_time, 'wait_time': 0.0, 'polled': True}
+
+		elif status == False:
+
+			# the motors were not commanded, so there is nothing to wait for
+			settle_data = {'settle_time': 0.0, 'wait_time': 0.0, 'polled': False}
+		#
+
+		# return the status and settle data
+		return status, settle_data
+	#
+
+	#
+	# Waits for the motors to reach the specified position
+	#
+	# This method polls the motor angles until both axes are
+	# within the tolerance of the target. An axis without a
+	# target (eg: while homing) is considered settled once its
+	# angle has remained unchanged for NUM_STABLE_POLLS polls.
+	#
+	# @param azimuth the azimuth target, or None
+	# @param elevation the elevation target, or None
+	# @param start_time the move start time
+	#
+	# @return true if successful, false if a timeout occurred
+	# @return the settle time in seconds
+	#
+	def wait(self, azimuth, elevation, start_time=None):
+
+		# determine start time
+		if start_time == None:
+			start_time = time.monotonic()
+		#
+
+		# initialize state
+		settled = False
+		previous = None
+		num_stable = 0
+		elapsed_time = 0.0
+
+		# poll until settled or timeout
+		while settled == False and elapsed_time < self.TIMEOUT:
+
+			# obtain the winegard angles
+			status, data = self.winegard.get_motor_angle_data()
+
+			# determine elapsed time
+			elapsed_time = time.monotonic() - start_time
+
+			# determine if valid angle data
+			if status == True:
+
+				# obtain the angle data
+				current = (data['azimuth_angle'], data['elevation_angle'])
+
+				# determine stable state
+				stable = previous != None and max(distance(previous[0], current[0]), distance(previous[1], current[1])) <= self.TOLERANCE
+				num_stable = num_stable + 1 if stable else 0
+				previous = current
+
+				# determine per-axis settled state
+				azimuth_settled = within(azimuth, current[0], self.TOLERANCE, num_stable)
+				elevation_settled = within(elevation, current[1], self.TOLERANCE, num_stable)
+
+				# update settled state
+				settled = azimuth_settled and elevation_settled
+			#
+
+			# determine if polling continues
+			if settled == False:
+
+				# wait before polling again
+				time.sleep(POLL_INTERVAL)
+
+				# determine if instrumentation enabled
+				if self.winegard.stats != None:
+
+					# record settle time
+					self.winegard.stats.record_phase(PHASE_SETTLE, POLL_INTERVAL)
+				#
+			#
+		#
+
+		# determine if timeout occurred
+		if settled == False:
+
+			# debug
+			print(f'WARNING: Motors did not settle within {self.TIMEOUT} seconds')
+		#
+
+		# return the status and settle time
+		return settled, elapsed_time
+	#
+
+	#
+	# Predicts the settle time of a move
+	#
+	# @param azimuth_distance the azimuth move distance, or None
+	# @param elevation_distance the elevation move distance, or None
+	#
+	# @return the predicted settle time in seconds, or None if the move must be polled
+	#
+	def predict(self, azimuth_distance, elevation_distance):
+
+		# initialize prediction
+		prediction = None
+
+		# determine if prediction allowed
+		if azimuth_distance != None and elevation_distance != None and self.num_moves % REPOLL_INTERVAL != 0:
+
+			# initialize prediction
+			prediction = 0.0
+
+			# loop through moving axes
+			for axis, axis_distance in ((AXIS_AZIMUTH, azimuth_distance), (AXIS_ELEVATION, elevation_distance)):
+
+				# determine if axis moves
+				if axis_distance > 0 and prediction != None:
+
+					# determine axis prediction
+					axis_prediction = self.models[axis].predict(axis_distance)
+
+					# both motors move simultaneously
+					prediction = None if axis_prediction == None else max(prediction, axis_prediction)
+				#
+			#
+		#
+
+		# return the prediction
+		return prediction
+	#
+
+	#
+	# Adds a polled move to the axis models
+	#
+	# Only single axis moves are learned, since the settle time
+	# of a two axis move cannot be attributed to either axis.
+	#
+	# @param azimuth_distance the azimuth move distance
+	# @param elevation_distance the elevation move distance
+	# @param settle_time the measured settle time in seconds
+	#
+	def learn(self, azimuth_distance, elevation_distance, settle_time):
+
+		# determine moving axis
+		if azimuth_distance != None and elevation_distance == 0 and azimuth_distance > 0:
+			self.models[AXIS_AZIMUTH].add_sample(azimuth_distance, settle_time)
+		elif elevation_distance != None and azimuth_distance == 0 and elevation_distance > 0:
+			self.models[AXIS_ELEVATION].add_sample(elevation_distance, settle_time)
+		#
+	#
+
+	#
+	# Determines the learned slew rate of the specified axis
+	#
+	# @param axis the axis name
+	#
+	# @return the slew rate in degrees/sec, or None if unknown
+	#
+	def slew_rate(self, axis):
+
+		# obtain model parameters
+		overhead, slew_rate = self.models[axis].fit()
+
+		# return the slew rate
+		return slew_rate
+	#
+#
+
+# HELPER
+
+#
+# Determines the angular distance between two angles
+#
+# @param start the start angle, or None if unknown
+# @param end the end angle
+#
+# @return the distance in degrees, or None if unknown
+#
+def distance(start, end):
+
+	# initialize distance
+	result = None
+
+	# determine if valid start angle
+	if start != None:
+
+		# determine the shortest distance around the circle
+		result = abs((end - start + 180) % 360 - 180)
+	#
+
+	# return the distance
+	return result
+#
+
+#
+# Determines whether an axis is settled
+#
+# @param target the target angle, or None
+# @param current the current angle
+# @param tolerance the tolerance in degrees
+# @param num_stable the number of consecutive stable polls
+#
+# @return true if settled, false otherwise
+#
+def within(target, current, tolerance, num_stable):
+
+	# determine if target supplied
+	if target != None:
+		settled = distance(target, current) <= tolerance
+	else:
+		settled = num_stable >= NUM_STABLE_POLLS
+	#
+
+	# return the settled state
+	return settled
+#
@@ -0,0 +1,335 @@
+
+# imports
+import os
+import tempfile
+import numpy as np
+
+# imports
+from library.scanfile import read_scan_data
+from library.scanfile import infer_grid
+from library.grid import grid_shape
+from library.grid import grid_angles
+from library.grid import scatter
+from library.peaks import find_peaks
+
+# constants
+MEMMAP_SIZE = 256 * 1024 * 1024
+CHUNK_SIZE = 16 * 1024 * 1024
+
+# constants
+HOT_THRESHOLD = 420
+CHANGE_THRESHOLD = 20
+MAX_DRIFT = 2.0
+
+# constants
+EVENT_APPEARED = 'appeared'
+EVENT_DISAPPEARED = 'disappeared'
+EVENT_CHANGED = 'changed'
+EVENT_DRIFTED = 'drifted'
+
+#
+# This class implements a time series of scans of the same
+# region. The scans are aligned on their common grid, using the
+# azimuth/elevation to grid index mapping of the map, and stacked
+# into a 3-D array indexed [scan, elevation, azimuth]. Grid points
+# a scan didn't measure are NaN. Stacks larger than the memory
+# map size are backed by a temporary file.
+#
+class ScanStack:
+
+	#
+	# Constructor
+	#
+	# @param memmap_dir the directory of the memory mapped stack, or None for the temporary directory
+	#
+	def __init__(self, memmap_dir=None):
+
+		# set parameters
+		self.MEMMAP_DIR = memmap_dir
+
+		# initialize grid
+		self.AZIMUTH_START = None
+		self.AZIMUTH_END = None
+		self.ELEVATION_START = None
+		self.ELEVATION_END = None
+		self.STEP_ANGLE = None
+
+		# initialize stack
+		self.names = []
+		self.stack = None
+	#
+
+	#
+	# Loads the specified scan data files
+	#
+	# The common grid is the intersection of the grids of the
+	# scans at the coarsest step angle. Data points outside the
+	# common grid are ignored. The scans are read again to fill the
+	# stack one at a time, such that only one scan is held in
+	# memory.
+	#
+	# @param scan_files the ordered list of scan data file paths
+	#
+	# @return true if successful, false otherwise
+	#
+	def load(self, scan_files):
+
+		# initialize status
+		status = False
+
+		# determine grids
+		grids = []
+		for scan_file in scan_files:
+
+			# read scan data
+			valid, scan_data = read_scan_data(scan_file)
+			grid = infer_grid(scan_data) if valid == True else None
+
+			# determine if valid scan data
+			if grid != None and grid[4] != None:
+
+				# append grid
+				grids.append((scan_file, grid))
+
+			else:
+
+				# debug
+				print(f'WARNING: Invalid scan data file ignored: {scan_file}')
+			#
+		#
+
+		# determine if any valid scans
+		if len(grids) > 0:
+
+			# determine the common grid
+			self.AZIMUTH_START = max(grid[0] for scan_file, grid in grids)
+			self.AZIMUTH_END = min(grid[1] for scan_file, grid in grids)
+			self.ELEVATION_START = max(grid[2] for scan_file, grid in grids)
+			self.ELEVATION_END = min(grid[3] for scan_file, grid in grids)
+			self.STEP_ANGLE = max(grid[4] for scan_file, grid in grids)
+
+			# determine if the grids overlap
+			if self.AZIMUTH_START <= self.AZIMUTH_END and self.ELEVATION_START <= self.ELEVATION_END:
+
+				# initialize stack
+				height, width = grid_shape(self.AZIMUTH_START, self.AZIMUTH_END, self.ELEVATION_START, self.ELEVATION_END, self.STEP_ANGLE)
+				self.stack = self.allocate((len(grids), height, width))
+				self.names = [os.path.splitext(os.path.basename(scan_file))[0] for scan_file, grid in grids]
+
+				# loop through scans
+				for index, (scan_file, grid) in enumerate(grids):
+
+					# read scan data
+					valid, scan_data = read_scan_data(scan_file)
+
+					# set scan data
+					layer = np.full((height, width), np.nan, dtype=np.float32)
+					scatter(layer, scan_data['azimuth'], scan_data['elevation'], scan_data['rssi'], scan_data['step'], self.AZIMUTH_START, self.ELEVATION_END, self.STEP_ANGLE)
+					self.stack[index] = layer
+				#
+
+				# update status to indicate successful
+				status = True
+
+			else:
+
+				# debug
+				print('ERROR: The scans have no region in common')
+			#
+		#
+
+		# return the status
+		return status
+	#
+
+	#
+	# Allocates the stack
+	#
+	# @param shape the stack shape
+	#
+	# @return the stack array
+	#
+	def allocate(self, shape):
+
+		# determine if memory mapped
+		if np.prod(shape) * np.dtype(np.float32).itemsize > MEMMAP_SIZE:
+
+			# map a temporary file, which is removed once the stack is released
+			file = tempfile.TemporaryFile(dir=self.MEMMAP_DIR)
+			stack = np.memmap(file, dtype=np.float32, mode='w+', shape=shape)
+
+		else:
+
+			# allocate in memory
+			stack = np.empty(shape, dtype=np.float32)
+		#
+
+		# return the stack
+		return stack
+	#
+
+	#
+	# Determines the statistics of each grid point
+	#
+	# The stack is processed in blocks of rows, such that memory
+	# mapped stacks are never loaded at once.
+	#
+	# @return the mean RSSI of each grid point
+	# @return the RSSI standard deviation of each grid point
+	# @return the number of scans which measured each grid point
+	#
+	def statistics(self):
+
+		# initialize statistics
+		num_scans, height, width = self.stack.shape
+		mean = np.full((height, width), np.nan, dtype=np.float32)
+		std = np.full((height, width), np.nan, dtype=np.float32)
+		count = np.zeros((height, width), dtype=np.int64)
+
+		# loop through blocks of rows
+		for start, end in self.blocks():
+
+			# obtain block
+			block = np.asarray(self.stack[:, start:end])
+			measured = np.isnan(block) == False
+
+			# determine block statistics
+			count[start:end] = measured.sum(axis=0)
+			with np.errstate(invalid='ignore', divide='ignore'):
+				total = np.where(measured, block, 0).sum(axis=0, dtype=np.float64)
+				mean[start:end] = total / count[start:end]
+				squares = np.where(measured, (block - mean[start:end]) ** 2, 0).sum(axis=0, dtype=np.float64)
+				std[start:end] = np.sqrt(squares / count[start:end])
+			#
+		#
+
+		# return the statistics
+		return mean, std, count
+	#
+
+	#
+	# Determines the change from the previous scan
+	#
+	# @param index the scan index, greater than zero
+	#
+	# @return the RSSI delta of each grid point, NaN unless measured by both scans
+	#
+	def delta(self, index):
+		return np.asarray(self.stack[index]) - np.asarray(self.stack[index-1])
+	#
+
+	#
+	# Determines the grid points which changed from the previous scan
+	#
+	# A grid point changed if its RSSI differs by at least the
+	# change threshold. A changed grid point appeared if it crossed
+	# the hot threshold upwards and disappeared if it crossed it
+	# downwards.
+	#
+	# @param index the scan index, greater than zero
+	# @param change_threshold the RSSI change threshold
+	# @param hot_threshold the hot RSSI threshold
+	#
+	# @return the dictionary of changed grid point arrays (azimuth, elevation, previous, current, delta, event)
+	#
+	def changed_points(self, index, change_threshold=CHANGE_THRESHOLD, hot_threshold=HOT_THRESHOLD):
+
+		# obtain scans
+		previous = np.asarray(self.stack[index-1])
+		current = np.asarray(self.stack[index])
+
+		# determine changed grid points
+		with np.errstate(invalid='ignore'):
+			y_pos, x_pos = np.nonzero(np.abs(current - previous) >= change_threshold)
+		#
+		azimuths, elevations = grid_angles(x_pos, y_pos, self.AZIMUTH_START, self.ELEVATION_END, self.STEP_ANGLE)
+
+		# determine events
+		events = np.full(len(y_pos), EVENT_CHANGED, dtype=object)
+		events[(previous[y_pos, x_pos] < hot_threshold) & (current[y_pos, x_pos] >= hot_threshold)] = EVENT_APPEARED
+		events[(previous[y_pos, x_pos] >= hot_threshold) & (current[y_pos, x_pos] < hot_threshold)] = EVENT_DISAPPEARED
+
+		# return the changed grid points
+		return {	'azimuth': azimuths,
+					'elevation': elevations,
+					'previous': previous[y_pos, x_pos],
+					'current': current[y_pos, x_pos],
+					'delta': current[y_pos, x_pos] - previous[y_pos, x_pos],
+					'event': events }
+	#
+
+	#
+	# Determines the satellite events from the previous scan
+	#
+	# The satellites of each scan are the hot local maxima of the
+	# scan. Each satellite is matched with the nearest satellite
+	# of the previous scan within the maximum drift. Matched
+	# satellites which moved have drifted, and unmatched satellites
+	# have appeared or disappeared.
+	#
+	# @param index the scan index, greater than zero
+	# @param hot_threshold the hot RSSI threshold
+	# @param max_drift the maximum drift in degrees
+	#
+	# @return the list of events (event, azimuth, elevation, previous azimuth, previous elevation, drift)
+	#
+	def satellite_events(self, index, hot_threshold=HOT_THRESHOLD, max_drift=MAX_DRIFT):
+
+		# determine the satellite angles
+		previous = np.column_stack(grid_angles(*find_peaks(np.asarray(self.stack[index-1]), hot_threshold)[::-1], self.AZIMUTH_START, self.ELEVATION_END, self.STEP_ANGLE))
+		current = np.column_stack(grid_angles(*find_peaks(np.asarray(self.stack[index]), hot_threshold)[::-1], self.AZIMUTH_START, self.ELEVATION_END, self.STEP_ANGLE))
+
+		# determine the distance between every pair of satellites
+		distances = np.sqrt(((current[:, None, :] - previous[None, :, :]) ** 2).sum(axis=2))
+
+		# determine the nearest previous satellite of each satellite
+		if distances.size > 0:
+			nearest = distances.argmin(axis=1)
+			drifts = distances[np.arange(len(current)), nearest]
+		else:
+			nearest = np.zeros(len(current), dtype=np.int64)
+			drifts = np.full(len(current), np.inf)
+		#
+
+		# determine the matched satellites
+		matched = drifts <= max_drift
+		previous_matched = np.zeros(len(previous), dtype=bool)
+		previous_matched[nearest[matched]] = True
+
+		# initialize events
+		events = []
+
+		# append drifted satellites
+		for satellite, match, drift in zip(current[matched & (drifts > 0)], nearest[matched & (drifts > 0)], drifts[matched & (drifts > 0)]):
+			events.append((EVENT_DRIFTED, satellite[0], satellite[1], previous[match][0], previous[match][1], drift))
+		#
+
+		# append appeared satellites
+		for satellite in current[matched == False]:
+			events.append((EVENT_APPEARED, satellite[0], satellite[1], None, None, None))
+		#
+
+		# append disappeared satellites
+		for satellite in previous[previous_matched == False]:
+			events.append((EVENT_DISAPPEARED, None, None, satellite[0], satellite[1], None))
+		#
+
+		# return the events
+		return events
+	#
+
+	#
+	# Determines the blocks of rows of the stack
+	#
+	# @return the list of (start, end) rows
+	#
+	def blocks(self):
+
+		# determine the number of rows per block
+		num_scans, height, width = self.stack.shape
+		num_rows = max(CHUNK_SIZE // max(num_scans * width * self.stack.itemsize, 1), 1)
+
+		# return the blocks
+		return [(start, min(start + num_rows, height)) for start in range(0, height, num_rows)]
+	#
+#
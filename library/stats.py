@@ -0,0 +1,293 @@
+
+# imports
+import sys
+import json
+import time
+import bisect
+import signal
+
+# constants
+HISTOGRAM_START = 1e-5
+HISTOGRAM_GROWTH = 2 ** 0.25
+HISTOGRAM_BUCKETS = 96
+PERCENTILES = (50, 90, 99)
+
+# constants
+STATS_SIGNAL = 'SIGUSR1'
+
+# constants
+PHASE_SETTLE = 'settle'
+PHASE_MAP = 'map'
+PHASE_IO = 'io'
+PHASE_IDENTIFY = 'identify'
+
+# constants
+LATENCY_BOUNDS = [HISTOGRAM_START * HISTOGRAM_GROWTH ** index for index in range(HISTOGRAM_BUCKETS)]
+
+#
+# This class implements a latency histogram with logarithmic
+# buckets, such that recording a latency is a single bisection
+# and an increment regardless of the number of latencies
+# recorded. Each bucket spans about 19% of its lower bound,
+# from 10 microseconds up to several minutes.
+#
+class LatencyHistogram:
+
+	#
+	# Constructor
+	#
+	def __init__(self):
+
+		# initialize buckets, with a final bucket for latencies beyond the bounds
+		self.counts = [0] * (HISTOGRAM_BUCKETS + 1)
+
+		# initialize totals
+		self.count = 0
+		self.total = 0.0
+		self.min = None
+		self.max = None
+	#
+
+	#
+	# Records the supplied latency
+	#
+	# @param latency the latency in seconds
+	#
+	def record(self, latency):
+
+		# update bucket
+		self.counts[bisect.bisect_left(LATENCY_BOUNDS, latency)] += 1
+
+		# update totals
+		self.count += 1
+		self.total += latency
+		self.min = latency if self.min == None or latency < self.min else self.min
+		self.max = latency if self.max == None or latency > self.max else self.max
+	#
+
+	#
+	# Determines the supplied percentile
+	#
+	# The percentile is the upper bound of the bucket which
+	# contains it, limited to the maximum latency.
+	#
+	# @param percentile the percentile [0-100]
+	#
+	# @return the percentile latency in seconds, or None if no latencies are recorded
+	#
+	def percentile(self, percentile):
+
+		# determine if any latencies recorded
+		if self.count == 0:
+			return None
+		#
+
+		# determine the rank of the percentile
+		rank = percentile / 100 * self.count
+
+		# loop through buckets
+		cumulative = 0
+		for index, count in enumerate(self.counts):
+
+			# determine if the bucket contains the rank
+			cumulative += count
+			if cumulative >= rank and count > 0:
+				return min(LATENCY_BOUNDS[index] if index < HISTOGRAM_BUCKETS else self.max, self.max)
+			#
+		#
+
+		# return the maximum
+		return self.max
+	#
+
+	#
+	# Summarizes the histogram
+	#
+	# @return the summary dictionary (count, mean, min, max, percentiles and non-empty buckets)
+	#
+	def summary(self):
+		return {	'count': self.count,
+					'mean': self.total / self.count if self.count > 0 else None,
+					'min': self.min,
+					'max': self.max,
+					**{f'p{percentile}': self.percentile(percentile) for percentile in PERCENTILES},
+					'buckets': {f'{LATENCY_BOUNDS[index]:.3g}' if index < HISTOGRAM_BUCKETS else 'inf': count for index, count in enumerate(self.counts) if count > 0} }
+	#
+#
+
+#
+# This class implements the instrumentation of the Winegard
+# drivers. The latency, bytes written and read, timeouts and
+# retries of each command type are recorded, along with the time
+# spent in other phases of a scan (eg: waiting for the motors to
+# settle or rendering the map). A retry is a command sent again
+# after it failed.
+#
+# Instrumentation is opt-in. The drivers only record commands
+# when they have been supplied an instance of this class, such
+# that the cost of disabled instrumentation is one comparison
+# per command.
+#
+class CommandStats:
+
+	#
+	# Constructor
+	#
+	def __init__(self):
+
+		# initialize statistics
+		self.commands = {}
+		self.phases = {}
+		self.failed_command = None
+
+		# determine start time
+		self.start_time = time.monotonic()
+	#
+
+	#
+	# Records the supplied command
+	#
+	# @param cmd_string the command string
+	# @param latency the time from writing the command to receiving its response in seconds
+	# @param bytes_written the number of bytes written
+	# @param bytes_read the number of bytes read
+	# @param status the command status, false if the response timed out
+	#
+	def record(self, cmd_string, latency, bytes_written, bytes_read, status):
+
+		# obtain the command statistics
+		command_type = command_name(cmd_string)
+		command_data = self.commands.get(command_type)
+		if command_data == None:
+			command_data = self.commands[command_type] = {'latency': LatencyHistogram(), 'bytes_written': 0, 'bytes_read': 0, 'timeouts': 0, 'retries': 0}
+		#
+
+		# update command statistics
+		command_data['latency'].record(latency)
+		command_data['bytes_written'] += bytes_written
+		command_data['bytes_read'] += bytes_read
+
+		# determine if the failed command was sent again
+		if cmd_string == self.failed_command:
+			command_data['retries'] += 1
+		#
+
+		# determine if timeout occurred
+		if status == False:
+			command_data['timeouts'] += 1
+		#
+
+		# update the failed command
+		self.failed_command = cmd_string if status == False else None
+	#
+
+	#
+	# Records the time spent in the supplied phase
+	#
+	# @param phase the phase name
+	# @param elapsed_time the elapsed time in seconds
+	#
+	def record_phase(self, phase, elapsed_time):
+
+		# obtain the phase histogram
+		histogram = self.phases.get(phase)
+		if histogram == None:
+			histogram = self.phases[phase] = LatencyHistogram()
+		#
+
+		# update phase histogram
+		histogram.record(elapsed_time)
+	#
+
+	#
+	# Summarizes the statistics
+	#
+	# @return the summary dictionary, which can be encoded as JSON
+	#
+	def summary(self):
+		return {	'elapsed_time': time.monotonic() - self.start_time,
+					'commands': {command_type: {**command_data, 'latency': command_data['latency'].summary(), 'total_time': command_data['latency'].total} for command_type, command_data in sorted(self.commands.items())},
+					'phases': {phase: {**histogram.summary(), 'total_time': histogram.total} for phase, histogram in sorted(self.phases.items())} }
+	#
+
+	#
+	# Writes the statistics to the specified JSON file
+	#
+	# @param file_path the file path
+	#
+	def dump(self, file_path):
+
+		# open output file
+		with open(file_path, 'w') as json_file:
+
+			# write summary
+			json.dump(self.summary(), json_file, indent='\t')
+		#
+	#
+
+	#
+	# Prints the statistics
+	#
+	# The total time, count and median latency of each command
+	# type and phase are printed, such that the dominant costs
+	# of a scan are apparent.
+	#
+	def print_summary(self):
+
+		# obtain summary
+		summary = self.summary()
+
+		# loop through commands and phases
+		for kind, entries in (('command', summary['commands']), ('phase', summary['phases'])):
+			for name, entry in entries.items():
+
+				# obtain latency summary
+				latency = entry['latency'] if kind == 'command' else entry
+
+				# debug
+				print(f'INFO: {kind} {name!r}: {latency["count"]} in {entry["total_time"]:.3f} seconds, median {latency["p50"] * 1000:.2f} ms' + (f', {entry["timeouts"]} timeouts, {entry["retries"]} retries' if kind == 'command' else ''))
+			#
+		#
+	#
+
+	#
+	# Installs a signal handler which prints the statistics
+	#
+	# The statistics are printed as JSON whenever the process
+	# receives the stats signal (eg: kill -USR1 <pid>), such that
+	# a running scan can be inspected. Platforms without the
+	# signal are ignored.
+	#
+	# @return true if installed, false otherwise
+	#
+	def install_signal_handler(self):
+
+		# determine if the signal is supported
+		if hasattr(signal, STATS_SIGNAL) == False:
+			return False
+		#
+
+		# install handler
+		signal.signal(getattr(signal, STATS_SIGNAL), lambda signum, frame: print(json.dumps(self.summary()), file=sys.stderr, flush=True))
+
+		# return the status
+		return True
+	#
+#
+
+# HELPER
+
+#
+# Determines the name of a command type
+#
+# The name is the command and its first argument, such that
+# commands which differ by motor (eg: 'a 0' and 'a 1') or by
+# RSSI iterations are recorded separately.
+#
+# @param cmd_string the command string
+#
+# @return the command type name
+#
+def command_name(cmd_string):
+	return ' '.join(cmd_string.split()[:2])
+#
@@ -0,0 +1,194 @@
+
+# imports
+import time
+import numpy as np
+
+# imports
+from library.settle import distance
+from library.stats import PHASE_SETTLE
+from library.integration import RSSI_INVALID
+
+# constants
+READS_PER_POLL = 2
+SWEEP_RSSI_ITERATIONS = 1
+SWEEP_TOLERANCE = 0.1
+SWEEP_TIMEOUT = 60.0
+
+#
+# This class implements the on-the-fly (continuous slew) scan
+# of a single line. The dish is commanded to the end of the
+# line and RSSI readings are streamed while the motors move.
+# The readings are interleaved with motor angle polls, and the
+# position of each reading is interpolated in time between the
+# polls. The readings are then binned onto the points of the
+# line, trading some smearing along the line for not stopping
+# at each point.
+#
+class SweepScanner:
+
+	#
+	# Constructor
+	#
+	# @param winegard the winegard
+	# @param settle the settle detector
+	# @param reads_per_poll the number of RSSI readings between position polls
+	# @param iterations the number of iterations of each RSSI reading
+	#
+	def __init__(self, winegard, settle, reads_per_poll=READS_PER_POLL, iterations=SWEEP_RSSI_ITERATIONS):
+
+		# set parameters
+		self.winegard = winegard
+		self.settle = settle
+		self.READS_PER_POLL = reads_per_poll
+		self.ITERATIONS = iterations
+	#
+
+	#
+	# Sweeps the supplied line
+	#
+	# @param points the ordered list of (azimuth, elevation) points of the line
+	#
+	# @return the list of binned (rssi, num_readings) values for each point
+	# @return the number of readings
+	#
+	def sweep(self, points):
+
+		# move to line start
+		start = points[0]
+		end = points[-1]
+		status, settle_data = self.settle.move(start[0], start[1])
+
+		# initialize values, which are retried once the scan is complete unless positioned
+		values = [(RSSI_INVALID, 0)] * len(points)
+		readings = []
+
+		# determine if positioned
+		if status == True:
+
+			# wait for the motors to settle
+			time.sleep(settle_data['wait_time'])
+
+			# determine if instrumentation enabled
+			if self.winegard.stats != None:
+
+				# record settle time
+				self.winegard.stats.record_phase(PHASE_SETTLE, settle_data['wait_time'])
+			#
+
+			# obtain a reading at the line start, such that the first point is measured before the motors move
+			status, stream_readings = self.winegard.stream_dvb_rssi_data(1, self.ITERATIONS)
+			readings.extend(stream_readings)
+
+			# initialize position polls with the line start
+			polls = [(time.monotonic(), start[0], start[1])]
+
+			# move to line end
+			self.winegard.move_motors(end[0], end[1])
+
+			# initialize state
+			moving = True
+			start_time = time.monotonic()
+
+			# stream readings until the line end is reached
+			while moving == True and time.monotonic() - start_time < SWEEP_TIMEOUT:
+
+				# obtain RSSI readings
+				status, stream_readings = self.winegard.stream_dvb_rssi_data(self.READS_PER_POLL, self.ITERATIONS)
+				readings.extend(stream_readings)
+
+				# obtain the winegard angles
+				poll_start_time = time.monotonic()
+				status, data = self.winegard.get_motor_angle_data()
+				poll_end_time = time.monotonic()
+
+				# determine if valid angle data
+				if status == True:
+
+					# obtain the angle data
+					azimuth = data['azimuth_angle']
+					elevation = data['elevation_angle']
+
+					# append position poll
+					polls.append(((poll_start_time + poll_end_time) / 2, azimuth, elevation))
+
+					# determine if line end reached
+					moving = max(distance(end[0], azimuth), distance(end[1], elevation)) > SWEEP_TOLERANCE
+				#
+			#
+
+			# determine if line end reached
+			if moving == False:
+
+				# obtain readings at the line end, which are positioned at the last poll, such that the last point is measured
+				status, stream_readings = self.winegard.stream_dvb_rssi_data(self.READS_PER_POLL, self.ITERATIONS)
+				readings.extend(stream_readings)
+			#
+
+			# bin readings onto the line points
+			values = bin_line(points, polls, readings)
+		#
+
+		# return the binned values and number of readings
+		return values, len(readings)
+	#
+#
+
+# HELPER
+
+#
+# Bins the readings of a line onto its points
+#
+# The position of each reading is interpolated in time between
+# the position polls and each reading is assigned to the
+# nearest line point. Points without readings are filled by
+# interpolating along the line between the neighboring binned
+# points, or from the nearest binned point at the ends of the
+# line, and are reported with zero readings.
+#
+# @param points the ordered list of (azimuth, elevation) points of the line
+# @param polls the list of (timestamp, azimuth, elevation) position polls
+# @param readings the list of (timestamp, rssi) readings
+#
+# @return the list of (rssi, num_readings) values for each point, where the rssi is -1 if unknown
+#
+def bin_line(points, polls, readings):
+
+	# initialize values
+	values = [(-1, 0)] * len(points)
+
+	# determine if valid readings
+	if len(readings) > 0:
+
+		# obtain arrays
+		poll_array = np.array(polls, dtype=float)
+		reading_array = np.array(readings, dtype=float)
+		point_array = np.array(points, dtype=float)
+
+		# determine the line axis
+		axis = 0 if point_array[0, 0] != point_array[-1, 0] else 1
+
+		# interpolate the reading positions along the line axis
+		positions = np.interp(reading_array[:, 0], poll_array[:, 0], poll_array[:, axis+1])
+
+		# determine the nearest point index of each reading
+		indexes = np.rint((positions - point_array[0, axis]) / (point_array[-1, axis] - point_array[0, axis] or 1) * (len(points) - 1)).astype(int)
+		valid = (indexes >= 0) & (indexes < len(points))
+
+		# determine per-point sums and counts
+		counts = np.bincount(indexes[valid], minlength=len(points))
+		sums = np.bincount(indexes[valid], weights=reading_array[valid, 1], minlength=len(points))
+
+		# determine binned points
+		binned = np.flatnonzero(counts > 0)
+		means = sums[binned] / counts[binned]
+
+		# fill points without readings from the neighboring binned points
+		filled = np.interp(np.arange(len(points)), binned, means)
+
+		# set values
+		values = [(int(round(rssi)) if rssi > 0 else -1, int(count)) for rssi, count in zip(filled, counts)]
+	#
+
+	# return the values
+	return values
+#
@@ -0,0 +1,339 @@
+
+# imports
+import json
+import time
+from collections import deque
+
+# imports
+from library.stats import PHASE_SETTLE
+
+# constants
+REPORT_INTERVAL = 10.0
+RATE_WINDOW = 60.0
+
+# constants
+TIMING_MOVE = 'move'
+TIMING_SETTLE = PHASE_SETTLE
+TIMING_MENU = 'menu'
+TIMING_RSSI = 'rssi'
+TIMING_OTHER = 'other'
+
+# constants
+MENU_COMMANDS = ('q', 'mot', 'dvb')
+MOVE_COMMANDS = ('a', 'h')
+RSSI_COMMANDS = ('rssi',)
+
+#
+# This class implements the timing report of a scan. The wall
+# time of the scan is split into phases using the command
+# statistics: motor commands are moves, motor angle queries and
+# settle waits are settling, menu changes are menu switching and
+# RSSI commands are RSSI acquisition. The other recorded phases
+# (eg: map rendering and file I/O) are reported by name, and the
+# remainder of the wall time is reported as other.
+#
+# The measured points/sec rate over the recent rate window and
+# the remaining points of the plan determine the ETA, which is
+# reported periodically as the scan progresses.
+#
+# The phases require instrumentation, so without command
+# statistics only the rate, ETA and wall time are reported.
+#
+class ScanTimer:
+
+	#
+	# Constructor
+	#
+	# @param stats the command statistics, or None to report without phases
+	# @param report_interval the progress report interval in seconds
+	#
+	def __init__(self, stats, report_interval=REPORT_INTERVAL):
+
+		# set parameters
+		self.stats = stats
+		self.REPORT_INTERVAL = report_interval
+
+		# initialize state
+		self.start_time = None
+		self.baseline = {}
+		self.num_planned = 0
+		self.num_done = 0
+		self.history = deque()
+		self.report_time = None
+	#
+
+	#
+	# Starts timing the scan
+	#
+	# The statistics recorded before the scan starts (eg: during
+	# setup) are excluded from the report.
+	#
+	# @param num_points the number of points planned
+	#
+	def start(self, num_points):
+
+		# determine start time
+		self.start_time = time.monotonic()
+		self.report_time = self.start_time
+
+		# record the baseline phase times
+		self.baseline = self.phase_totals() if self.stats != None else {}
+
+		# initialize progress
+		self.num_planned = num_points
+		self.num_done = 0
+		self.history = deque([(self.start_time, 0)])
+	#
+
+	#
+	# Adds the supplied points to the plan
+	#
+	# @param num_points the number of points planned
+	#
+	def plan(self, num_points):
+		self.num_planned += num_points
+	#
+
+	#
+	# Updates the progress of the scan
+	#
+	# @param num_points the number of points completed
+	#
+	def update(self, num_points=1):
+
+		# determine if started
+		if self.start_time == None:
+			return
+		#
+
+		# update progress
+		now = time.monotonic()
+		self.num_done += num_points
+		self.history.append((now, self.num_done))
+
+		# discard progress older than the rate window, keeping the oldest point of the window
+		while len(self.history) > 2 and now - self.history[1][0] >= RATE_WINDOW:
+			self.history.popleft()
+		#
+
+		# determine if a report is due
+		if now - self.report_time >= self.REPORT_INTERVAL:
+
+			# debug
+			self.print_progress()
+
+			# update report time
+			self.report_time = now
+		#
+	#
+
+	#
+	# Determines the recent points/sec rate
+	#
+	# @return the rate, or None if not measured
+	#
+	def rate(self):
+
+		# determine the rate window
+		(start_time, start_done), (end_time, end_done) = self.history[0], self.history[-1]
+
+		# return the rate
+		return (end_done - start_done) / (end_time - start_time) if end_time > start_time and end_done > start_done else None
+	#
+
+	#
+	# Determines the estimated time remaining
+	#
+	# @return the time remaining in seconds, or None if not measured
+	#
+	def eta(self):
+
+		# determine rate
+		rate = self.rate()
+
+		# return the time remaining
+		return max(self.num_planned - self.num_done, 0) / rate if rate != None else None
+	#
+
+	#
+	# Determines the total time of each phase
+	#
+	# @return the dictionary of phase times in seconds
+	#
+	def phase_totals(self):
+
+		# initialize totals
+		totals = {TIMING_MOVE: 0.0, TIMING_SETTLE: 0.0, TIMING_MENU: 0.0, TIMING_RSSI: 0.0}
+
+		# loop through command types
+		for command_type, command_data in self.stats.commands.items():
+
+			# determine command phase
+			phase = command_phase(command_type)
+			totals[phase] = totals.get(phase, 0.0) + command_data['latency'].total
+		#
+
+		# loop through recorded phases
+		for phase, histogram in self.stats.phases.items():
+			totals[phase] = totals.get(phase, 0.0) + histogram.total
+		#
+
+		# return the totals
+		return totals
+	#
+
+	#
+	# Determines the wall time since the scan started
+	#
+	# @return the wall time in seconds
+	#
+	def wall_time(self):
+		return time.monotonic() - self.start_time if self.start_time != None else 0.0
+	#
+
+	#
+	# Determines the time of each phase since the scan started
+	#
+	# @return the dictionary of phase times in seconds, including the other time, or None without command statistics
+	#
+	def breakdown(self):
+
+		# determine if instrumentation enabled
+		if self.stats == None:
+			return None
+		#
+
+		# determine phase times, excluding the other commands which are part of the other time
+		totals = self.phase_totals()
+		phases = {phase: total - self.baseline.get(phase, 0.0) for phase, total in totals.items() if phase != TIMING_OTHER}
+
+		# determine the other time
+		phases[TIMING_OTHER] = max(self.wall_time() - sum(phases.values()), 0.0)
+
+		# return the phase times
+		return phases
+	#
+
+	#
+	# Prints the progress of the scan
+	#
+	def print_progress(self):
+
+		# determine progress
+		rate = self.rate()
+		eta = self.eta()
+		phases = self.breakdown()
+		wall_time = max(self.wall_time(), 1e-9)
+
+		# debug
+		print(f'INFO: Progress: {self.num_done}/{self.num_planned} points, ' + (f'{rate:.2f} points/sec, ETA {format_duration(eta)}' if rate != None else 'rate unknown') + (', ' + ', '.join(f'{phase} {elapsed / wall_time:.0%}' for phase, elapsed in phases.items()) if phases != None else ''))
+	#
+
+	#
+	# Summarizes the timing of the scan
+	#
+	# @param config the scan configuration dictionary
+	#
+	# @return the summary dictionary, which can be encoded as JSON
+	#
+	def summary(self, config):
+
+		# determine phase times
+		phases = self.breakdown()
+		wall_time = sum(phases.values()) if phases != None else self.wall_time()
+
+		# return the summary
+		return {	'config': config,
+					'wall_time': wall_time,
+					'points': self.num_done,
+					'planned_points': self.num_planned,
+					'points_per_sec': self.num_done / wall_time if wall_time > 0 else None,
+					'phases': {phase: {'time': elapsed, 'fraction': elapsed / wall_time if wall_time > 0 else None} for phase, elapsed in phases.items()} if phases != None else None }
+	#
+
+	#
+	# Prints the timing of the scan
+	#
+	def print_summary(self):
+
+		# obtain summary
+		summary = self.summary({})
+
+		# debug
+		print(f'INFO: Scanned {summary["points"]} points in {format_duration(summary["wall_time"])}' + (f' ({summary["points_per_sec"]:.2f} points/sec)' if summary['points_per_sec'] != None else ''))
+
+		# loop through phases, if instrumentation enabled
+		for phase, phase_data in (summary['phases'] or {}).items():
+
+			# debug
+			print(f'INFO:   {phase:<10} {phase_data["time"]:10.2f} s {phase_data["fraction"] or 0:7.1%}')
+		#
+	#
+
+	#
+	# Writes the timing summary to the specified JSON file
+	#
+	# @param file_path the file path
+	# @param config the scan configuration dictionary
+	#
+	def write(self, file_path, config):
+
+		# open output file
+		with open(file_path, 'w') as json_file:
+
+			# write summary
+			json.dump(self.summary(config), json_file, indent='\t')
+		#
+	#
+#
+
+# HELPER
+
+#
+# Determines the timing phase of a command type
+#
+# @param command_type the command type name (eg: 'a 0')
+#
+# @return the timing phase
+#
+def command_phase(command_type):
+
+	# obtain the command and whether it has arguments
+	values = command_type.split()
+	command = values[0] if len(values) > 0 else ''
+
+	# determine the phase
+	if command in MENU_COMMANDS:
+		return TIMING_MENU
+	elif command in RSSI_COMMANDS:
+		return TIMING_RSSI
+	elif command in MOVE_COMMANDS and len(values) > 1:
+		return TIMING_MOVE
+	elif command in MOVE_COMMANDS:
+		return TIMING_SETTLE
+	else:
+		return TIMING_OTHER
+	#
+#
+
+#
+# Formats the supplied duration
+#
+# @param duration the duration in seconds, or None
+#
+# @return the duration string (H:MM:SS)
+#
+def format_duration(duration):
+
+	# determine if unknown
+	if duration == None:
+		return 'unknown'
+	#
+
+	# determine hours/minutes/seconds
+	minutes, seconds = divmod(int(round(duration)), 60)
+	hours, minutes = divmod(minutes, 60)
+
+	# return the duration string
+	return f'{hours}:{minutes:02d}:{seconds:02d}'
+#
@@ -2,14 +2,19 @@
 # imports
 import serial
 import time
-import re
+
+# imports
+from library.protocol import ResponseReader
+from library.protocol import parse_angle_data
+from library.protocol import parse_rssi_data
+from library.stats import PHASE_SETTLE
 
 # constants
 SERIAL_BAUD = 115200
 SERIAL_TIMEOUT = 15
 
 # constants
-END_CHARACTER = 62 # '>'
+COMMAND_DELAY = 0.001
 
 # constants
 AZIMUTH_MOTOR_INDEX = 0
@@ -21,12 +26,22 @@ LNA_MODE_ODU = 'odu'
 # constants
 RSSI_ITERATIONS = 10
 
+# constants
+MENU_UNKNOWN = None
+MENU_MAIN = 'main'
+MENU_MOTOR = 'mot'
+MENU_DVB = 'dvb'
+
 #
 # This class provides the ability to connect to a Winegard
 # satellite dish to enable the LNA, position the dish to the
 # specified azimuth/elevation position, and capture the RSSI
 # signal strength.
 #
+# The firmware menu the dish is currently in is tracked such
+# that each command enters the menu it requires only when the
+# dish is in a different menu.
+#
 class Winegard:
 
 	#
@@ -35,10 +50,25 @@ class Winegard:
 	# @param serial_port the Winegard serial port
 	#
 	def __init__(self, serial_port):
-		
+
 		# set parameters
 		self.SERIAL_PORT = serial_port
 		self.OFFSET_ANGLE = 0
+		self.PIPELINE_MENU = False
+
+		# initialize serial
+		self.ser = None
+
+		# initialize response reader
+		self.reader = ResponseReader()
+
+		# initialize state
+		self.menu = MENU_UNKNOWN
+		self.azimuth_target = None
+		self.elevation_target = None
+
+		# initialize instrumentation
+		self.stats = None
 	#
 
 	#
@@ -52,6 +82,35 @@ class Winegard:
 		self.OFFSET_ANGLE = offset_angle
 	#
 
+	#
+	# Sets the menu pipelining state
+	#
+	# When enabled, the quit and enter commands of a menu change
+	# are written together and their responses are read back in
+	# a single serial round trip.
+	#
+	# @param pipeline_menu the menu pipelining state
+	#
+	def set_menu_pipelining(self, pipeline_menu):
+
+		# set parameters
+		self.PIPELINE_MENU = pipeline_menu
+	#
+
+	#
+	# Enables instrumentation
+	#
+	# Every command sent is recorded in the supplied statistics,
+	# along with the time spent waiting for the motors to settle.
+	#
+	# @param stats the command statistics
+	#
+	def enable_stats(self, stats):
+
+		# set parameters
+		self.stats = stats
+	#
+
 	# CONNECTION
 
 	#
@@ -70,6 +129,12 @@ class Winegard:
 		# open serial port
 		self.ser = serial.Serial(port=self.SERIAL_PORT, baudrate=SERIAL_BAUD, timeout=SERIAL_TIMEOUT)
 
+		# discard any previously buffered data
+		self.reader.reset()
+
+		# the current menu is unknown until the first menu change
+		self.menu = MENU_UNKNOWN
+
 		# determine if valid serial
 		if self.ser != None:
 
@@ -124,37 +189,94 @@ class Winegard:
 		# send command
 		cmd_status, cmd_response = self.send(command)
 
+		# update the current menu
+		self.update_menu(cmd_status, MENU_MAIN)
+
 		# return the status
 		return cmd_status
 	#
 
-	# MOTOR MENU
-
 	#
-	# Enters the motor menu
+	# Selects the specified menu
+	#
+	# This method enters the specified menu if the dish is not
+	# already in it. The current menu is quit first unless the
+	# dish is known to be on the main menu. When the current
+	# menu is unknown, the quit command is always sent since it
+	# is harmless on the main menu.
 	#
-	# This method attempts to enter the motor menu. This command
-	# is only valid on the main menu.
+	# @param menu the desired menu
 	#
 	# @return true if successful, false otherwise
 	#
-	def enter_motor_menu(self):
+	def select_menu(self, menu):
 
-		# initialize command
-		command = 'mot\r'
+		# initialize status
+		status = True
 
-		# send command
-		cmd_status, cmd_response = self.send(command)
+		# determine if menu change required
+		if self.menu != menu:
+
+			# initialize commands
+			commands = []
+
+			# determine if quit required
+			if self.menu != MENU_MAIN:
+				commands.append('q\r')
+			#
+
+			# determine if enter required
+			if menu != MENU_MAIN:
+				commands.append(f'{menu}\r')
+			#
+
+			# determine pipelining state
+			if self.PIPELINE_MENU == True:
+
+				# send commands together
+				status, responses = self.send_batch(commands)
+
+			else:
+
+				# send commands individually
+				for command in commands:
+
+					# send command
+					cmd_status, cmd_response = self.send(command)
+
+					# update status
+					status = status and cmd_status
+				#
+			#
+
+			# update the current menu
+			self.update_menu(status, menu)
+		#
 
 		# return the status
-		return cmd_status
+		return status
+	#
+
+	# MOTOR MENU
+
+	#
+	# Enters the motor menu
+	#
+	# This method attempts to enter the motor menu. The current
+	# menu is quit first if required.
+	#
+	# @return true if successful, false otherwise
+	#
+	def enter_motor_menu(self):
+		return self.select_menu(MENU_MOTOR)
 	#
 
 	#
 	# Homes the azimuth motor
 	#
 	# This method attempts to home the azimuth motor. This command
-	# is only valid on the motor menu.
+	# is only valid on the motor menu, which is entered if
+	# required.
 	#
 	# @return true if successful, false otherwise
 	#
@@ -164,7 +286,10 @@ class Winegard:
 		command = f'h {AZIMUTH_MOTOR_INDEX}\r'
 
 		# send command
-		cmd_status, cmd_response = self.send(command)
+		cmd_status, cmd_response = self.send_menu_command(MENU_MOTOR, command)
+
+		# the position is no longer the commanded position
+		self.azimuth_target = None
 
 		# return the status
 		return cmd_status
@@ -174,7 +299,8 @@ class Winegard:
 	# Homes the elevation motor
 	#
 	# This method attempts to home the elevation motor. This command
-	# is only valid on the motor menu.
+	# is only valid on the motor menu, which is entered if
+	# required.
 	#
 	# @return true if successful, false otherwise
 	#
@@ -184,7 +310,10 @@ class Winegard:
 		command = f'h {ELEVATION_MOTOR_INDEX}\r'
 
 		# send command
-		cmd_status, cmd_response = self.send(command)
+		cmd_status, cmd_response = self.send_menu_command(MENU_MOTOR, command)
+
+		# the position is no longer the commanded position
+		self.elevation_target = None
 
 		# return the status
 		return cmd_status
@@ -194,7 +323,8 @@ class Winegard:
 	# Determines the motor angle data
 	#
 	# This method attempts to determine the current motor
-	# angles. This command is only valid on the motor menu.
+	# angles. This command is only valid on the motor menu,
+	# which is entered if required.
 	#
 	# @return true if successful, false otherwise
 	# @return the motor angle data if successful
@@ -211,31 +341,13 @@ class Winegard:
 		command = 'a\r'
 
 		# send command
-		cmd_status, cmd_response = self.send(command)
+		cmd_status, cmd_response = self.send_menu_command(MENU_MOTOR, command)
 
 		# determine if valid status
 		if cmd_status == True:
 
 			# parse data from response
-			results = re.findall(r'\d+\.\d+', cmd_response)
-
-			# determine if valid results
-			if len(results) == 2:
-
-				# obtain position data
-				azimuth_angle = float(results[0])
-				elevation_angle = float(results[1])
-
-				# determine adjusted angle
-				azimuth_angle_adjusted = (azimuth_angle - self.OFFSET_ANGLE) % 360
-
-				# set position data values
-				resp_data['azimuth_angle'] = azimuth_angle_adjusted
-				resp_data['elevation_angle'] = elevation_angle
-
-				# update status to indicate successful
-				status = True
-			#
+			status, resp_data = parse_angle_data(cmd_response, self.OFFSET_ANGLE)
 		#
 
 		# return the status and response data
@@ -246,23 +358,26 @@ class Winegard:
 	# Sets the azimuth motor angle
 	#
 	# This method attempts to set the azimuth motor angle. This
-	# command is only valid on the motor menu. The valid azimuth
-	# angles are [0-359].
+	# command is only valid on the motor menu, which is entered
+	# if required. The valid azimuth angles are [0-359].
 	#
 	# @param angle the desired azimuth angle
 	#
 	# @return true if successful, false otherwise
-	# 
+	#
 	def set_azimuth_motor_angle(self, angle):
 
 		# determine adjusted angle
 		angle_adjusted = (angle + self.OFFSET_ANGLE) % 360
-		
+
 		# initialize command
 		command = f'a {AZIMUTH_MOTOR_INDEX} {angle_adjusted}\r'
 
 		# send command
-		cmd_status, cmd_response = self.send(command)
+		cmd_status, cmd_response = self.send_menu_command(MENU_MOTOR, command)
+
+		# update the commanded position
+		self.azimuth_target = angle if cmd_status == True else None
 
 		# return the status
 		return cmd_status
@@ -272,8 +387,8 @@ class Winegard:
 	# Sets the elevation motor angle
 	#
 	# This method attempts to set the elevation motor angle. This
-	# command is only valid on the motor menu. The valid elevation
-	# angles are [18,65].
+	# command is only valid on the motor menu, which is entered
+	# if required. The valid elevation angles are [18,65].
 	#
 	# @param angle the desired elevation angle
 	#
@@ -285,7 +400,10 @@ class Winegard:
 		command = f'a {ELEVATION_MOTOR_INDEX} {angle}\r'
 
 		# send command
-		cmd_status, cmd_response = self.send(command)
+		cmd_status, cmd_response = self.send_menu_command(MENU_MOTOR, command)
+
+		# update the commanded position
+		self.elevation_target = angle if cmd_status == True else None
 
 		# return the status
 		return cmd_status
@@ -300,15 +418,7 @@ class Winegard:
 	# @return true if successful, false otherwise
 	#
 	def quit_motor_menu(self):
-
-		# initialize command
-		command = 'q\r'
-
-		# send command
-		cmd_status, cmd_response = self.send(command)
-
-		# return the status
-		return cmd_status
+		return self.quit_menu()
 	#
 
 	# DVB MENU
@@ -316,30 +426,23 @@ class Winegard:
 	#
 	# Enters the DVB menu
 	#
-	# This method attempts to enter the DVB menu. This command
-	# is only valid on the main menu.
+	# This method attempts to enter the DVB menu. The current
+	# menu is quit first if required.
 	#
 	# @return true if successful, false otherwise
 	#
 	def enter_dvb_menu(self):
-
-		# initialize command
-		command = 'dvb\r'
-
-		# send command
-		cmd_status, cmd_response = self.send(command)
-
-		# return the status
-		return cmd_status
+		return self.select_menu(MENU_DVB)
 	#
 
 	#
 	# Enables the DVB LNA
 	#
 	# This method attempts to enable the LNA in ODU mode. This
-	# command is only valid on the DVB menu.
+	# command is only valid on the DVB menu, which is entered
+	# if required.
 	#
-	# @return true if successful, false otherwise 
+	# @return true if successful, false otherwise
 	#
 	def enable_dvb_lna(self):
 
@@ -347,7 +450,7 @@ class Winegard:
 		command = f'lnbdc {LNA_MODE_ODU}\r'
 
 		# send command
-		cmd_status, cmd_response = self.send(command)
+		cmd_status, cmd_response = self.send_menu_command(MENU_DVB, command)
 
 		# return the status
 		return cmd_status
@@ -358,7 +461,8 @@ class Winegard:
 	#
 	# This method attempts to obtain the RSSI signal strength
 	# by averaging the specified number of samples. This command
-	# is only valid on the DVB menu.
+	# is only valid on the DVB menu, which is entered if
+	# required.
 	#
 	# @param iterations the number of iterations
 	#
@@ -377,25 +481,13 @@ class Winegard:
 		command = f'rssi {iterations}\r'
 
 		# send command
-		cmd_status, cmd_response = self.send(command)
+		cmd_status, cmd_response = self.send_menu_command(MENU_DVB, command)
 
 		# determine if valid status
 		if cmd_status == True:
 
 			# parse data from response
-			results = re.findall(r'\d+', cmd_response)
-
-			# determine if valid results
-			if len(results) == 6:
-
-				# obtain rssi data values
-				resp_data['rssi_reads'] = int(results[3])
-				resp_data['rssi_avg'] = int(results[4])
-				resp_data['rssi_cur'] = int(results[5])
-
-				# update status to indicate successful
-				status = True
-			#
+			status, resp_data = parse_rssi_data(cmd_response)
 		#
 
 		# return the status and response data
@@ -411,25 +503,202 @@ class Winegard:
 	# @return true if successful, false otherwise
 	#
 	def quit_dvb_menu(self):
+		return self.quit_menu()
+	#
 
-		# initialize command
-		command = 'q\r'
+	# BATCHED
 
-		# send command
-		cmd_status, cmd_response = self.send(command)
+	#
+	# Moves to the specified position
+	#
+	# This method positions the motors. Motors which are
+	# already at the commanded angle are not moved again.
+	#
+	# @param azimuth the azimuth angle
+	# @param elevation the elevation angle
+	#
+	# @return true if successful, false otherwise
+	#
+	def move_motors(self, azimuth, elevation):
+
+		# initialize status
+		status1 = True
+		status2 = True
+
+		# determine if azimuth move required
+		if azimuth != self.azimuth_target:
+
+			# position azimuth motor
+			status1 = self.set_azimuth_motor_angle(azimuth)
+		#
+
+		# determine if elevation move required
+		if elevation != self.elevation_target:
+
+			# position elevation motor
+			status2 = self.set_elevation_motor_angle(elevation)
+		#
 
 		# return the status
-		return cmd_status
+		return status1 and status2
+	#
+
+	#
+	# Moves to the specified position and measures the RSSI
+	#
+	# This method positions the motors and then captures the
+	# RSSI signal strength using the fewest commands possible.
+	# The DVB menu is entered while the motors are still moving
+	# such that the menu change overlaps the settle time.
+	#
+	# @param azimuth the azimuth angle
+	# @param elevation the elevation angle
+	# @param settle_time the time to wait for motor movement
+	# @param iterations the number of RSSI iterations
+	#
+	# @return true if successful, false otherwise
+	# @return the DVB RSSI data if successful
+	#
+	def move_and_measure(self, azimuth, elevation, settle_time, iterations=RSSI_ITERATIONS):
+
+		# position motors
+		status1 = self.move_motors(azimuth, elevation)
+
+		# determine movement start time
+		move_time = time.monotonic()
+
+		# open DVB menu
+		status2 = self.select_menu(MENU_DVB)
+
+		# wait for the remaining motor movement to complete
+		wait_time = max(settle_time - (time.monotonic() - move_time), 0)
+		time.sleep(wait_time)
+
+		# determine if instrumentation enabled
+		if self.stats != None:
+
+			# record settle time
+			self.stats.record_phase(PHASE_SETTLE, wait_time)
+		#
+
+		# initialize response data
+		resp_data = {}
+		status3 = False
+
+		# determine if valid status
+		if status1 and status2:
+
+			# obtain RSSI data
+			status3, resp_data = self.get_dvb_rssi_data(iterations)
+		#
+
+		# return the status and response data
+		return status3, resp_data
+	#
+
+	#
+	# Streams the DVB RSSI
+	#
+	# This method captures the specified number of consecutive
+	# RSSI readings, such as while the motors are moving. Each
+	# reading is time stamped with the midpoint of its command,
+	# since the firmware samples the signal between the command
+	# and the response.
+	#
+	# @param num_reads the number of readings
+	# @param iterations the number of iterations of each reading
+	#
+	# @return true if successful, false otherwise
+	# @return the list of (timestamp, rssi) readings
+	#
+	def stream_dvb_rssi_data(self, num_reads, iterations):
+
+		# initialize status
+		status = True
+
+		# initialize readings
+		readings = []
+
+		# loop through readings
+		for index in range(num_reads):
+
+			# determine if previous readings successful
+			if status == True:
+
+				# obtain RSSI data
+				start_time = time.monotonic()
+				status, resp_data = self.get_dvb_rssi_data(iterations)
+				end_time = time.monotonic()
+
+				# determine if valid RSSI data
+				if status == True:
+
+					# append reading
+					readings.append(((start_time + end_time) / 2, resp_data['rssi_avg']))
+				#
+			#
+		#
+
+		# return the status and readings
+		return status, readings
 	#
 
 	# HELPER
 
+	#
+	# Sends the supplied menu command
+	#
+	# This method selects the specified menu, if required, and
+	# then sends the supplied command.
+	#
+	# @param menu the menu the command is valid on
+	# @param cmd_string the command to send
+	#
+	# @return true if successful, false otherwise
+	# @return the response string if successful
+	#
+	def send_menu_command(self, menu, cmd_string):
+
+		# initialize status
+		status = False
+
+		# initialize response
+		response = ''
+
+		# determine if menu selected
+		if self.select_menu(menu) == True:
+
+			# send command
+			status, response = self.send(cmd_string)
+		#
+
+		# return the status and response string
+		return status, response
+	#
+
+	#
+	# Updates the current menu
+	#
+	# A failed menu command leaves the current menu unknown,
+	# which forces the next menu change to start from the main
+	# menu.
+	#
+	# @param status the menu command status
+	# @param menu the menu entered if successful
+	#
+	def update_menu(self, status, menu):
+
+		# update the current menu
+		self.menu = menu if status == True else MENU_UNKNOWN
+	#
+
 	#
 	# Sends the supplied command
 	#
 	# This method attempts to send the supplied command and
-	# capture the response data. This method will timeout if
-	# the expected end character is not received.
+	# capture the response data using the framed response
+	# reader. This method will timeout if the expected end
+	# character is not received.
 	#
 	# @param cmd_string the command to send
 	#
@@ -442,7 +711,7 @@ class Winegard:
 		status = False
 
 		# initialize response
-		response = []
+		response = ''
 
 		# determine if valid serial
 		if self.ser != None:
@@ -450,49 +719,98 @@ class Winegard:
 			# obtain command bytes
 			cmd_bytes = cmd_string.encode('utf-8')
 
+			# determine start time if instrumentation enabled
+			start_time = time.perf_counter() if self.stats != None else None
+
 			# write serial data
 			self.ser.write(cmd_bytes)
 
-			# initialize response data
-			resp_data = []
-			resp_timeout = False
+			# read response data
+			resp_status, resp_bytes = self.reader.read_response(self.ser)
 
-			# read until end character is encountered
-			while END_CHARACTER not in resp_data and resp_timeout == False:
+			# determine if instrumentation enabled
+			if start_time != None:
 
-				# read one byte of data
-				# this can timeout and return 0 bytes of data
-				resp_bytes = self.ser.read(size=1)
-
-				# determine number of bytes received
-				if len(resp_bytes) > 0:
-
-					# append bytes to response
-					resp_data += resp_bytes
-
-				else:
-
-					# serial timeout occurred
-					resp_timeout = True
-				#
+				# record command
+				self.stats.record(cmd_string, time.perf_counter() - start_time, len(cmd_bytes), len(resp_bytes), resp_status)
 			#
 
 			# determine whether timeout occurred
-			if resp_timeout == False:
+			if resp_status == True:
 
 				# convert response data to string
-				byte_array = bytearray(resp_data)
-				response = byte_array.decode('utf-8')
+				response = resp_bytes.decode('utf-8')
 
 				# update status to indicate successful
 				status = True
 			#
 
 			# wait before allowing next command
-			time.sleep(0.001)
+			time.sleep(COMMAND_DELAY)
+		#
+
+		# return the status and response string
+		return status, response
+	#
+
+	#
+	# Sends the supplied commands together
+	#
+	# This method writes all of the supplied commands in a
+	# single serial write and then reads one response for each
+	# command, such that the commands cost a single round trip.
+	#
+	# @param cmd_strings the list of commands to send
+	#
+	# @return true if successful, false otherwise
+	# @return the list of response strings
+	#
+	def send_batch(self, cmd_strings):
+
+		# initialize status
+		status = False
+
+		# initialize responses
+		responses = []
+
+		# determine if valid serial
+		if self.ser != None:
 
-			# return the status and response string
-			return status, response
+			# determine start time if instrumentation enabled
+			start_time = time.perf_counter() if self.stats != None else None
+
+			# write serial data
+			self.ser.write(''.join(cmd_strings).encode('utf-8'))
+
+			# initialize status
+			status = True
+
+			# loop through each command
+			for cmd_string in cmd_strings:
+
+				# determine if previous responses received
+				if status == True:
+
+					# read response data
+					status, resp_bytes = self.reader.read_response(self.ser)
+
+					# append response string
+					responses.append(resp_bytes.decode('utf-8'))
+
+					# determine if instrumentation enabled
+					if start_time != None:
+
+						# record command, from the batch write to its response
+						self.stats.record(cmd_string, time.perf_counter() - start_time, len(cmd_string.encode('utf-8')), len(resp_bytes), status)
+					#
+				#
+			#
+
+			# wait before allowing next command
+			time.sleep(COMMAND_DELAY)
 		#
+
+		# return the status and response strings
+		return status, responses
 	#
 #
@@ -2,22 +2,19 @@
 # imports
 import os
 import argparse
-import csv
 
 # imports
 from library.map import Map
-
-# constants
-SCAN_DATA_NUM_VALUES = 3
-SCAN_DATA_AZIMUTH_INDEX = 0
-SCAN_DATA_ELEVATION_INDEX = 1
-SCAN_DATA_RSSI_INDEX = 2
-
-# constants
-SATELLITE_DATA_NUM_VALUES = 3
-SATELLITE_DATA_NAME_INDEX = 0
-SATELLITE_DATA_AZIMUTH_INDEX = 1
-SATELLITE_DATA_ELEVATION_INDEX = 2
+from library.scanfile import read_scan_data
+from library.scanfile import infer_grid
+from library.scanfile import read_satellite_data
+from library.scanfile import read_catalog_data
+from library.geo import catalog_satellite_data
+from library.geo import clarke_belt
+from library.peaks import SatelliteIdentifier
+from library.peaks import MATCH_TOLERANCE
+from library.peaks import print_identification_data
+from library.peaks import write_identification_data
 
 # constants
 MIN_NUM_SCAN_DATA_ENTRIES = 2
@@ -31,6 +28,13 @@ ANIMATE_DRAWING_MAP = False
 parser = argparse.ArgumentParser()
 parser.add_argument("--scan_file", action="store", required=True, help="The scan data file path")
 parser.add_argument("--satellite_file", action="store", required=False, help="The satellite data file path")
+parser.add_argument("--catalog_file", action="store", required=False, help="The satellite catalog file path of sub-satellite longitudes, computed for the observer location")
+parser.add_argument("--latitude", type=float, action="store", required=False, help="The observer latitude in degrees")
+parser.add_argument("--longitude", type=float, action="store", required=False, help="The observer longitude in degrees east")
+parser.add_argument("--altitude", type=float, default=0.0, action="store", required=False, help="The observer altitude in meters")
+parser.add_argument("--clarke_belt", action="store_true", required=False, help="Draw the geostationary arc of the observer location")
+parser.add_argument("--identification_file", action="store", required=False, help="The output file path of the satellite identification table")
+parser.add_argument("--match_tolerance", type=float, default=MATCH_TOLERANCE, action="store", required=False, help="The satellite identification match tolerance in degrees")
 
 # parse arguments
 args = parser.parse_args()
@@ -38,7 +42,7 @@ args = parser.parse_args()
 # READ SCAN DATA
 
 # initialize data
-scan_data = []
+scan_data = None
 
 # determine if file exists
 if os.path.isfile(args.scan_file) == True:
@@ -46,40 +50,14 @@ if os.path.isfile(args.scan_file) == True:
 	# debug
 	print('INFO: Reading scan data')
 
-	# open input file
-	file = open(args.scan_file, 'r')
-
-	# loop through file lines
-	for line in file:
-
-		# split line into values
-		line_data = line.split()
-
-		# determine if valid number of values
-		if len(line_data) == SCAN_DATA_NUM_VALUES:
-
-			# parse line data
-			azimuth = line_data[SCAN_DATA_AZIMUTH_INDEX]
-			elevation = line_data[SCAN_DATA_ELEVATION_INDEX]
-			rssi = line_data[SCAN_DATA_RSSI_INDEX]
+	# read scan data
+	status, data = read_scan_data(args.scan_file)
 
-			# initialize data entry
-			data_entry = {	'azimuth': float(azimuth),
-							'elevation': float(elevation),
-							'rssi': float(rssi) }
-
-			# append scan data
-			scan_data.append(data_entry)
-
-		else:
-
-			# debug
-			print(f'WARNING: Invalid line ignored: {line}')
+	# determine if valid scan data
+	if status == True:
+		scan_data = data
 	#
 
-	# close input file
-	file.close()
-
 else:
 
 	# debug
@@ -100,65 +78,45 @@ if args.satellite_file != None:
 		# debug
 		print('INFO: Reading satellite data')
 
-		# open input file
-		csv_file = open(args.satellite_file, newline='')
-		csv_reader = csv.reader(csv_file, delimiter=',')
+		# read satellite data
+		satellite_data = read_satellite_data(args.satellite_file)
 
-		# loop through each row of satellite data
-		for row_data in csv_reader:
-
-			# determine if valid number of values
-			if len(row_data) == SATELLITE_DATA_NUM_VALUES:
-
-				# parse row data
-				name = row_data[SATELLITE_DATA_NAME_INDEX]
-				azimuth = row_data[SATELLITE_DATA_AZIMUTH_INDEX]
-				elevation = row_data[SATELLITE_DATA_ELEVATION_INDEX]
+	else:
 
-				# initialize data entry
-				data_entry = {	'name': name,
-								'azimuth': float(azimuth),
-								'elevation': float(elevation) }
+		# debug
+		print('ERROR: The specified satellite data file doesn\'t exist')
+	#
+#
 
-				# append satellite data
-				satellite_data.append(data_entry)
+# determine if satellite catalog provided
+if args.catalog_file != None:
 
-			else:
+	# determine if file exists and observer location provided
+	if os.path.isfile(args.catalog_file) == True and args.latitude != None and args.longitude != None:
 
-				# debug
-				print(f'WARNING: Invalid row ignored: {row_data}')
-			#
+		# debug
+		print('INFO: Computing satellite data')
 
-		# close input file
-		csv_file.close()
+		# compute satellite data
+		satellite_data += catalog_satellite_data(read_catalog_data(args.catalog_file), args.latitude, args.longitude, args.altitude)
 
 	else:
 
 		# debug
-		print('ERROR: The specified satellite data file doesn\'t exist')
+		print('ERROR: The specified satellite catalog file doesn\'t exist or the observer location wasn\'t supplied')
 	#
 #
 
 # DRAW MAP
 
 # determine if valid number of entries
-if len(scan_data) >= MIN_NUM_SCAN_DATA_ENTRIES:
+if scan_data != None and len(scan_data['rssi']) >= MIN_NUM_SCAN_DATA_ENTRIES:
 
 	# debug
 	print('INFO: Determining scan parameters')
 
-	# determine azimuth start/end
-	azimuth_start = min(d['azimuth'] for d in scan_data)
-	azimuth_end = max(d['azimuth'] for d in scan_data)
-
-	# determine elevation start/end
-	elevation_start = min(d['elevation'] for d in scan_data)
-	elevation_end = max(d['elevation'] for d in scan_data)
-
-	# determine step angle
-	step_angle_azimuth = scan_data[1]['azimuth'] - scan_data[0]['azimuth']
-	step_angle_elevation = scan_data[1]['elevation'] - scan_data[0]['elevation']
-	step_angle = max([step_angle_azimuth, step_angle_elevation])
+	# determine the map grid
+	azimuth_start, azimuth_end, elevation_start, elevation_end, step_angle = infer_grid(scan_data)
 
 	# debug
 	print('INFO: Drawing map...')
@@ -167,28 +125,47 @@ if len(scan_data) >= MIN_NUM_SCAN_DATA_ENTRIES:
 	map = Map(azimuth_start, azimuth_end, elevation_start, elevation_end, step_angle)
 	map.show()
 
-	# loop through scan data
-	for data_entry in scan_data:
+	# update map data, drawing coarse data points first such that finer data points replace them
+	map.set_data_batch(scan_data['azimuth'], scan_data['elevation'], scan_data['rssi'], redraw=ANIMATE_DRAWING_MAP, step_angles=scan_data['step'])
+
+	# obtain data values
+	names = [data_entry['name'] for data_entry in satellite_data]
+	azimuths = [data_entry['azimuth'] for data_entry in satellite_data]
+	elevations = [data_entry['elevation'] for data_entry in satellite_data]
 
-		# obtain data values
-		azimuth = data_entry['azimuth']
-		elevation = data_entry['elevation']
-		rssi = data_entry['rssi']
+	# update map data
+	map.set_points(names, azimuths, elevations, redraw=ANIMATE_DRAWING_MAP)
+
+	# determine if geostationary arc requested
+	if args.clarke_belt == True and args.latitude != None and args.longitude != None:
 
 		# update map data
-		map.set_data(azimuth, elevation, rssi, redraw=ANIMATE_DRAWING_MAP)
+		map.set_arc(*clarke_belt(args.latitude, args.longitude, args.altitude), redraw=ANIMATE_DRAWING_MAP)
 	#
 
-	# loop through satellite data
-	for data_entry in satellite_data:
+	# render the completed map
+	map.render(force=True)
 
-		# obtain data values
-		name = data_entry['name']
-		azimuth = data_entry['azimuth']
-		elevation = data_entry['elevation']
+	# determine if satellite data provided
+	if len(satellite_data) > 0:
 
-		# update map data
-		map.set_point(name, azimuth, elevation, redraw=ANIMATE_DRAWING_MAP)
+		# debug
+		print('INFO: Identifying satellites')
+
+		# identify satellites
+		identifier = SatelliteIdentifier(azimuth_start, azimuth_end, elevation_start, elevation_end, step_angle, satellite_data, args.match_tolerance)
+		identifier.set_data_batch(scan_data['azimuth'], scan_data['elevation'], scan_data['rssi'], scan_data['step'])
+		identification_data = identifier.identify()
+
+		# debug
+		print_identification_data(identification_data)
+
+		# determine if identification file requested
+		if args.identification_file != None:
+
+			# write identification data
+			write_identification_data(args.identification_file, identification_data)
+		#
 	#
 
 	# debug
@@ -0,0 +1,301 @@
+
+# imports
+import os
+import glob
+import time
+import argparse
+import concurrent.futures
+
+# imports
+from library.scanfile import read_scan_data
+from library.scanfile import infer_grid
+from library.scanfile import read_satellite_data
+
+# constants
+INPUT_PATTERN = 'scan_data/*.txt'
+SCAN_EXTENSIONS = ('.txt', '.scan')
+MAX_TEMPLATES = 4
+
+# WORKER
+
+# initialize worker state
+worker_satellite_data = []
+worker_templates = {}
+
+#
+# Initializes a render worker
+#
+# The Agg backend is selected before the map module imports
+# pyplot, such that no display is required.
+#
+# @param satellite_data the list of satellite data entries to overlay
+#
+def init_worker(satellite_data):
+
+	# imports
+	import matplotlib
+	matplotlib.use('Agg')
+
+	# set satellite data
+	global worker_satellite_data
+	worker_satellite_data = satellite_data
+#
+
+#
+# Obtains the map template of the supplied grid
+#
+# Each worker keeps a map per grid, with the satellite overlay
+# already drawn, such that the figure is only created once for
+# each region rather than once per scan file.
+#
+# @param grid the (azimuth start, azimuth end, elevation start, elevation end, step angle) grid
+#
+# @return the cleared map
+#
+def get_template(grid):
+
+	# imports
+	import matplotlib.pyplot as plt
+	from library.map import Map
+
+	# determine if template exists
+	if grid in worker_templates:
+
+		# obtain template, marking it as most recently used
+		map = worker_templates.pop(grid)
+		map.reset()
+
+	else:
+
+		# determine if too many templates
+		if len(worker_templates) >= MAX_TEMPLATES:
+
+			# close the least recently used template
+			plt.close(worker_templates.pop(next(iter(worker_templates))).figure)
+		#
+
+		# initialize map
+		map = Map(*grid)
+
+		# update map data
+		map.set_points([data_entry['name'] for data_entry in worker_satellite_data], [data_entry['azimuth'] for data_entry in worker_satellite_data], [data_entry['elevation'] for data_entry in worker_satellite_data], redraw=False)
+	#
+
+	# set template
+	worker_templates[grid] = map
+
+	# return the map
+	return map
+#
+
+#
+# Renders the specified scan data file
+#
+# @param scan_file the scan data file path
+# @param image_file the image file path
+#
+# @return true if successful, false otherwise
+#
+def render_file(scan_file, image_file):
+
+	# read scan data
+	status, scan_data = read_scan_data(scan_file)
+
+	# determine if valid scan data
+	if status == True:
+
+		# determine the map grid
+		grid = infer_grid(scan_data)
+
+		# determine if valid grid
+		if grid[4] != None and grid[4] > 0:
+
+			# obtain the map template
+			map = get_template(grid)
+
+			# update map data
+			map.set_data_batch(scan_data['azimuth'], scan_data['elevation'], scan_data['rssi'], redraw=False, step_angles=scan_data['step'])
+
+			# save the map
+			map.save(image_file)
+
+		else:
+
+			# update status to indicate unsuccessful
+			status = False
+		#
+	#
+
+	# return the status
+	return status
+#
+
+# HELPER
+
+#
+# Determines the image file path of a scan data file
+#
+# @param scan_file the scan data file path
+# @param output_dir the output directory, or None for the directory of the scan data file
+#
+# @return the image file path
+#
+def image_path(scan_file, output_dir):
+
+	# determine output directory
+	directory = output_dir if output_dir != None else os.path.dirname(scan_file)
+
+	# return the image file path
+	return os.path.join(directory, os.path.splitext(os.path.basename(scan_file))[0] + '.png')
+#
+
+#
+# Determines the image file path of each scan data file
+#
+# Scan data files which render to the same image file (eg: the
+# text and binary files of the same scan) are only rendered once,
+# preferring the binary file, which is faster to read.
+#
+# @param scan_files the sorted list of scan data file paths
+# @param output_dir the output directory, or None for the directory of each scan data file
+#
+# @return the list of (scan data file path, image file path) tasks
+#
+def image_tasks(scan_files, output_dir):
+
+	# initialize scan data file of each image
+	images = {}
+
+	# loop through scan data files
+	for scan_file in scan_files:
+
+		# determine the image file path
+		image_file = image_path(scan_file, output_dir)
+
+		# determine if the image is already rendered from another file
+		if image_file in images:
+
+			# determine if not the text and binary files of the same scan
+			if os.path.splitext(images[image_file])[0] != os.path.splitext(scan_file)[0]:
+
+				# debug
+				print(f'WARNING: {images[image_file]} and {scan_file} render to the same image {image_file}')
+			#
+
+			# determine if binary
+			if scan_file.endswith('.scan') == True:
+				images[image_file] = scan_file
+			#
+
+		else:
+
+			# set scan data file
+			images[image_file] = scan_file
+		#
+	#
+
+	# return the tasks
+	return [(scan_file, image_file) for image_file, scan_file in images.items()]
+#
+
+#
+# Determines whether an image is newer than its scan data file
+#
+# @param scan_file the scan data file path
+# @param image_file the image file path
+#
+# @return true if up to date, false otherwise
+#
+def up_to_date(scan_file, image_file):
+	return os.path.isfile(image_file) == True and os.path.getmtime(image_file) >= os.path.getmtime(scan_file)
+#
+
+# MAIN
+
+#
+# Performs main logic
+#
+# This method renders the image of every scan data file matching
+# the supplied patterns with a pool of worker processes. Files
+# whose image is newer than the scan data file are skipped
+# unless forced.
+#
+if __name__ == "__main__":
+
+	# initialize parser
+	parser = argparse.ArgumentParser()
+	parser.add_argument("scan_files", nargs="*", default=[INPUT_PATTERN], help="The scan data file paths or glob patterns")
+	parser.add_argument("--satellite_file", action="store", required=False, help="The satellite data file path")
+	parser.add_argument("--output_dir", action="store", required=False, help="The image output directory, the directory of each scan data file if not supplied")
+	parser.add_argument("--workers", type=int, default=os.cpu_count(), action="store", required=False, help="The number of worker processes")
+	parser.add_argument("--force", action="store_true", required=False, help="Render images which are newer than their scan data file")
+
+	# parse arguments
+	args = parser.parse_args()
+
+	# determine scan data files
+	scan_files = sorted(set(path for pattern in args.scan_files for path in glob.glob(pattern) if path.endswith(SCAN_EXTENSIONS) == True and os.path.isfile(path) == True))
+
+	# initialize satellite data
+	satellite_data = []
+
+	# determine if satellite data provided
+	if args.satellite_file != None:
+
+		# read satellite data
+		satellite_data = read_satellite_data(args.satellite_file)
+	#
+
+	# create output directory
+	if args.output_dir != None:
+		os.makedirs(args.output_dir, exist_ok=True)
+	#
+
+	# determine the files to render
+	tasks = image_tasks(scan_files, args.output_dir)
+	pending = [task for task in tasks if args.force == True or up_to_date(*task) == False]
+
+	# debug
+	print(f'INFO: Rendering {len(pending)} of {len(tasks)} scan files with {args.workers} workers')
+
+	# initialize counters
+	num_rendered = 0
+	num_failed = 0
+
+	# start timer
+	start_time = time.perf_counter()
+
+	# initialize worker pool
+	with concurrent.futures.ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker, initargs=(satellite_data,)) as executor:
+
+		# submit files
+		futures = {executor.submit(render_file, scan_file, image_file): scan_file for scan_file, image_file in pending}
+
+		# loop through rendered files
+		for future in concurrent.futures.as_completed(futures):
+
+			# determine render status
+			try:
+				status = future.result()
+			except Exception as e:
+				print(f'ERROR: {futures[future]}: {e}')
+				status = False
+			#
+
+			# update counters
+			if status == True:
+				num_rendered += 1
+			else:
+				num_failed += 1
+				print(f'WARNING: Unable to render {futures[future]}')
+			#
+		#
+	#
+
+	# determine elapsed time
+	elapsed_time = time.perf_counter() - start_time
+
+	# debug
+	print(f'INFO: Rendered {num_rendered}, skipped {len(tasks) - len(pending)}, failed {num_failed} in {elapsed_time:.2f} seconds')
+	print(f'INFO: Throughput: {num_rendered / max(elapsed_time, 1e-9):.1f} files/sec')
+#
@@ -0,0 +1,8 @@
+#!/bin/bash
+
+# constants
+SCAN_FILES="scan_data/*.txt"
+SATELLITE_FILE=example/satellite_data.csv
+
+# render scan files
+python3 render.py "$SCAN_FILES" --satellite_file $SATELLITE_FILE
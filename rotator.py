@@ -1,10 +1,20 @@
 
 # imports
+import json
 import argparse
-import socket
+import asyncio
+import time
 
 # imports
-from library.winegard import Winegard
+from library.async_winegard import AsyncWinegard
+from library.poller import PositionPoller
+from library.poller import POLL_INTERVAL
+from library.poller import MAX_AGE
+from library.coalescer import TargetCoalescer
+from library.coalescer import AZIMUTH_DEADBAND
+from library.coalescer import ELEVATION_DEADBAND
+from library.coalescer import MIN_UPDATE_INTERVAL
+from library.stats import CommandStats
 
 # constants
 CMD_GET_POSITION = 'p'
@@ -17,19 +27,28 @@ CMD_SET_POSITION_ELEVATION_INDEX = 2
 
 # constants
 CMD_STOP = 'S'
+CMD_QUIT = 'q'
+CMD_DUMP_STATS = '\\dump_stats'
 
 # constants
 RESP_SUCCESS = 0
 RESP_FAILURE = 1
 
 # constants
-MAX_NUM_COMMAND_BYTES = 128
+MAX_LINE_LENGTH = 1024
 
 #
 # This class provides the implementation to use a Winegard
 # satellite dish as an antenna rotator in real time satellite
 # tracking applications via the Hamlib rotctld protocol.
 #
+# The rotctld server runs on an asyncio event loop and accepts
+# any number of concurrent clients, such as the tracking
+# software and a position monitor. Commands are framed by line,
+# so several commands received together are processed in order,
+# and each client is served until it disconnects without
+# affecting the Winegard connection or the other clients.
+#
 class Rotator:
 
 	#
@@ -39,19 +58,62 @@ class Rotator:
 	# @param socket_host the socket host name
 	# @param socket_port the socket port number
 	# @param offset_angle the azimuth offset angle
+	# @param poll_interval the position poll interval in seconds, or 0 to query the position on demand
+	# @param max_position_age the maximum age of a polled position in seconds
+	# @param azimuth_deadband the azimuth deadband of position commands in degrees
+	# @param elevation_deadband the elevation deadband of position commands in degrees
+	# @param min_update_interval the minimum time between position updates in seconds
 	#
-	def __init__(self, comm_port, socket_host, socket_port, offset_angle):
+	def __init__(self, comm_port, socket_host, socket_port, offset_angle, poll_interval=POLL_INTERVAL, max_position_age=MAX_AGE, azimuth_deadband=AZIMUTH_DEADBAND, elevation_deadband=ELEVATION_DEADBAND, min_update_interval=MIN_UPDATE_INTERVAL):
 
 		# set socket parameters
 		self.SOCKET_HOST = socket_host
 		self.SOCKET_PORT = socket_port
 
 		# initialize winegard
-		self.winegard = Winegard(comm_port)
+		self.winegard = AsyncWinegard(comm_port)
 		self.winegard.set_offset_angle(offset_angle)
 
-		# initialize socket
-		self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+		# initialize position poller
+		self.poller = PositionPoller(self.winegard, poll_interval, max_position_age)
+
+		# initialize target coalescer
+		self.coalescer = TargetCoalescer(self.winegard, azimuth_deadband, elevation_deadband, min_update_interval)
+
+		# initialize position query counters
+		self.num_polled_positions = 0
+		self.num_queried_positions = 0
+
+		# initialize server
+		self.server = None
+		self.clients = {}
+
+		# initialize instrumentation
+		self.stats = None
+		self.stats_file = None
+	#
+
+	#
+	# Enables instrumentation
+	#
+	# The latency of every Winegard command is recorded. The
+	# statistics are printed when the process receives SIGUSR1 or
+	# returned to a client by the dump stats command, and are
+	# written to the specified JSON file during cleanup.
+	#
+	# @param file_path the statistics file path
+	#
+	def enable_stats(self, file_path):
+
+		# initialize statistics
+		self.stats = CommandStats()
+		self.stats_file = file_path
+
+		# enable winegard instrumentation
+		self.winegard.enable_stats(self.stats)
+
+		# print statistics on request
+		self.stats.install_signal_handler()
 	#
 
 	#
@@ -63,7 +125,7 @@ class Rotator:
 	#
 	# @return true if successful, false otherwise
 	#
-	def connect(self):
+	async def connect(self):
 
 		# debug
 		print('INFO: Performing connect')
@@ -72,18 +134,25 @@ class Rotator:
 		status = False
 
 		# attempt to connect winegard
-		status0 = self.winegard.connect()
+		status0 = await self.winegard.connect()
 
 		# determine connection status
 		if status0 == True:
 
 			# perform commands
-			status1 = self.winegard.quit_menu()
-			status2 = self.winegard.enter_motor_menu()
+			status1 = await self.winegard.quit_menu()
+			status2 = await self.winegard.enter_motor_menu()
 
 			# update status
 			status = status1 and status2
 
+			# determine if successful
+			if status == True:
+
+				# start background tasks
+				self.start_tasks()
+			#
+
 		else:
 
 			# debug
@@ -94,16 +163,34 @@ class Rotator:
 		return status
 	#
 
+	#
+	# Starts the background tasks
+	#
+	# This method starts the target coalescer and, if enabled,
+	# the position poller.
+	#
+	def start_tasks(self):
+
+		# start target coalescer
+		self.coalescer.start()
+
+		# determine if position polling enabled
+		if self.poller.POLL_INTERVAL > 0:
+
+			# start position poller
+			self.poller.start()
+		#
+	#
+
 	#
 	# Performs listen
 	#
-	# This method will hold indefinitely while listening for
-	# incoming connection requests. It will then establish a
-	# connection with the client.
+	# This method starts the rotctld server, which accepts
+	# client connections in the background until cleanup.
 	#
 	# @return true if successful, false otherwise
 	#
-	def listen(self):
+	async def listen(self):
 
 		# debug
 		print('INFO: Performing listen...')
@@ -111,131 +198,210 @@ class Rotator:
 		# initialize status
 		status = False
 
-		# determine if valid socket
-		if self.socket != None:
-
-			# bind socket
-			self.socket.bind((self.SOCKET_HOST, self.SOCKET_PORT))
+		# determine if server can be started
+		try:
 
-			# listen for incoming connections
-			self.socket.listen()
+			# start server
+			self.server = await asyncio.start_server(self.process, self.SOCKET_HOST, self.SOCKET_PORT, limit=MAX_LINE_LENGTH)
 
-			# accept client connection
-			connection, address = self.socket.accept()
-
-			# determine if valid connection
-			if connection != None:
+			# debug
+			print(f'INFO: Listening on {self.server.sockets[0].getsockname()}')
 
-				# debug
-				print(f'INFO: Connected with {address}')
+			# update status to indicate successful
+			status = True
 
-				# set connection
-				self.connection = connection
+		except OSError as e:
 
-				# update status to indicate successful
-				status = True
-			#
+			# debug
+			print(f'ERROR: Unable to start server: {e}')
 		#
 
 		# return the status
 		return status
 	#
 
+	#
+	# Serves clients until cancelled
+	#
+	async def serve(self):
+
+		# serve clients
+		await self.server.serve_forever()
+	#
+
 	#
 	# Performs processing
 	#
-	# This method will continuously process incoming command
-	# data from the client until the STOP command is received.
-	# This method parses the command data to determine the type
-	# of command received in order to invoke the appropriate
-	# process method, which will handle the command and generate
-	# the expected response string. This method will then encode
-	# the response string and send it to the client.
+	# This method processes the commands of a single client
+	# connection until the client disconnects or sends the quit
+	# command. Each line received is a command, which is parsed
+	# to determine the type of command in order to invoke the
+	# appropriate process method. The response of each command
+	# is sent before the next command is processed.
+	#
+	# @param reader the client stream reader
+	# @param writer the client stream writer
 	#
-	def process(self):
+	async def process(self, reader, writer):
 
 		# debug
-		print('INFO: Processing commands')
+		address = writer.get_extra_info('peername')
+		print(f'INFO: Connected with {address}')
 
-		# obtain command data
-		cmd_data = self.connection.recv(MAX_NUM_COMMAND_BYTES)
+		# track client connection
+		self.clients[asyncio.current_task()] = writer
 
-		# initialize the stop command state
-		stop_cmd = False
+		# initialize the quit command state
+		quit_cmd = False
 
-		# loop while valid data received
-		while cmd_data != None and stop_cmd == False:
+		# determine if the connection is lost
+		try:
 
-			# obtain command values
-			cmd = cmd_data.decode('utf-8')
-			cmd_values = cmd.split()
+			# loop until client disconnects
+			while quit_cmd == False:
 
-			# initialize response
-			response = f'RPRT {RESP_FAILURE}\n'
+				# obtain command line
+				cmd_data = await reader.readline()
 
-			# determine if valid number of values
-			if len(cmd_values) > 0:
+				# determine if client disconnected
+				if len(cmd_data) == 0:
 
-				# obtain the command type
-				cmd_type = cmd_values[0]
+					# stop processing
+					quit_cmd = True
 
-				# determine the command type
-				if cmd_type == CMD_GET_POSITION:
+				else:
 
 					# process command
-					response = self.process_get_position_cmd(cmd_values)
+					response, quit_cmd = await self.process_command(cmd_data.decode('utf-8', errors='replace'))
 
-				elif cmd_type == CMD_SET_POSITION:
+					# send response
+					writer.write(response.encode('utf-8'))
+					await writer.drain()
+				#
+			#
 
-					# process command
-					response = self.process_set_position_cmd(cmd_values)
+		except (ConnectionError, ValueError, asyncio.LimitOverrunError) as e:
 
-				elif cmd_type == CMD_STOP:
+			# debug
+			print(f'WARNING: Connection with {address} lost: {e}')
 
-					# process command
-					response = self.process_stop_cmd(cmd_values)
+		finally:
 
-					# update stop command state
-					stop_cmd = True
+			# stop tracking client connection
+			self.clients.pop(asyncio.current_task(), None)
 
-				else:
+			# close connection
+			writer.close()
 
-					# debug
-					print(f'WARNING: Unknown command type {cmd_type}')
-				#
-			#
+			# debug
+			print(f'INFO: Disconnected from {address}')
+		#
+	#
+
+	#
+	# Processes a single command
+	#
+	# @param cmd the command line
+	#
+	# @return the client response string
+	# @return true if the client quit, false otherwise
+	#
+	async def process_command(self, cmd):
+
+		# obtain command values
+		cmd_values = cmd.split()
+
+		# initialize response
+		response = f'RPRT {RESP_FAILURE}\n'
+		quit_cmd = False
+
+		# determine if valid number of values
+		if len(cmd_values) > 0:
+
+			# obtain the command type
+			cmd_type = cmd_values[0]
+
+			# determine the command type
+			if cmd_type == CMD_GET_POSITION:
+
+				# process command
+				response = await self.process_get_position_cmd(cmd_values)
+
+			elif cmd_type == CMD_SET_POSITION:
+
+				# process command
+				response = await self.process_set_position_cmd(cmd_values)
+
+			elif cmd_type == CMD_STOP:
+
+				# process command
+				response = await self.process_stop_cmd(cmd_values)
+
+			elif cmd_type == CMD_DUMP_STATS:
+
+				# process command
+				response = self.process_dump_stats_cmd(cmd_values)
 
-			# send response
-			response_encoded = response.encode('utf-8')
-			self.connection.sendall(response_encoded)
+			elif cmd_type == CMD_QUIT:
 
-			# determine stop command state
-			if stop_cmd == False:
+				# close the connection without a response
+				response = ''
+				quit_cmd = True
 
-				# obtain command data
-				cmd_data = self.connection.recv(MAX_NUM_COMMAND_BYTES)
+			else:
+
+				# debug
+				print(f'WARNING: Unknown command type {cmd_type}')
 			#
 		#
+
+		# return the response and quit state
+		return response, quit_cmd
 	#
 
 	#
 	# Processes the GET_POSITION command
 	#
-	# This method commands the Winegard satellite dish to obtain
-	# the current azimuth/elevation angles. It then utilizes these
-	# angles to build the client response string.
+	# This method obtains the current azimuth/elevation angles
+	# from the position poller, or commands the Winegard satellite
+	# dish to obtain them if the polled position is stale. It then
+	# utilizes these angles to build the client response string.
 	#
 	# @param cmd_values the command values
 	#
 	# @return the client response string
 	#
-	def process_get_position_cmd(self, cmd_values):
+	async def process_get_position_cmd(self, cmd_values):
 
 		# initialize response
 		response = f'RPRT {RESP_FAILURE}\n'
 
-		# obtain the winegard angles
-		status, data = self.winegard.get_motor_angle_data()
+		# initialize angle data
+		status = False
+		data = {}
+
+		# determine if position polling enabled
+		if self.poller.task != None:
+
+			# obtain the polled angles
+			status, data = self.poller.get_position()
+			self.num_polled_positions += status
+		#
+
+		# determine if polled angles are unavailable
+		if status == False:
+
+			# obtain the winegard angles
+			status, data = await self.winegard.get_motor_angle_data()
+			self.num_queried_positions += 1
+
+			# determine if valid angle data
+			if status == True:
+
+				# update the polled position
+				self.poller.update(data['azimuth_angle'], data['elevation_angle'], time.monotonic())
+			#
+		#
 
 		# determine if valid angle data
 		if status == True:
@@ -261,15 +427,16 @@ class Rotator:
 	# Processes the SET_POSITION command
 	#
 	# This method parses the commanded azimuth/elevation angles
-	# and commands the Winegard satellite dish to move to this
-	# position. It then utilizes the status of these commands
-	# to build the client response string
+	# and submits this position to the target coalescer, which
+	# commands the Winegard satellite dish to move in the
+	# background. It then utilizes the status of the most recent
+	# position update to build the client response string
 	#
 	# @param cmd_values the command values
 	#
 	# @return the client response string
 	#
-	def process_set_position_cmd(self, cmd_values):
+	async def process_set_position_cmd(self, cmd_values):
 
 		# initialize response
 		response = f'RPRT {RESP_FAILURE}\n'
@@ -281,24 +448,27 @@ class Rotator:
 			cmd_azimuth = cmd_values[CMD_SET_POSITION_AZIMUTH_INDEX]
 			cmd_elevation = cmd_values[CMD_SET_POSITION_ELEVATION_INDEX]
 
-			# cast command parameters
-			cast_cmd_azimuth = float(cmd_azimuth)
-			cast_cmd_elevation = float(cmd_elevation)
+			# determine if valid parameters
+			try:
 
-			# set the winegard angles
-			status1 = self.winegard.set_azimuth_motor_angle(cast_cmd_azimuth)
-			status2 = self.winegard.set_elevation_motor_angle(cast_cmd_elevation)
+				# cast command parameters
+				cast_cmd_azimuth = float(cmd_azimuth)
+				cast_cmd_elevation = float(cmd_elevation)
 
-			# determine the status
-			if status1 and status2:
+				# submit the winegard angles
+				status = self.coalescer.submit(cast_cmd_azimuth, cast_cmd_elevation)
 
-				# update response
-				response = f'RPRT {RESP_SUCCESS}\n'
+				# determine the status
+				if status == True:
 
-			else:
+					# update response
+					response = f'RPRT {RESP_SUCCESS}\n'
+				#
+
+			except ValueError:
 
 				# debug
-				print('WARNING: Unable to set position')
+				print(f'WARNING: Invalid position {cmd_azimuth} {cmd_elevation}')
 			#
 		#
 
@@ -309,21 +479,76 @@ class Rotator:
 	#
 	# Processes the stop command
 	#
-	# This command prints a message to the console and builds
-	# the client response string.
+	# This method discards the pending target of the target
+	# coalescer and commands the Winegard satellite dish to its
+	# current position, which stops the motors. The rotator and
+	# the other client connections keep running. It then utilizes
+	# the status of the position update to build the client
+	# response string.
 	#
 	# @param cmd_values the command values
 	#
 	# @return the client response string
 	#
-	def process_stop_cmd(self, cmd_values):
+	async def process_stop_cmd(self, cmd_values):
 
 		# initialize response
-		response = f'RPRT 0\n'
+		response = f'RPRT {RESP_FAILURE}\n'
 
 		# debug
 		print('INFO: Stop command received')
 
+		# discard the pending target
+		self.coalescer.cancel()
+
+		# obtain the winegard angles
+		status, data = await self.winegard.get_motor_angle_data()
+
+		# determine if valid angle data
+		if status == True:
+
+			# command the current position
+			await self.coalescer.apply(data['azimuth_angle'], data['elevation_angle'])
+
+			# determine the status
+			if self.coalescer.status == True:
+
+				# update response
+				response = f'RPRT {RESP_SUCCESS}\n'
+			#
+
+		else:
+
+			# debug
+			print('WARNING: Unable to stop')
+		#
+
+		# return the response
+		return response
+	#
+
+	#
+	# Processes the dump stats command
+	#
+	# This command builds a client response string of the command
+	# statistics as a single line of JSON.
+	#
+	# @param cmd_values the command values
+	#
+	# @return the client response string
+	#
+	def process_dump_stats_cmd(self, cmd_values):
+
+		# initialize response
+		response = f'RPRT {RESP_FAILURE}\n'
+
+		# determine if instrumentation enabled
+		if self.stats != None:
+
+			# update response
+			response = f'{json.dumps(self.stats.summary())}\nRPRT {RESP_SUCCESS}\n'
+		#
+
 		# return the response
 		return response
 	#
@@ -331,22 +556,93 @@ class Rotator:
 	#
 	# Performs cleanup
 	#
-	# This method disconnects from the Winegard satellite dish
-	# and closes the client connection.
+	# This method stops the server, closes the client
+	# connections and disconnects from the Winegard satellite
+	# dish.
 	#
-	def cleanup(self):
+	async def cleanup(self):
 
 		# debug
 		print('INFO: Performing cleanup')
 
+		# determine if valid server
+		if self.server != None:
+
+			# stop server
+			self.server.close()
+		#
+
+		# stop background tasks
+		await self.poller.stop()
+		await self.coalescer.stop()
+
+		# debug
+		print(f'INFO: Position queries: {self.num_polled_positions} from memory, {self.num_queried_positions} from the dish')
+		print(f'INFO: Position commands: {self.coalescer.summary()}')
+
+		# close client connections, which ends their processing
+		for writer in self.clients.values():
+			writer.close()
+		#
+		await asyncio.gather(*self.clients.keys(), return_exceptions=True)
+
 		# disconnect winegard
-		self.winegard.disconnect()
+		await self.winegard.disconnect()
+
+		# determine if instrumentation enabled
+		if self.stats != None:
+
+			# debug
+			self.stats.print_summary()
+
+			# write statistics
+			self.stats.dump(self.stats_file)
+		#
+	#
+
+	#
+	# Performs the rotator
+	#
+	# This method connects to the Winegard satellite dish and
+	# serves clients until interrupted.
+	#
+	async def run(self):
+
+		# connect to winegard
+		status = await self.connect()
+
+		# determine connect status
+		if status == True:
+
+			# start server
+			status = await self.listen()
+
+			# determine server status
+			if status == True:
+
+				# serve clients until interrupted
+				try:
+					await self.serve()
+				except asyncio.CancelledError:
+					pass
+				#
+
+			else:
+
+				# debug
+				print('ERROR: Unable to start server')
+			#
+
+			# perform cleanup
+			await self.cleanup()
+
+			# debug
+			print('INFO: Rotator complete!')
 
-		# determine if valid socket
-		if self.socket != None:
+		else:
 
-			# close socket
-			self.socket.close()
+			# debug
+			print('ERROR: Unable to connect to winegard')
 		#
 	#
 #
@@ -356,10 +652,8 @@ class Rotator:
 #
 # Performs main logic
 #
-# This method parses the supplied arguments, listens for a
-# connection from the rotator controller, processes incoming
-# rotator commands, and closes the connection once the controller
-# disconnects.
+# This method parses the supplied arguments and serves rotator
+# controller connections until interrupted.
 #
 if __name__ == "__main__":
 
@@ -369,41 +663,30 @@ if __name__ == "__main__":
 	parser.add_argument("--socket_host", action="store", required=True, help="The socket host name")
 	parser.add_argument("--socket_port", type=int, action="store", required=True, help="The socket port number")
 	parser.add_argument("--offset_angle", type=int, default=0, action="store", required=False, help="The azimuth offset angle in degrees")
+	parser.add_argument("--poll_interval", type=float, default=POLL_INTERVAL, action="store", required=False, help="The position poll interval in seconds, or 0 to query the position on demand")
+	parser.add_argument("--max_position_age", type=float, default=MAX_AGE, action="store", required=False, help="The maximum age of a polled position in seconds")
+	parser.add_argument("--azimuth_deadband", type=float, default=AZIMUTH_DEADBAND, action="store", required=False, help="The azimuth change in degrees below which position commands are not sent to the dish")
+	parser.add_argument("--elevation_deadband", type=float, default=ELEVATION_DEADBAND, action="store", required=False, help="The elevation change in degrees below which position commands are not sent to the dish")
+	parser.add_argument("--min_update_interval", type=float, default=MIN_UPDATE_INTERVAL, action="store", required=False, help="The minimum time between position updates sent to the dish in seconds")
+	parser.add_argument("--stats_file", action="store", required=False, help="The JSON file path of the command latency statistics, which enables instrumentation")
 
 	# parse arguments
 	args = parser.parse_args()
 
 	# initialize rotator
-	rotator = Rotator(args.comm_port, args.socket_host, args.socket_port, args.offset_angle)
-
-	# connect to winegard
-	status = rotator.connect()
+	rotator = Rotator(args.comm_port, args.socket_host, args.socket_port, args.offset_angle, args.poll_interval, args.max_position_age, args.azimuth_deadband, args.elevation_deadband, args.min_update_interval)
 
-	# determine connect status
-	if status == True:
+	# determine if instrumentation requested
+	if args.stats_file != None:
 
-		# listen for client connections
-		status = rotator.listen()
-
-		# determine connection status
-		if status == True:
-
-			# process commands
-			rotator.process()
-
-			# perform cleanup
-			rotator.cleanup()
-
-			# debug
-			print('INFO: Rotator complete!')
-
-		else:
-
-			# debug
-			print('ERROR: Unable to connect to socket')
-
-	else:
+		# enable instrumentation
+		rotator.enable_stats(args.stats_file)
+	#
 
-		# debug
-		print('ERROR: Unable to connect to winegard')
+	# perform rotator until interrupted
+	try:
+		asyncio.run(rotator.run())
+	except KeyboardInterrupt:
+		print('INFO: Rotator interrupted')
+	#
 #
@@ -1,27 +1,56 @@
 
 # imports
 import os
-import argparse
+import math
 import time
-import decimal
+import argparse
 
 # imports
 from datetime import datetime
 
 # imports
-from library.map import Map
 from library.winegard import Winegard
+from library.planner import ScanPlanner
+from library.planner import AdaptivePlanner
+from library.planner import coordinate
+from library.planner import serpentine_order
+from library.settle import SettleDetector
+from library.settle import SETTLE_TOLERANCE
+from library.settle import AXIS_AZIMUTH
+from library.settle import AXIS_ELEVATION
+from library.sweep import SweepScanner
+from library.integration import AdaptiveIntegrator
+from library.integration import CONFIDENCE_Z
+from library.integration import TARGET_ERROR
+from library.integration import RSSI_INVALID
+from library.winegard import RSSI_ITERATIONS
+from library.scanfile import ScanWriter
+from library.scanfile import read_scan_data
+from library.scanfile import read_satellite_data
+from library.peaks import SatelliteIdentifier
+from library.peaks import MATCH_TOLERANCE
+from library.peaks import STATUS_MATCHED
+from library.peaks import STATUS_UNMATCHED
+from library.peaks import print_identification_data
+from library.peaks import write_identification_data
+from library.stats import CommandStats
+from library.stats import PHASE_MAP
+from library.stats import PHASE_IO
+from library.stats import PHASE_IDENTIFY
+from library.timing import ScanTimer
+from library.geo import band_mask
+from library.geo import clarke_belt
+from library.geo import BAND_WIDTH
+from library.grid import grid_index
 
 # constants
-START_DELAY = 4.0
-ANGLE_DELAY = 0.2
-SWEEP_DELAY = 1.0
-
-# constants
-RSSI_INVALID = -1
+OUTPUT_DIR = 'scan_data'
+NUM_RETRIES = 2
 
 # constants
-OUTPUT_DIR = 'scan_data'
+RSSI_THRESHOLD = 420
+GRADIENT_THRESHOLD = 10
+HOT_FRACTION = 0.1
 
 #
 # This class provides the implementation to perform a sky scan
@@ -30,6 +59,12 @@ OUTPUT_DIR = 'scan_data'
 # plot it on a heatmap in real time. It will also save this data
 # to an output file.
 #
+# The scan uses the blocking Winegard driver rather than the
+# AsyncWinegard driver of the rotator. Every point waits for its
+# own move and measurement, and the map is rendered at no more
+# than its frame rate, so the map takes a negligible share of the
+# scan time and there is little to overlap with the serial I/O.
+#
 class SkyScan:
 
 	#
@@ -42,8 +77,11 @@ class SkyScan:
 	# @param elevation_end the elevation end angle
 	# @param step_angle the step angle
 	# @param offset_angle the azimuth offset angle
+	# @param pipeline_menu the menu pipelining state
+	# @param settle_tolerance the settle tolerance in degrees
+	# @param headless the headless state, which defers the map until the scan is saved
 	#
-	def __init__(self, comm_port, azimuth_start, azimuth_end, elevation_start, elevation_end, step_angle, offset_angle):
+	def __init__(self, comm_port, azimuth_start, azimuth_end, elevation_start, elevation_end, step_angle, offset_angle, pipeline_menu=False, settle_tolerance=SETTLE_TOLERANCE, headless=False):
 
 		# set scan parameters
 		self.AZIMUTH_START = azimuth_start
@@ -51,6 +89,8 @@ class SkyScan:
 		self.ELEVATION_START = elevation_start
 		self.ELEVATION_END = elevation_end
 		self.STEP_ANGLE = step_angle
+		self.OFFSET_ANGLE = offset_angle
+		self.HEADLESS = headless
 
 		# determine start date/time
 		now = datetime.now()
@@ -59,18 +99,226 @@ class SkyScan:
 		# initialize winegard
 		self.winegard = Winegard(comm_port)
 		self.winegard.set_offset_angle(offset_angle)
+		self.winegard.set_menu_pipelining(pipeline_menu)
 
-		# initialize map
-		self.map = Map(self.AZIMUTH_START, self.AZIMUTH_END, self.ELEVATION_START, self.ELEVATION_END, self.STEP_ANGLE)
+		# initialize settle detector
+		self.settle = SettleDetector(self.winegard, settle_tolerance)
+
+		# initialize map, which is deferred until the scan is saved when headless
+		self.map = self.create_map() if self.HEADLESS == False else None
+		self.map_data = []
+
+		# initialize RSSI integrator with a fixed number of iterations
+		self.integrator = AdaptiveIntegrator(self.winegard, RSSI_ITERATIONS, max_iterations=RSSI_ITERATIONS)
+
+		# initialize planner
+		self.planner = ScanPlanner()
+
+		# initialize measured samples
+		self.samples = {}
+
+		# initialize binary output
+		self.binary_output = False
+		self.binary_file = None
+
+		# initialize output files
+		self.output_dir = OUTPUT_DIR
+
+		# initialize resume state
+		self.resumed = False
+		self.rehome = False
+		self.journal = {}
+
+		# initialize failed points
+		self.failed = {}
+
+		# initialize satellite identification
+		self.identifier = None
+		self.inner_axis = AXIS_AZIMUTH
+
+		# initialize band
+		self.band = None
+
+		# initialize instrumentation
+		self.stats = None
+		self.stats_file = None
+
+		# initialize timing, without phases unless instrumentation is enabled
+		self.timer = ScanTimer(None)
+		self.scan_mode = None
+		self.label = None
+	#
+
+	#
+	# Enables adaptive RSSI integration
+	#
+	# Each point starts with a short RSSI reading, and further
+	# readings are only requested for points near the noise
+	# floor decision boundary or with a high standard error.
+	#
+	# @param confidence_z the number of standard errors required between a point and the boundary
+	# @param target_error the target standard error of each point
+	# @param noise_floor the noise floor RSSI, or None to estimate it
+	#
+	def set_adaptive_rssi(self, confidence_z, target_error, noise_floor):
+
+		# initialize adaptive RSSI integrator
+		self.integrator = AdaptiveIntegrator(self.winegard, confidence_z=confidence_z, target_error=target_error, noise_floor=noise_floor)
+	#
+
+	#
+	# Enables binary output
+	#
+	# The scan data is also written to a binary scan data file,
+	# whose header records the scan parameters.
+	#
+	def enable_binary_output(self):
+		self.binary_output = True
+	#
+
+	#
+	# Enables satellite identification
+	#
+	# The peaks of the map are matched to the satellite catalog
+	# after each line of the scan, and the identification table is
+	# written to the output directory once the scan is complete.
+	#
+	# @param satellite_data the list of satellite data entries
+	# @param tolerance the match tolerance in degrees
+	#
+	def enable_identification(self, satellite_data, tolerance=MATCH_TOLERANCE):
+
+		# initialize satellite identifier
+		self.identifier = SatelliteIdentifier(self.AZIMUTH_START, self.AZIMUTH_END, self.ELEVATION_START, self.ELEVATION_END, self.STEP_ANGLE, satellite_data, tolerance)
+	#
+
+	#
+	# Enables instrumentation
+	#
+	# The latency of every Winegard command and the time spent
+	# updating the map, flushing the output files and identifying
+	# satellites are recorded, which splits the scan time into
+	# phases in the timing report. The statistics are printed when
+	# the process receives SIGUSR1, and are written to the
+	# specified JSON file once the scan is complete.
+	#
+	# @param file_path the statistics file path, or None to only report the phases
+	#
+	def enable_stats(self, file_path=None):
+
+		# initialize statistics
+		self.stats = CommandStats()
+		self.stats_file = file_path
+
+		# enable winegard instrumentation
+		self.winegard.enable_stats(self.stats)
+
+		# split the timing report into phases
+		self.timer.stats = self.stats
+
+		# print statistics on request
+		self.stats.install_signal_handler()
+	#
+
+	#
+	# Sets the label of the scan
+	#
+	# The label is recorded in the timing summary, such that the
+	# scans of different configurations (eg: firmware versions)
+	# can be compared.
+	#
+	# @param label the scan label
+	#
+	def set_label(self, label):
+		self.label = label
+	#
+
+	#
+	# Records the time spent in the specified phase
+	#
+	# @param phase the phase name
+	# @param start_time the phase start time, or None if instrumentation is disabled
+	#
+	def record_phase(self, phase, start_time):
+
+		# determine if instrumentation enabled
+		if start_time != None:
+
+			# record phase
+			self.stats.record_phase(phase, time.perf_counter() - start_time)
+		#
+	#
+
+	#
+	# Resumes the specified interrupted scan
+	#
+	# The data points of the interrupted scan are loaded into the
+	# map, and are skipped when the scan reaches them rather than
+	# being measured again. Data points with invalid RSSI values
+	# are measured again. The output files of the interrupted scan
+	# are appended to, such that they contain the whole scan.
+	#
+	# The scan must be performed with the same parameters as the
+	# interrupted scan, such that the same points are planned.
+	#
+	# @param file_path the data output file of the interrupted scan
+	# @param rehome the rehome state, which homes the motors before resuming
+	#
+	# @return true if successful, false otherwise
+	#
+	def resume(self, file_path, rehome=False):
+
+		# read scan data
+		status, scan_data = read_scan_data(file_path)
+
+		# determine if valid scan data
+		if status == True:
+
+			# continue the output files of the interrupted scan
+			self.output_dir = os.path.dirname(file_path)
+			self.start_time = os.path.splitext(os.path.basename(file_path))[0]
+
+			# update resume state
+			self.resumed = True
+			self.rehome = rehome
+
+			# obtain data values
+			azimuths = scan_data['azimuth'].tolist()
+			elevations = scan_data['elevation'].tolist()
+			rssis = scan_data['rssi'].tolist()
+			step_angles = [step_angle if math.isnan(step_angle) == False else self.STEP_ANGLE for step_angle in scan_data['step'].tolist()]
+
+			# loop through data points, where later data points replace earlier ones
+			for azimuth, elevation, rssi in zip(azimuths, elevations, rssis):
+
+				# determine if valid value
+				if rssi != RSSI_INVALID:
+					self.journal[coordinate(azimuth, elevation)] = rssi
+				else:
+					self.journal.pop(coordinate(azimuth, elevation), None)
+				#
+			#
+
+			# update map data
+			self.update_map_batch(azimuths, elevations, rssis, step_angles)
+
+			# debug
+			print(f'INFO: Resuming scan with {len(self.journal)} measured points')
+		#
+
+		# return the status
+		return status
 	#
 
 	#
 	# Performs setup
 	#
-	# This method opens the data output file and connects to the
+	# This method opens the data and log output files and connects to the
 	# Winegard satellite dish. It then commands the Winegard
 	# satellite dish to enable the LNA and move to the starting
-	# azimuth/elevation position.
+	# azimuth/elevation position. When resuming, the motors are
+	# homed if requested and the position is verified instead, and
+	# the scan continues from the first missing point.
 	#
 	# @return true if successful, false otherwise
 	#
@@ -83,14 +331,32 @@ class SkyScan:
 		status = False
 
 		# create output directory
-		os.makedirs(OUTPUT_DIR, exist_ok=True)
+		os.makedirs(self.output_dir, exist_ok=True)
+
+		# determine file mode, which appends to the files of a resumed scan
+		mode = 'a' if self.resumed == True else 'w'
 
 		# initialize file path
 		file_name = f'{self.start_time}.txt'
-		file_path = os.path.join(OUTPUT_DIR, file_name)
+		file_path = os.path.join(self.output_dir, file_name)
 
 		# open output file
-		self.output_file = open(file_path, 'w')
+		self.output_file = open(file_path, mode)
+
+		# open log file
+		log_file_path = os.path.join(self.output_dir, f'{self.start_time}.log')
+		self.log_file = open(log_file_path, mode)
+
+		# determine if binary output enabled
+		if self.binary_output == True:
+
+			# open binary file
+			binary_file_path = os.path.join(self.output_dir, f'{self.start_time}.scan')
+			self.binary_file = ScanWriter(binary_file_path, self.binary_header(), append=self.resumed)
+		#
+
+		# determine scan start time
+		self.scan_time = time.monotonic()
 
 		# determine if valid file
 		if self.output_file != None:
@@ -107,14 +373,30 @@ class SkyScan:
 				status3 = self.winegard.enable_dvb_lna()
 				status4 = self.winegard.quit_dvb_menu()
 				status5 = self.winegard.enter_motor_menu()
-				status6 = self.winegard.set_azimuth_motor_angle(self.AZIMUTH_START)
-				status7 = self.winegard.set_elevation_motor_angle(self.ELEVATION_START)
 
-				# wait for motor movement to complete
-				time.sleep(START_DELAY)
+				# determine if resuming
+				if self.resumed == True:
+
+					# verify the position
+					status6 = self.verify_position()
+					status7 = True
+					status8 = True
+
+				else:
+
+					# move to the start position
+					status6 = self.winegard.set_azimuth_motor_angle(self.AZIMUTH_START)
+					status7 = self.winegard.set_elevation_motor_angle(self.ELEVATION_START)
+
+					# wait for motor movement to complete
+					status8, settle_time = self.settle.wait(self.AZIMUTH_START, self.ELEVATION_START)
+
+					# debug
+					print(f'INFO: Start position reached in {settle_time:.2f} seconds')
+				#
 
 				# update status
-				status = status1 and status2 and status3 and status4 and status5 and status6 and status7
+				status = status1 and status2 and status3 and status4 and status5 and status6 and status7 and status8
 
 			else:
 
@@ -131,6 +413,52 @@ class SkyScan:
 		return status
 	#
 
+	#
+	# Verifies the position before resuming
+	#
+	# The motors are homed first if requested. The motor angles
+	# are then read back to confirm that the dish reports its
+	# position. The first move of the resumed scan is always
+	# polled until the target is reached.
+	#
+	# @return true if successful, false otherwise
+	#
+	def verify_position(self):
+
+		# initialize status
+		status = True
+
+		# determine if rehoming
+		if self.rehome == True:
+
+			# debug
+			print('INFO: Homing motors; winegard will spin')
+
+			# home motors
+			status1 = self.winegard.home_azimuth_motor()
+			status2 = self.winegard.home_elevation_motor()
+			status = status1 and status2
+		#
+
+		# obtain the motor angles
+		status3, data = self.winegard.get_motor_angle_data()
+
+		# determine if valid angle data
+		if status3 == True:
+
+			# debug
+			print(f'INFO: Resuming from Az={data["azimuth_angle"]}, El={data["elevation_angle"]}')
+
+		else:
+
+			# debug
+			print('ERROR: Unable to verify position')
+		#
+
+		# return the status
+		return status and status3
+	#
+
 	#
 	# Performs show
 	#
@@ -139,100 +467,777 @@ class SkyScan:
 	#
 	def show_map(self):
 
-		# debug
-		print('INFO: Performing show')
+		# determine if map created
+		if self.map != None:
 
-		# show the map
-		self.map.show()
+			# debug
+			print('INFO: Performing show')
+
+			# show the map
+			self.map.show()
+		#
+	#
+
+	#
+	# Creates the map
+	#
+	# The map module imports pyplot, so it is only imported when
+	# the map is created. When headless, the Agg backend is
+	# selected such that no display is required.
+	#
+	# @return the map
+	#
+	def create_map(self):
+
+		# imports
+		import matplotlib
+
+		# determine if headless
+		if self.HEADLESS == True:
+			matplotlib.use('Agg')
+		#
+
+		# imports
+		from library.map import Map
+
+		# initialize map
+		map = Map(self.AZIMUTH_START, self.AZIMUTH_END, self.ELEVATION_START, self.ELEVATION_END, self.STEP_ANGLE)
+
+		# determine if band scan
+		if self.band != None:
+
+			# mask the map outside of the band
+			self.set_map_band(map)
+		#
+
+		# return the map
+		return map
+	#
+
+	#
+	# Sets the band of a band scan on the supplied map
+	#
+	# The map points outside of the band are masked and the
+	# geostationary arc is drawn.
+	#
+	# @param map the map
+	#
+	def set_map_band(self, map):
+
+		# set band
+		map.set_mask(self.band['mask'] == False, redraw=False)
+		map.set_arc(*self.band['arc'], redraw=map.shown)
+	#
+
+	#
+	# Updates the specified data point on the map
+	#
+	# When headless, the data point is recorded such that the map
+	# can be rendered once the scan is saved.
+	#
+	# @param azimuth the azimuth angle
+	# @param elevation the elevation angle
+	# @param rssi the signal strength
+	# @param step_angle the step angle of the data point
+	# @param redraw the redraw state
+	#
+	def update_map(self, azimuth, elevation, rssi, step_angle, redraw=True):
+
+		# determine start time if instrumentation enabled
+		start_time = time.perf_counter() if self.stats != None else None
+
+		# determine if map created
+		if self.map != None:
+
+			# update map data
+			self.map.set_data(azimuth, elevation, rssi, redraw=redraw, step_angle=step_angle)
+
+		else:
+
+			# record map data
+			self.map_data.append((azimuth, elevation, rssi, step_angle))
+		#
+
+		# determine if satellite identification enabled
+		if self.identifier != None:
+
+			# update identification data
+			self.identifier.set_data_batch([azimuth], [elevation], [rssi], [step_angle])
+		#
+
+		# record map time
+		self.record_phase(PHASE_MAP, start_time)
+	#
+
+	#
+	# Updates the specified data points on the map
+	#
+	# When headless, the data points are recorded such that the
+	# map can be rendered once the scan is saved.
+	#
+	# @param azimuths the azimuth angles
+	# @param elevations the elevation angles
+	# @param rssis the signal strengths
+	# @param step_angles the step angles of the data points
+	#
+	def update_map_batch(self, azimuths, elevations, rssis, step_angles):
+
+		# determine if map created
+		if self.map != None:
+
+			# update map data
+			self.map.set_data_batch(azimuths, elevations, rssis, redraw=False, step_angles=step_angles)
+
+		else:
+
+			# record map data
+			self.map_data.extend(zip(azimuths, elevations, rssis, step_angles))
+		#
+
+		# determine if satellite identification enabled
+		if self.identifier != None:
+
+			# update identification data
+			self.identifier.set_data_batch(azimuths, elevations, rssis, step_angles)
+		#
 	#
 
 	#
 	# Performs scan
 	#
-	# This method commands the Winegard satellite dish to each
-	# azimuth/elevation position and captures the average RSSI
-	# signal strength. It then updates the corresponding point
-	# on the map and writes the values to the data output file.
+	# This method plans a serpentine path through the region of
+	# interest and scans each point along the path.
 	#
 	def scan(self):
 
 		# debug
 		print('INFO: Performing scan...')
 
-		# loop through azimuth angles
-		for azimuth in self.drange(self.AZIMUTH_START, self.AZIMUTH_END, self.STEP_ANGLE):
+		# plan scan path
+		points, inner_axis = self.planner.plan(self.AZIMUTH_START, self.AZIMUTH_END, self.ELEVATION_START, self.ELEVATION_END, self.STEP_ANGLE)
+
+		# debug
+		print(f'INFO: Scan plan has {len(points)} points with {inner_axis} inner axis')
+
+		# set inner axis
+		self.inner_axis = inner_axis
+
+		# start timing
+		self.scan_mode = 'points'
+		self.timer.start(self.count_unmeasured(points))
+
+		# scan points
+		self.scan_points(points, self.STEP_ANGLE)
+
+		# complete scan
+		self.finish_scan()
+	#
+
+	#
+	# Performs band scan
+	#
+	# This method plans a serpentine path through the region of
+	# interest as the scan does, and only scans the points within
+	# the band around the geostationary (Clarke belt) arc of the
+	# observer, where every geostationary satellite is. The points
+	# outside of the band are masked on the map.
+	#
+	# @param latitude the observer geodetic latitude in degrees
+	# @param longitude the observer longitude in degrees east
+	# @param altitude the observer altitude in meters
+	# @param band_width the full width of the band in degrees
+	#
+	def scan_band(self, latitude, longitude, altitude=0.0, band_width=BAND_WIDTH):
+
+		# debug
+		print('INFO: Performing band scan...')
+
+		# plan scan path
+		points, inner_axis = self.planner.plan(self.AZIMUTH_START, self.AZIMUTH_END, self.ELEVATION_START, self.ELEVATION_END, self.STEP_ANGLE)
+
+		# determine the band
+		mask = band_mask(self.AZIMUTH_START, self.AZIMUTH_END, self.ELEVATION_START, self.ELEVATION_END, self.STEP_ANGLE, latitude, longitude, altitude, band_width)
+		self.band = {'mask': mask, 'arc': clarke_belt(latitude, longitude, altitude), 'latitude': latitude, 'longitude': longitude, 'altitude': altitude, 'width': band_width}
+
+		# obtain the points of the path within the band, which keeps the path order
+		x_pos, y_pos = grid_index([point[0] for point in points], [point[1] for point in points], self.AZIMUTH_START, self.ELEVATION_END, self.STEP_ANGLE)
+		band_points = [point for point, in_band in zip(points, mask[y_pos, x_pos]) if in_band == True]
+
+		# debug
+		print(f'INFO: Band scan has {len(band_points)} points within {band_width / 2} degrees of the Clarke belt, with {inner_axis} inner axis')
+		print(f'INFO: Full grid: {len(points)} points in {self.planner.scan_time(points)/3600:.1f} hours, band: {len(band_points)} points in {self.planner.scan_time(band_points)/3600:.1f} hours ({len(points) / max(len(band_points), 1):.1f}x fewer points)')
+
+		# determine if map created
+		if self.map != None:
+
+			# mask the map outside of the band
+			self.set_map_band(self.map)
+		#
+
+		# set inner axis
+		self.inner_axis = inner_axis
+
+		# start timing
+		self.scan_mode = 'band'
+		self.timer.start(self.count_unmeasured(band_points))
 
-			# position azimuth motor
-			self.winegard.set_azimuth_motor_angle(azimuth)
+		# scan points
+		self.scan_points(band_points, self.STEP_ANGLE)
 
-			# loop through elevation angles
-			for elevation in self.drange(self.ELEVATION_START, self.ELEVATION_END, self.STEP_ANGLE):
+		# complete scan
+		self.finish_scan()
+	#
+
+	#
+	# Performs adaptive scan
+	#
+	# This method first scans the region of interest at the
+	# coarse step angle. The neighborhoods of the hot points of
+	# each pass are then rescanned at half of the step angle
+	# until the scan step angle is reached.
+	#
+	# @param coarse_angle the coarse step angle
+	# @param rssi_threshold the hot point RSSI threshold
+	# @param gradient_threshold the hot point RSSI gradient threshold
+	#
+	def scan_adaptive(self, coarse_angle, rssi_threshold=RSSI_THRESHOLD, gradient_threshold=GRADIENT_THRESHOLD):
+
+		# debug
+		print('INFO: Performing adaptive scan...')
 
-				# position elevation motor
-				self.winegard.set_elevation_motor_angle(elevation)
+		# initialize adaptive planner
+		adaptive = AdaptivePlanner(self.planner, self.AZIMUTH_START, self.AZIMUTH_END, self.ELEVATION_START, self.ELEVATION_END, self.STEP_ANGLE, coarse_angle, rssi_threshold, gradient_threshold)
 
-				# wait for motor movement to complete
-				time.sleep(ANGLE_DELAY)
+		# estimate savings
+		self.print_estimate(adaptive, HOT_FRACTION)
 
-				# open DVB menu
-				self.winegard.quit_motor_menu()
-				self.winegard.enter_dvb_menu()
+		# plan coarse pass
+		points, inner_axis = adaptive.plan_coarse()
+		pass_points = points
 
-				# initialize values
-				rssi = RSSI_INVALID
+		# set inner axis
+		self.inner_axis = inner_axis
 
-				# obtain RSSI data
-				status, data = self.winegard.get_dvb_rssi_data()
+		# start timing
+		self.scan_mode = 'adaptive'
+		self.timer.start(self.count_unmeasured(points))
 
-				# determine if valid RSSI data
-				if status == True:
+		# initialize point count
+		num_points = 0
 
-					# obtain RSSI data values
-					rssi = data['rssi_avg']
+		# loop through passes
+		for index, step_angle in enumerate(adaptive.steps):
+
+			# determine if refinement pass
+			if index > 0:
+
+				# plan refinement pass
+				points, hot_points = adaptive.plan_refinement(self.samples, pass_points, adaptive.steps[index-1], inner_axis)
+				pass_points = points + hot_points
+
+				# determine if coarse pass
+				if index == 1:
+
+					# update estimate with the measured hot fraction
+					self.print_estimate(adaptive, len(hot_points) / max(len(self.samples), 1))
 				#
 
-				# debug
-				print(f'INFO: Az={azimuth}, El={elevation}, RSSI={rssi}')
+				# update the plan of the timing
+				self.timer.plan(self.count_unmeasured(points))
+			#
 
-				# update map data
-				self.map.set_data(azimuth, elevation, rssi)
+			# debug
+			print(f'INFO: Scanning {len(points)} points at {step_angle} degrees')
 
-				# write to file
-				self.output_file.write(f'{azimuth} {elevation} {rssi}\n')
+			# scan points
+			self.scan_points(points, step_angle)
+
+			# update point count
+			num_points += len(points)
+		#
+
+		# determine full grid point count
+		estimate_data = adaptive.estimate(0)
+
+		# debug
+		print(f'INFO: Adaptive scan measured {num_points} of {estimate_data["full_points"]} points')
+
+		# complete scan
+		self.finish_scan()
+	#
+
+	#
+	# Performs continuous scan
+	#
+	# This method plans a serpentine path through the region of
+	# interest and sweeps each line of the path without stopping,
+	# streaming RSSI readings while the dish moves. The readings
+	# are binned onto the points of each line, which are then
+	# added to the map and written to the data output file.
+	#
+	def scan_continuous(self):
+
+		# debug
+		print('INFO: Performing continuous scan...')
 
-				# open motor menu
-				self.winegard.quit_dvb_menu()
-				self.winegard.enter_motor_menu()
+		# plan scan path
+		points, inner_axis = self.planner.plan(self.AZIMUTH_START, self.AZIMUTH_END, self.ELEVATION_START, self.ELEVATION_END, self.STEP_ANGLE)
+
+		# initialize sweep scanner
+		sweep = SweepScanner(self.winegard, self.settle)
+
+		# start timing
+		self.scan_mode = 'continuous'
+		self.timer.start(self.count_unmeasured(points))
+
+		# loop through lines
+		for line in split_lines(points, inner_axis):
+
+			# determine if line measured by the resumed scan
+			if all(coordinate(azimuth, elevation) in self.journal for azimuth, elevation in line) == True:
+
+				# update samples
+				for azimuth, elevation in line:
+					self.samples[coordinate(azimuth, elevation)] = self.journal[coordinate(azimuth, elevation)]
+				#
+
+				# skip line
+				continue
+			#
+
+			# sweep line
+			values, num_readings = sweep.sweep(line)
+
+			# debug
+			print(f'INFO: Swept {line[0]} to {line[-1]} with {num_readings} readings')
+
+			# loop through line points
+			for index, ((azimuth, elevation), (rssi, count)) in enumerate(zip(line, values)):
+
+				# update samples
+				self.samples[coordinate(azimuth, elevation)] = rssi
+				self.update_failed(azimuth, elevation, rssi, self.STEP_ANGLE)
+
+				# update map data, redrawing once per line
+				self.update_map(azimuth, elevation, rssi, self.STEP_ANGLE, redraw=index == len(line) - 1)
+
+				# write to file
+				self.write_data(azimuth, elevation, rssi, self.STEP_ANGLE, count * sweep.ITERATIONS)
 			#
 
 			# flush the file data
-			self.output_file.flush()
+			self.flush_data()
+
+			# update timing
+			self.timer.update(len(line))
+
+			# identify the satellites of the completed line
+			self.identify_satellites()
+		#
+
+		# complete scan
+		self.finish_scan()
+	#
+
+	#
+	# Scans the supplied points
+	#
+	# This method commands the Winegard satellite dish to each
+	# azimuth/elevation position in order and captures the
+	# average RSSI signal strength. It then updates the
+	# corresponding point on the map and writes the values to the
+	# data output file. Points measured by a resumed scan are
+	# skipped.
+	#
+	# @param points the ordered list of (azimuth, elevation) points
+	# @param step_angle the step angle of the points
+	#
+	def scan_points(self, points, step_angle):
+
+		# determine the outer coordinate index
+		outer_index = 1 if self.inner_axis == AXIS_AZIMUTH else 0
+
+		# loop through scan points
+		for index, (azimuth, elevation) in enumerate(points):
+
+			# determine if measured by the resumed scan
+			if coordinate(azimuth, elevation) in self.journal:
+
+				# update samples
+				self.samples[coordinate(azimuth, elevation)] = self.journal[coordinate(azimuth, elevation)]
+
+				# skip point
+				continue
+			#
+
+			# position motors
+			status, settle_data = self.settle.move(azimuth, elevation)
+
+			# determine if positioned
+			if status == True:
+
+				# obtain the first RSSI data once the predicted settle time has elapsed
+				status, data = self.winegard.move_and_measure(azimuth, elevation, settle_data['wait_time'], self.integrator.INITIAL_ITERATIONS)
+
+				# integrate RSSI data
+				rssi, num_samples = self.integrator.integrate(status, data)
+
+			else:
+
+				# the point is retried once the scan is complete
+				rssi, num_samples = RSSI_INVALID, 0
+			#
+
+			# debug
+			print(f'INFO: Az={azimuth}, El={elevation}, RSSI={rssi}, Samples={num_samples}')
+
+			# update samples
+			self.samples[coordinate(azimuth, elevation)] = rssi
+			self.update_failed(azimuth, elevation, rssi, step_angle)
+
+			# update map data
+			self.update_map(azimuth, elevation, rssi, step_angle)
+
+			# write to file
+			self.write_data(azimuth, elevation, rssi, step_angle, num_samples)
+
+			# write settle time to log
+			self.write_settle_log(azimuth, elevation, settle_data)
+
+			# commit the data point to the journal
+			self.flush_data()
+
+			# update timing
+			self.timer.update()
+
+			# determine if the line is complete
+			if index == len(points) - 1 or points[index+1][outer_index] != points[index][outer_index]:
+
+				# identify the satellites of the completed line
+				self.identify_satellites()
+			#
+		#
+	#
+
+	#
+	# Identifies the satellites of the map
+	#
+	# @param final the final state, which prints and writes the identification table
+	#
+	def identify_satellites(self, final=False):
+
+		# determine if satellite identification enabled
+		if self.identifier != None:
 
-			# position elevation motor
-			self.winegard.set_elevation_motor_angle(self.ELEVATION_START)
+			# identify satellites
+			start_time = time.perf_counter() if self.stats != None else None
+			identification_data = self.identifier.identify()
+			self.record_phase(PHASE_IDENTIFY, start_time)
 
-			# wait for motor movement to complete
-			time.sleep(SWEEP_DELAY)
+			# determine the number of matched satellites and unmatched peaks
+			num_matched = sum(1 for entry in identification_data if entry[0] == STATUS_MATCHED)
+			num_unmatched = sum(1 for entry in identification_data if entry[0] == STATUS_UNMATCHED)
+
+			# debug
+			print(f'INFO: Identified {num_matched} satellites, {num_unmatched} unmatched peaks')
+
+			# determine if final
+			if final == True:
+
+				# debug
+				print_identification_data(identification_data)
+
+				# write identification data
+				write_identification_data(os.path.join(self.output_dir, f'{self.start_time}_satellites.csv'), identification_data)
+			#
+		#
+	#
+
+	#
+	# Updates the failed points
+	#
+	# @param azimuth the azimuth angle
+	# @param elevation the elevation angle
+	# @param rssi the signal strength
+	# @param step_angle the step angle of the point
+	#
+	def update_failed(self, azimuth, elevation, rssi, step_angle):
+
+		# determine if valid value
+		if rssi == RSSI_INVALID:
+			self.failed[coordinate(azimuth, elevation)] = step_angle
+		else:
+			self.failed.pop(coordinate(azimuth, elevation), None)
+		#
+	#
+
+	#
+	# Retries the failed points
+	#
+	# Points whose RSSI could not be measured are scanned again
+	# once the scan is complete, rather than leaving holes in the
+	# map. Failed points are retried up to the retry limit.
+	#
+	def retry_failed(self):
+
+		# loop through retries
+		for retry in range(NUM_RETRIES):
+
+			# determine if any failed points
+			if len(self.failed) == 0:
+				break
+			#
+
+			# debug
+			print(f'INFO: Retrying {len(self.failed)} failed points')
+
+			# loop through the step angles of the failed points, coarsest first
+			for step_angle in sorted(set(self.failed.values()), reverse=True):
+
+				# determine the failed points of the step angle
+				points = serpentine_order({point for point, angle in self.failed.items() if angle == step_angle}, AXIS_AZIMUTH)
+
+				# update the plan of the timing
+				self.timer.plan(len(points))
+
+				# set inner axis
+				self.inner_axis = AXIS_AZIMUTH
+
+				# scan points
+				self.scan_points(points, step_angle)
+			#
+		#
+
+		# determine if any failed points
+		if len(self.failed) > 0:
+
+			# debug
+			print(f'WARNING: {len(self.failed)} points could not be measured')
+		#
+	#
+
+	#
+	# Completes the scan
+	#
+	# This method retries the failed points, logs the learned slew
+	# rates and returns the Winegard satellite dish to the main
+	# menu.
+	#
+	def finish_scan(self):
+
+		# retry failed points
+		self.retry_failed()
+
+		# identify satellites
+		self.identify_satellites(final=True)
+
+		# debug
+		self.timer.print_summary()
+
+		# write timing summary
+		self.timer.write(os.path.join(self.output_dir, f'{self.start_time}_timing.json'), self.scan_config())
+
+		# loop through axes
+		for axis in (AXIS_AZIMUTH, AXIS_ELEVATION):
+
+			# obtain learned slew rate
+			slew_rate = self.settle.slew_rate(axis)
+
+			# debug
+			print(f'INFO: Learned {axis} slew rate: {slew_rate} deg/s')
+
+			# write slew rate to log
+			self.log_file.write(f'# {axis} slew rate {slew_rate}\n')
 		#
 
 		# open main menu
 		self.winegard.quit_menu()
 	#
 
+	#
+	# Counts the supplied points which are not measured yet
+	#
+	# Points measured by a resumed scan are skipped, so they are
+	# excluded from the plan of the timing.
+	#
+	# @param points the list of (azimuth, elevation) points
+	#
+	# @return the number of points
+	#
+	def count_unmeasured(self, points):
+		return sum(1 for azimuth, elevation in points if coordinate(azimuth, elevation) not in self.journal)
+	#
+
+	#
+	# Determines the configuration of the scan
+	#
+	# @return the configuration dictionary
+	#
+	def scan_config(self):
+		return {	'label': self.label,
+					'start_time': self.start_time,
+					'mode': self.scan_mode,
+					'azimuth_start': self.AZIMUTH_START,
+					'azimuth_end': self.AZIMUTH_END,
+					'elevation_start': self.ELEVATION_START,
+					'elevation_end': self.ELEVATION_END,
+					'step_angle': self.STEP_ANGLE,
+					'offset_angle': self.OFFSET_ANGLE,
+					'pipeline_menu': self.winegard.PIPELINE_MENU,
+					'settle_tolerance': self.settle.TOLERANCE,
+					'rssi_iterations': [self.integrator.INITIAL_ITERATIONS, self.integrator.MAX_ITERATIONS],
+					'headless': self.HEADLESS,
+					'resumed': self.resumed,
+					'band': {key: self.band[key] for key in ('latitude', 'longitude', 'altitude', 'width')} if self.band != None else None }
+	#
+
+	#
+	# Prints the adaptive scan estimate
+	#
+	# @param adaptive the adaptive planner
+	# @param hot_fraction the fraction of the region which is hot
+	#
+	def print_estimate(self, adaptive, hot_fraction):
+
+		# estimate savings
+		estimate_data = adaptive.estimate(hot_fraction)
+
+		# determine savings
+		saved_points = estimate_data['full_points'] - estimate_data['points']
+		saved_time = estimate_data['full_time'] - estimate_data['time']
+
+		# debug
+		print(f'INFO: Estimate for hot fraction {hot_fraction:.2f}: {estimate_data["points"]} points in {estimate_data["time"]/3600:.1f} hours')
+		print(f'INFO: Full grid: {estimate_data["full_points"]} points in {estimate_data["full_time"]/3600:.1f} hours')
+		print(f'INFO: Estimated savings: {saved_points} points and {saved_time/3600:.1f} hours')
+	#
+
+	#
+	# Writes a data point to the data output files
+	#
+	# @param azimuth the azimuth angle
+	# @param elevation the elevation angle
+	# @param rssi the signal strength
+	# @param step_angle the step angle of the data point
+	# @param num_samples the number of RSSI samples
+	#
+	def write_data(self, azimuth, elevation, rssi, step_angle, num_samples):
+
+		# determine start time if instrumentation enabled
+		start_time = time.perf_counter() if self.stats != None else None
+
+		# write to file
+		self.output_file.write(f'{azimuth} {elevation} {rssi} {step_angle} {num_samples}\n')
+
+		# determine if binary output enabled
+		if self.binary_file != None:
+
+			# write to binary file
+			self.binary_file.write(azimuth, elevation, rssi, step_angle, num_samples, time.monotonic() - self.scan_time)
+		#
+
+		# record file I/O time
+		self.record_phase(PHASE_IO, start_time)
+	#
+
+	#
+	# Flushes the data output files
+	#
+	# The data is synced to the disk, such that the data output
+	# files are a durable journal of the measured points which an
+	# interrupted scan can be resumed from.
+	#
+	def flush_data(self):
+
+		# determine start time if instrumentation enabled
+		start_time = time.perf_counter() if self.stats != None else None
+
+		# flush the file data
+		self.output_file.flush()
+		os.fsync(self.output_file.fileno())
+
+		# determine if binary output enabled
+		if self.binary_file != None:
+
+			# flush the binary file data
+			self.binary_file.flush()
+		#
+
+		# record file I/O time
+		self.record_phase(PHASE_IO, start_time)
+	#
+
+	#
+	# Determines the header of the binary scan data file
+	#
+	# @return the header dictionary
+	#
+	def binary_header(self):
+
+		# return the scan parameters
+		return {	'start_time': self.start_time,
+					'azimuth_start': self.AZIMUTH_START,
+					'azimuth_end': self.AZIMUTH_END,
+					'elevation_start': self.ELEVATION_START,
+					'elevation_end': self.ELEVATION_END,
+					'step_angle': self.STEP_ANGLE,
+					'offset_angle': self.OFFSET_ANGLE,
+					'rssi_iterations': self.integrator.INITIAL_ITERATIONS,
+					'max_rssi_iterations': self.integrator.MAX_ITERATIONS }
+	#
+
+	#
+	# Writes the settle data of a point to the log file
+	#
+	# Each log line consists of the azimuth, elevation, settle
+	# time in seconds, and whether the settle time was polled
+	# or predicted.
+	#
+	# @param azimuth the azimuth angle
+	# @param elevation the elevation angle
+	# @param settle_data the settle data
+	#
+	def write_settle_log(self, azimuth, elevation, settle_data):
+
+		# determine settle values
+		settle_time = settle_data['settle_time']
+		mode = 'polled' if settle_data['polled'] == True else 'predicted'
+
+		# write to log
+		self.log_file.write(f'{azimuth} {elevation} {settle_time:.3f} {mode}\n')
+	#
+
 	#
 	# Performs save
 	#
 	# This method saves an image of the map to the output
-	# directory.
+	# directory. When headless, the map is rendered from the
+	# recorded data points, coarse data points first such that
+	# finer data points replace them.
 	#
 	def save_map(self):
 
 		# debug
 		print('INFO: Performing save')
 
+		# determine if map deferred
+		if self.map == None:
+
+			# create map
+			self.map = self.create_map()
+
+			# determine if any recorded data points
+			if len(self.map_data) > 0:
+
+				# update map data
+				azimuths, elevations, rssis, step_angles = zip(*self.map_data)
+				self.map.set_data_batch(azimuths, elevations, rssis, redraw=False, step_angles=step_angles)
+			#
+		#
+
 		# initialize file path
 		file_name = f'{self.start_time}.png'
-		file_path = os.path.join(OUTPUT_DIR, file_name)
+		file_path = os.path.join(self.output_dir, file_name)
 
 		# save the map
 		self.map.save(file_path)
@@ -249,30 +1254,64 @@ class SkyScan:
 		# debug
 		print('INFO: Performing cleanup')
 
-		# close output file
+		# close output files
 		self.output_file.close()
+		self.log_file.close()
+
+		# determine if binary output enabled
+		if self.binary_file != None:
+
+			# close binary file
+			self.binary_file.close()
+		#
+
+		# determine if statistics output enabled
+		if self.stats_file != None:
+
+			# debug
+			self.stats.print_summary()
+
+			# write statistics
+			self.stats.dump(self.stats_file)
+		#
 
 		# disconnect winegard
 		self.winegard.disconnect()
 	#
+#
 
-	# HELPER
+# HELPER
 
-	#
-	# Generates list of decimal numbers
-	#
-	# @param x the list start value
-	# @param y the list end value
-	# @param jump the jump value
-	#
-	# @return the list of decimal numbers
-	#
-	def drange(self, x, y, jump):
-		while x <= y:
-			yield float(x)
-			x += decimal.Decimal(jump)
+#
+# Splits a serpentine path into its lines
+#
+# @param points the ordered list of (azimuth, elevation) points
+# @param inner_axis the inner axis
+#
+# @return the list of lines, where each line is an ordered list of points
+#
+def split_lines(points, inner_axis):
+
+	# determine the outer coordinate index
+	outer_index = 1 if inner_axis == AXIS_AZIMUTH else 0
+
+	# initialize lines
+	lines = []
+
+	# loop through points
+	for point in points:
+
+		# determine if new line
+		if len(lines) == 0 or lines[-1][-1][outer_index] != point[outer_index]:
+			lines.append([])
 		#
+
+		# append point
+		lines[-1].append(point)
 	#
+
+	# return the lines
+	return lines
 #
 
 # MAIN
@@ -297,15 +1336,103 @@ if __name__ == "__main__":
 	parser.add_argument("--elevation_end", type=int, action="store", required=True, help="The elevation end angle in degrees")
 	parser.add_argument("--step_angle", type=float, action="store", required=True, help="The step angle in degrees")
 	parser.add_argument("--offset_angle", type=int, default=0, action="store", required=False, help="The azimuth offset angle in degrees")
+	parser.add_argument("--pipeline_menu", action="store_true", required=False, help="Send the commands of each menu change in a single round trip")
+	parser.add_argument("--settle_tolerance", type=float, default=SETTLE_TOLERANCE, action="store", required=False, help="The motor settle tolerance in degrees")
+	parser.add_argument("--continuous", action="store_true", required=False, help="Sweep each line without stopping at each point")
+	parser.add_argument("--adaptive_rssi", action="store_true", required=False, help="Request more RSSI samples only for points near the noise floor boundary or with high variance")
+	parser.add_argument("--rssi_confidence", type=float, default=CONFIDENCE_Z, action="store", required=False, help="The number of standard errors required between a point and the noise floor boundary")
+	parser.add_argument("--rssi_target_error", type=float, default=TARGET_ERROR, action="store", required=False, help="The target standard error of each point")
+	parser.add_argument("--noise_floor", type=float, action="store", required=False, help="The noise floor RSSI, estimated from the scan if not supplied")
+	parser.add_argument("--coarse_angle", type=float, action="store", required=False, help="The coarse step angle in degrees, which enables the adaptive scan")
+	parser.add_argument("--rssi_threshold", type=float, default=RSSI_THRESHOLD, action="store", required=False, help="The adaptive scan hot point RSSI threshold")
+	parser.add_argument("--gradient_threshold", type=float, default=GRADIENT_THRESHOLD, action="store", required=False, help="The adaptive scan hot point RSSI gradient threshold")
+	parser.add_argument("--latitude", type=float, action="store", required=False, help="The observer latitude in degrees, which with the longitude enables the band scan around the Clarke belt")
+	parser.add_argument("--longitude", type=float, action="store", required=False, help="The observer longitude in degrees east")
+	parser.add_argument("--altitude", type=float, default=0.0, action="store", required=False, help="The observer altitude in meters")
+	parser.add_argument("--band_width", type=float, default=BAND_WIDTH, action="store", required=False, help="The full width of the band around the Clarke belt in degrees")
+	parser.add_argument("--headless", action="store_true", required=False, help="Scan without a display, rendering the map image once the scan is complete")
+	parser.add_argument("--no_image", action="store_true", required=False, help="Don't render the map image of a headless scan")
+	parser.add_argument("--binary_output", action="store_true", required=False, help="Also write the scan data to a binary scan data file")
+	parser.add_argument("--resume", action="store", required=False, help="The data output file of an interrupted scan to resume")
+	parser.add_argument("--rehome", action="store_true", required=False, help="Home the motors before resuming an interrupted scan")
+	parser.add_argument("--satellite_file", action="store", required=False, help="The satellite data file path, which enables satellite identification after each line")
+	parser.add_argument("--stats_file", action="store", required=False, help="The JSON file path of the command latency statistics, which enables instrumentation")
+	parser.add_argument("--timing", action="store_true", required=False, help="Enable instrumentation to split the timing summary into phases, without writing the statistics")
+	parser.add_argument("--label", action="store", required=False, help="The label of the scan in the timing summary (eg: the firmware version)")
+	parser.add_argument("--match_tolerance", type=float, default=MATCH_TOLERANCE, action="store", required=False, help="The satellite identification match tolerance in degrees")
 
 	# parse arguments
 	args = parser.parse_args()
 
+	# determine if the observer location is incomplete
+	if (args.latitude == None) != (args.longitude == None):
+		parser.error('the band scan requires both --latitude and --longitude')
+	#
+
+	# determine if conflicting scan modes requested
+	if args.continuous == True and args.coarse_angle != None:
+		parser.error('--continuous can not be combined with --coarse_angle')
+	#
+	if args.latitude != None and args.continuous == True:
+		parser.error('the band scan (--latitude/--longitude) can not be combined with --continuous')
+	#
+	if args.latitude != None and args.coarse_angle != None:
+		parser.error('the band scan (--latitude/--longitude) can not be combined with --coarse_angle')
+	#
+
 	# initialize sky scan
-	skyscan = SkyScan(args.comm_port, args.azimuth_start, args.azimuth_end, args.elevation_start, args.elevation_end, args.step_angle, args.offset_angle)
+	skyscan = SkyScan(args.comm_port, args.azimuth_start, args.azimuth_end, args.elevation_start, args.elevation_end, args.step_angle, args.offset_angle, args.pipeline_menu, args.settle_tolerance, args.headless)
+
+	# determine if adaptive RSSI integration requested
+	if args.adaptive_rssi == True:
+
+		# enable adaptive RSSI integration
+		skyscan.set_adaptive_rssi(args.rssi_confidence, args.rssi_target_error, args.noise_floor)
+	#
+
+	# determine if binary output requested
+	if args.binary_output == True:
+
+		# enable binary output
+		skyscan.enable_binary_output()
+	#
+
+	# determine if instrumentation requested
+	if args.stats_file != None or args.timing == True:
+
+		# enable instrumentation
+		skyscan.enable_stats(args.stats_file)
+	#
+
+	# set the scan label
+	skyscan.set_label(args.label)
+
+	# determine if satellite identification requested
+	if args.satellite_file != None:
+
+		# enable satellite identification
+		skyscan.enable_identification(read_satellite_data(args.satellite_file), args.match_tolerance)
+	#
+
+	# initialize status
+	status = True
+
+	# determine if resume requested
+	if args.resume != None:
+
+		# resume interrupted scan
+		status = skyscan.resume(args.resume, args.rehome)
+
+		# determine resume status
+		if status == False:
+
+			# debug
+			print('ERROR: Unable to read the interrupted scan data')
+		#
+	#
 
 	# perform setup
-	status = skyscan.setup()
+	status = status and skyscan.setup()
 
 	# determine setup status
 	if status == True:
@@ -313,11 +1440,34 @@ if __name__ == "__main__":
 		# show the map
 		skyscan.show_map()
 
-		# perform scan
-		skyscan.scan()
+		# determine scan mode
+		if args.continuous == True:
 
-		# save the map
-		skyscan.save_map()
+			# perform continuous scan
+			skyscan.scan_continuous()
+
+		elif args.coarse_angle != None:
+
+			# perform adaptive scan
+			skyscan.scan_adaptive(args.coarse_angle, args.rssi_threshold, args.gradient_threshold)
+
+		elif args.latitude != None and args.longitude != None:
+
+			# perform band scan
+			skyscan.scan_band(args.latitude, args.longitude, args.altitude, args.band_width)
+
+		else:
+
+			# perform scan
+			skyscan.scan()
+		#
+
+		# determine if image requested
+		if args.headless == False or args.no_image == False:
+
+			# save the map
+			skyscan.save_map()
+		#
 
 		# perform cleanup
 		skyscan.cleanup()
@@ -325,8 +1475,12 @@ if __name__ == "__main__":
 		# debug
 		print('INFO: Scan complete!')
 
-		# wait for exit
-		input('Press any key to exit')
+		# determine if attended
+		if args.headless == False:
+
+			# wait for exit
+			input('Press any key to exit')
+		#
 
 	else:
 
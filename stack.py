@@ -0,0 +1,156 @@
+
+# imports
+import os
+import csv
+import glob
+import argparse
+import numpy as np
+
+# imports
+from library.stack import ScanStack
+from library.stack import CHANGE_THRESHOLD
+from library.stack import HOT_THRESHOLD
+from library.stack import MAX_DRIFT
+
+# constants
+OUTPUT_DIR = 'stack_data'
+SCAN_EXTENSIONS = ('.txt', '.scan')
+
+# constants
+RSSI_MIN = 400
+RSSI_MAX = 580
+
+#
+# Saves an image of the supplied grid
+#
+# @param stack the scan stack
+# @param grid_array the grid array, indexed [elevation, azimuth]
+# @param title the image title
+# @param label the color bar label
+# @param file_path the image file path
+# @param diverging the diverging state, which centers the colors on zero
+#
+def save_image(stack, grid_array, title, label, file_path, diverging=False):
+
+	# imports
+	import matplotlib
+	matplotlib.use('Agg')
+	import matplotlib.pyplot as plt
+
+	# determine colors
+	if diverging == True:
+		limit = max(np.nanmax(np.abs(grid_array)) if np.isnan(grid_array).all() == False else 0, 1)
+		cmap, vmin, vmax = 'coolwarm', -limit, limit
+	elif label == 'RSSI':
+		cmap, vmin, vmax = 'CMRmap', RSSI_MIN, RSSI_MAX
+	else:
+		cmap, vmin, vmax = 'viridis', None, None
+	#
+
+	# plot grid
+	extent = [stack.AZIMUTH_START, stack.AZIMUTH_END, stack.ELEVATION_START, stack.ELEVATION_END]
+	figure, axes = plt.subplots()
+	image = axes.imshow(grid_array, cmap=cmap, vmin=vmin, vmax=vmax, extent=extent)
+	figure.colorbar(image, ax=axes, pad=0.2, orientation='horizontal', location='bottom', label=label)
+
+	# set annotations
+	axes.set_title(title)
+	axes.set_xlabel('Azimuth (deg)')
+	axes.set_ylabel('Elevation (deg)')
+
+	# save plot
+	figure.savefig(file_path)
+	plt.close(figure)
+#
+
+# MAIN
+
+#
+# Performs main logic
+#
+# This method stacks repeated scans of the same region in the
+# supplied order (eg: daily scans) and saves images of the mean,
+# standard deviation and change from the previous scan of each
+# grid point. The grid points which changed are written to a CSV
+# file, and the satellites which drifted, appeared or disappeared
+# to another.
+#
+if __name__ == "__main__":
+
+	# initialize parser
+	parser = argparse.ArgumentParser()
+	parser.add_argument("scan_files", nargs="+", help="The scan data file paths or glob patterns, in time order")
+	parser.add_argument("--output_dir", default=OUTPUT_DIR, action="store", required=False, help="The output directory")
+	parser.add_argument("--change_threshold", type=float, default=CHANGE_THRESHOLD, action="store", required=False, help="The RSSI change of a changed grid point")
+	parser.add_argument("--hot_threshold", type=float, default=HOT_THRESHOLD, action="store", required=False, help="The RSSI threshold of a satellite")
+	parser.add_argument("--max_drift", type=float, default=MAX_DRIFT, action="store", required=False, help="The maximum drift of a satellite between scans in degrees")
+	parser.add_argument("--memmap_dir", action="store", required=False, help="The directory of the memory mapped stack of large scans")
+
+	# parse arguments
+	args = parser.parse_args()
+
+	# determine scan data files, sorting the files of each pattern
+	scan_files = [path for pattern in args.scan_files for path in sorted(glob.glob(pattern)) if path.endswith(SCAN_EXTENSIONS) == True]
+
+	# debug
+	print(f'INFO: Stacking {len(scan_files)} scans')
+
+	# load scans
+	stack = ScanStack(args.memmap_dir)
+	status = stack.load(scan_files)
+
+	# determine load status
+	if status == True:
+
+		# debug
+		num_scans, height, width = stack.stack.shape
+		print(f'INFO: Common grid: Az={stack.AZIMUTH_START}-{stack.AZIMUTH_END}, El={stack.ELEVATION_START}-{stack.ELEVATION_END}, Step={stack.STEP_ANGLE} ({height}x{width})')
+
+		# create output directory
+		os.makedirs(args.output_dir, exist_ok=True)
+
+		# save statistics
+		mean, std, count = stack.statistics()
+		save_image(stack, mean, f'Mean of {num_scans} Scans', 'RSSI', os.path.join(args.output_dir, 'mean.png'))
+		save_image(stack, std, f'Standard Deviation of {num_scans} Scans', 'RSSI Standard Deviation', os.path.join(args.output_dir, 'std.png'))
+
+		# open output files
+		with open(os.path.join(args.output_dir, 'changes.csv'), 'w', newline='') as changes_file, open(os.path.join(args.output_dir, 'events.csv'), 'w', newline='') as events_file:
+
+			# initialize writers
+			changes_writer = csv.writer(changes_file)
+			changes_writer.writerow(['previous_scan', 'scan', 'azimuth', 'elevation', 'previous_rssi', 'rssi', 'delta', 'event'])
+			events_writer = csv.writer(events_file)
+			events_writer.writerow(['previous_scan', 'scan', 'event', 'azimuth', 'elevation', 'previous_azimuth', 'previous_elevation', 'drift'])
+
+			# loop through scans
+			for index in range(1, num_scans):
+
+				# determine scan names
+				previous_name, name = stack.names[index-1], stack.names[index]
+
+				# save delta
+				save_image(stack, stack.delta(index), f'{name} - {previous_name}', 'RSSI Delta', os.path.join(args.output_dir, f'delta_{name}.png'), diverging=True)
+
+				# write changed grid points
+				changes = stack.changed_points(index, args.change_threshold, args.hot_threshold)
+				changes_writer.writerows(zip([previous_name] * len(changes['event']), [name] * len(changes['event']), np.round(changes['azimuth'], 6), np.round(changes['elevation'], 6), changes['previous'], changes['current'], changes['delta'], changes['event']))
+
+				# write satellite events
+				events = stack.satellite_events(index, args.hot_threshold, args.max_drift)
+				events_writer.writerows([previous_name, name] + list(event) for event in events)
+
+				# debug
+				print(f'INFO: {name}: {len(changes["event"])} changed points, {len(events)} satellite events')
+			#
+		#
+
+		# debug
+		print(f'INFO: Results saved to {args.output_dir}')
+
+	else:
+
+		# debug
+		print('ERROR: Unable to stack the scans')
+	#
+#
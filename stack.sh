@@ -0,0 +1,8 @@
+#!/bin/bash
+
+# constants
+SCAN_FILES="scan_data/*.txt"
+OUTPUT_DIR=stack_data
+
+# stack scan files
+python3 stack.py "$SCAN_FILES" --output_dir $OUTPUT_DIR